@@ -0,0 +1,350 @@
+"""Dashboard'un sıcak yolları için ölçeklenme ölçümleri.
+
+Her boyut için sentetik bir CSV üretilir (rfm.synthetic) ve uygulamanın
+aşamaları ayrı ayrı ölçülür: CSV yükleme, kenar çubuğu filtresi, metrik
+kartları, her groupby, pd.cut + crosstab, nlargest, her grafik ve to_csv.
+Karşılaştırma için hem uygulamanın ilk halindeki pandas işlemleri
+(``pandas.*``) hem de rfm paketindeki karşılıkları ölçülür.
+
+Süre, tekrarların en küçüğüdür. Tepe bellek, aynı aşamanın tracemalloc
+altında ayrıca çalıştırılmasıyla bulunur (numpy ve pandas tamponları dahil).
+Sonuçlar JSON olarak yazılır; --baseline ile verilen eski sonuçtan
+--tolerance oranından fazla yavaşlayan aşamalar işaretlenir ve çıkış kodu 1
+olur.
+
+Makine hızı ölçümler arasında değişebildiğinden her boyuttan önce sabit bir
+kalibrasyon işi (numpy sıralama, pandas groupby ve CSV ayrıştırma) ölçülür.
+Karşılaştırma saniyelerle değil, aşama süresinin kalibrasyon süresine oranıyla
+yapılır. Ortam (Python, pandas, numpy, platform, CPU sayısı) taban
+çizgisindekinden farklıysa uyarı verilir ve tolerans iki katına çıkarılır.
+
+    python benchmarks/bench_dashboard.py --sizes 1e3 1e4 1e5 -o results.json
+    python benchmarks/bench_dashboard.py --sizes 1e3 1e4 1e5 --baseline benchmarks/baseline.json
+
+Bellek içi aşamalar --max-memory-rows satırına kadar çalıştırılır; daha
+büyük boyutlarda (10^8'e kadar) yalnızca disk üzerindeki arka uç ölçülür.
+"""
+
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from rfm.aggregates import SegmentAggregates  # noqa: E402
+from rfm.export import write_export  # noqa: E402
+from rfm.figures import CHARTS, render_png  # noqa: E402
+from rfm.filtering import FilterIndex  # noqa: E402
+from rfm.loader import read_rfm_csv  # noqa: E402
+from rfm.ondisk import OnDiskAggregates, OnDiskTable, write_dataset  # noqa: E402
+from rfm.synthetic import write_rfm_csv  # noqa: E402
+
+DEFAULT_SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6]
+# Filtre: iki seviye ve orta bir skor aralığı, seçim tüm tablo olmasın
+LEVELS = ['Low', 'Top']
+SCORE_RANGE = (200, 400)
+
+
+class Stage:
+    """Ölçülen tek bir aşama. provides=True olan aşamalar sonrakilerin
+    kullandığı durumu üretir; --stages ile dışarıda kalsalar da bir kez
+    (ölçülmeden) çalıştırılırlar."""
+
+    def __init__(self, name, func, provides=False):
+        self.name = name
+        self.func = func
+        self.provides = provides
+
+
+def measure(func, repeat, memory=True):
+    """(en küçük süre, ortalama süre, tepe bayt) döndürür."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return min(times), sum(times) / len(times), peak
+
+
+def calibration_work(rows=200_000):
+    """Makine hızının ölçüsü olarak kullanılan sabit iş."""
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        'key': rng.integers(0, 100, rows),
+        'value': rng.random(rows),
+    })
+    np.sort(frame['value'].to_numpy())
+    frame.groupby('key')['value'].agg(['mean', 'sum', 'max'])
+    pd.read_csv(io.StringIO(frame.head(rows // 10).to_csv(index=False)))
+
+
+def environment():
+    """Sonuçların karşılaştırılabilir olup olmadığına bakılan ortam bilgisi."""
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+    }
+
+
+def in_memory_stages(path, render):
+    """Uygulamanın bellek içi yolundaki aşamalar; sıralı ve birbirini besler."""
+    state = {}
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    def load_plain():
+        state['plain'] = pd.read_csv(io.BytesIO(data))
+
+    def load_typed():
+        state['df'] = read_rfm_csv(data)
+
+    def mask_filter():
+        df = state['plain']
+        state['filtered'] = df[
+            df['CustomerLevel'].isin(LEVELS) & df['RFMScore'].between(*SCORE_RANGE)
+        ]
+
+    def build_index():
+        state['index'] = FilterIndex(state['df'])
+
+    def query():
+        state['selection'] = state['index'].query(LEVELS, *SCORE_RANGE)
+
+    def metrics_pandas():
+        filtered = state['filtered']
+        return [filtered[col].mean() for col in ('RFMScore', 'Monetary', 'Frequency')]
+
+    def metrics_index():
+        selection = state['selection']
+        return [selection.mean(col) for col in ('RFMScore', 'Monetary', 'Frequency')]
+
+    def frame():
+        state['frame'] = state['selection'].frame()
+
+    def aggregates():
+        agg = SegmentAggregates(state['frame'], ('bench',), selection=state['selection'])
+        agg.by_level, agg.overall, agg.corr, agg.crosstab, agg.top
+        state['agg'] = agg
+
+    def pandas_group(func):
+        return lambda: func(state['filtered'])
+
+    stages = [
+        Stage('load.read_csv', load_plain, provides=True),
+        Stage('load.typed', load_typed, provides=True),
+        Stage('filter.mask', mask_filter, provides=True),
+        Stage('filter.index_build', build_index, provides=True),
+        Stage('filter.query', query, provides=True),
+        Stage('metrics.pandas', metrics_pandas),
+        Stage('metrics.index', metrics_index),
+        Stage('groupby.pandas.level_counts', pandas_group(lambda d: d['CustomerLevel'].value_counts())),
+        Stage('groupby.pandas.revenue', pandas_group(lambda d: d.groupby('CustomerLevel')['Monetary'].sum())),
+        Stage('groupby.pandas.avg_rfm', pandas_group(lambda d: d.groupby('CustomerLevel')['RFMScore'].mean())),
+        Stage('groupby.pandas.segment_table', pandas_group(lambda d: d.groupby('CustomerLevel').agg({
+            'CustomerID': 'count', 'Recency': 'mean', 'Frequency': 'mean',
+            'Monetary': 'mean', 'RFMScore': 'mean'}))),
+        Stage('groupby.pandas.radar', pandas_group(lambda d: d.groupby('CustomerLevel')[
+            ['Recency', 'Frequency', 'Monetary', 'RFMScore']].mean())),
+        Stage('groupby.index.segment_table', lambda: state['selection'].by_level()),
+        Stage('crosstab.pandas', pandas_group(lambda d: pd.crosstab(
+            d['CustomerLevel'], pd.cut(d['RFMScore'], bins=5)))),
+        Stage('nlargest.pandas', pandas_group(lambda d: d.nlargest(10, 'RFMScore'))),
+        Stage('frame.selection', frame, provides=True),
+        Stage('aggregates.all', aggregates, provides=True),
+    ]
+    if render:
+        for chart_id, (payload, _) in CHARTS.items():
+            stages.append(Stage(
+                f"figure.{chart_id}",
+                lambda chart_id=chart_id, payload=payload: render_png(chart_id, payload(state['agg'])),
+            ))
+    stages += [
+        Stage('export.to_csv', pandas_group(lambda d: d.to_csv(index=False))),
+        Stage('export.stream_csv', lambda: write_export(state['agg'], os.devnull, 'csv')),
+    ]
+    return stages
+
+
+def ondisk_stages(path, workdir):
+    state = {}
+    root = os.path.join(workdir, f"dataset-{os.path.basename(path)}")
+
+    def build():
+        shutil.rmtree(root, ignore_errors=True)
+        write_dataset(path, None, root)
+        state['table'] = OnDiskTable(root)
+
+    def query():
+        state['selection'] = state['table'].query(LEVELS, *SCORE_RANGE)
+
+    def metrics():
+        return [state['selection'].mean(col) for col in ('RFMScore', 'Monetary', 'Frequency')]
+
+    def scan():
+        agg = OnDiskAggregates(state['table'], state['selection'], ('bench',))
+        agg.by_level, agg.corr, agg.crosstab, agg.top
+
+    return [
+        Stage('ondisk.build', build, provides=True),
+        Stage('ondisk.query', query, provides=True),
+        Stage('ondisk.metrics', metrics),
+        Stage('ondisk.aggregates', scan),
+    ]
+
+
+def run(args):
+    workdir = args.workdir or tempfile.mkdtemp(prefix='rfm-bench-')
+    os.makedirs(workdir, exist_ok=True)
+    results = []
+    calibration = np.inf
+    for n in args.sizes:
+        # Kalibrasyon her boyuttan önce tekrarlanır; en iyi süre kullanılır
+        calibration = min(calibration, measure(calibration_work, max(args.repeat, 5), memory=False)[0])
+        path = os.path.join(workdir, f"rfm-{n}.csv")
+        if not os.path.exists(path):
+            print(f"[{n:,}] veri üretiliyor...", file=sys.stderr)
+            write_rfm_csv(path, n, seed=args.seed)
+
+        stages = []
+        if n <= args.max_memory_rows:
+            stages += in_memory_stages(path, render=n <= args.max_render_rows)
+        if args.ondisk:
+            stages += ondisk_stages(path, workdir)
+
+        for stage in stages:
+            if args.stages and not any(stage.name.startswith(prefix) for prefix in args.stages):
+                if stage.provides:
+                    stage.func()
+                continue
+            # Büyük boyutlarda pahalı aşamalar tek kez çalıştırılır
+            repeat = args.repeat if n <= 10 ** 6 else 1
+            best, mean, peak = measure(stage.func, repeat, memory=not args.no_memory)
+            results.append({
+                'rows': n, 'stage': stage.name,
+                'seconds': best, 'mean_seconds': mean, 'peak_bytes': peak,
+            })
+            peak_text = f"{peak / 1024 ** 2:9.1f} MB" if peak is not None else ""
+            print(f"{n:>12,}  {stage.name:<32} {best * 1000:10.2f} ms {peak_text}", file=sys.stderr)
+
+    for result in results:
+        result['relative'] = result['seconds'] / calibration
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            **environment(),
+            'repeat': args.repeat,
+            'calibration_seconds': calibration,
+        },
+        'results': results,
+    }
+
+
+def environment_changes(current, baseline):
+    """Taban çizgisinden farklı olan ortam alanları."""
+    return [
+        key for key in environment()
+        if key in baseline['meta'] and baseline['meta'][key] != current['meta'].get(key)
+    ]
+
+
+def compare(current, baseline, tolerance, min_seconds):
+    """Taban çizgisinden yavaşlayan (satır, aşama) çiftleri.
+
+    İki sonuçta da kalibrasyon varsa kalibrasyona göre oranlar, yoksa
+    saniyeler karşılaştırılır. min_seconds her durumda saniye farkıdır.
+    """
+    old = {(r['rows'], r['stage']): r for r in baseline['results']}
+    relative = 'calibration_seconds' in baseline['meta'] and 'calibration_seconds' in current['meta']
+    regressions = []
+    for result in current['results']:
+        previous = old.get((result['rows'], result['stage']))
+        if previous is None:
+            continue
+        key = 'relative' if relative else 'seconds'
+        ratio = result[key] / previous[key] if previous[key] else np.inf
+        result['baseline_seconds'] = previous['seconds']
+        result['ratio'] = ratio
+        if ratio > 1 + tolerance and result['seconds'] - previous['seconds'] > min_seconds:
+            regressions.append(result)
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', nargs='+', type=lambda s: int(float(s)), default=DEFAULT_SIZES,
+                        help="Satır sayıları, ör. 1e3 1e5 1e8")
+    parser.add_argument('-o', '--output', help="Sonuç JSON dosyası")
+    parser.add_argument('--baseline', help="Karşılaştırılacak eski sonuç JSON dosyası")
+    parser.add_argument('--tolerance', type=float, default=0.75,
+                        help="İzin verilen göreli yavaşlama (varsayılan 0.75 = %%75)")
+    parser.add_argument('--min-seconds', type=float, default=0.005,
+                        help="Bu farkın altındaki yavaşlamalar gürültü sayılır")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stages', nargs='+', help="Yalnızca bu öneklerle başlayan aşamalar")
+    parser.add_argument('--max-memory-rows', type=lambda s: int(float(s)), default=10 ** 7)
+    parser.add_argument('--max-render-rows', type=lambda s: int(float(s)), default=10 ** 6)
+    parser.add_argument('--ondisk', action='store_true', help="Disk üzerindeki arka ucu da ölç")
+    parser.add_argument('--no-memory', action='store_true', help="Tepe bellek ölçümünü atla")
+    parser.add_argument('--workdir', help="Üretilen CSV'lerin saklanacağı klasör")
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    current = run(args)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        tolerance = args.tolerance
+        changes = environment_changes(current, baseline)
+        if changes:
+            tolerance *= 2
+            print(f"UYARI: ortam taban çizgisinden farklı ({', '.join(changes)}); "
+                  f"tolerans %{tolerance * 100:.0f}", file=sys.stderr)
+        regressions = compare(current, baseline, tolerance, args.min_seconds)
+        for r in regressions:
+            print(f"YAVAŞLAMA {r['rows']:>12,}  {r['stage']:<32} "
+                  f"{r['baseline_seconds'] * 1000:.2f} ms -> {r['seconds'] * 1000:.2f} ms "
+                  f"(x{r['ratio']:.2f})", file=sys.stderr)
+        status = 1 if regressions else 0
+
+    text = json.dumps(current, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""RFM analizi dashboard'u için veri katmanı.
+
+Streamlit'ten bağımsızdır; grafik kütüphaneleri yalnızca rfm.figures ilk
+çizimi yaptığında yüklenir. Komut satırı için: python -m rfm --help
+"""
+
+from rfm.aggregates import SegmentAggregates, build_aggregate_cache
+from rfm.artifacts import ArtifactBundle, build_bundle, open_bundle
+from rfm.filtering import FilterIndex, build_filter_index
+from rfm.history import SnapshotHistory, history_store
+from rfm.incremental import RFMStateStore
+from rfm.loader import DATE_COLUMNS, DTYPES, DatasetLease, FrameCache, load_rfm_data, read_rfm_csv
+from rfm.lookup import CustomerIndex, customer_index
+from rfm.ondisk import OnDiskTable, open_rfm_table, table_backend
+from rfm.partitions import PARTITION_COLUMN, discover_partitions, load_partitions
+from rfm.report import REQUIRED_COLUMNS, missing_columns, segment_table, summary_report, top_customers
+from rfm.scoring import RFMAccumulator, compute_rfm, compute_rfm_from_csv
+from rfm.segmentation import MiniBatchKMeans, fit_segments, segment_view
+
+__all__ = [
+    "DATE_COLUMNS",
+    "DTYPES",
+    "ArtifactBundle",
+    "CustomerIndex",
+    "DatasetLease",
+    "FilterIndex",
+    "FrameCache",
+    "MiniBatchKMeans",
+    "OnDiskTable",
+    "PARTITION_COLUMN",
+    "REQUIRED_COLUMNS",
+    "RFMAccumulator",
+    "RFMStateStore",
+    "SegmentAggregates",
+    "SnapshotHistory",
+    "build_aggregate_cache",
+    "build_bundle",
+    "build_filter_index",
+    "compute_rfm",
+    "compute_rfm_from_csv",
+    "customer_index",
+    "discover_partitions",
+    "fit_segments",
+    "history_store",
+    "load_partitions",
+    "load_rfm_data",
+    "missing_columns",
+    "open_bundle",
+    "open_rfm_table",
+    "read_rfm_csv",
+    "segment_table",
+    "segment_view",
+    "summary_report",
+    "table_backend",
+    "top_customers",
+]
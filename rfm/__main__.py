@@ -0,0 +1,3 @@
+from rfm.cli import main
+
+raise SystemExit(main())
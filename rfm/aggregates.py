@@ -0,0 +1,200 @@
+"""Filtre durumu başına bir kez hesaplanan ortak özetler.
+
+Segment tabloları, grafikler, özet rapor ve dışa aktarım aynı istatistikleri
+tekrar tekrar hesaplamak yerine buradan okur. Sonuçlar filtre durumuna göre
+(seçimin satır aralıkları) LRU önbellekte tutulur; farklı slider değerleri
+aynı satırlara denk geliyorsa aynı kayıt kullanılır.
+"""
+
+import threading
+from collections import OrderedDict
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from rfm.loader import memoize_per_frame
+from rfm.profiling import traced
+from rfm.summaries import build_level_summaries, use_approx
+
+STAT_COLUMNS = ['Recency', 'Frequency', 'Monetary', 'RFMScore']
+LEVEL_STATS = ['count', 'sum', 'mean', 'std', 'min', 'max']
+QUANTILES = [0.25, 0.5, 0.75, 0.9, 0.95]
+DESCRIBE_QUANTILES = [0.25, 0.5, 0.75]
+
+RFM_CATEGORY_LABELS = ['Düşük', 'Düşük-Orta', 'Orta', 'Orta-Yüksek', 'Yüksek']
+
+
+class SegmentAggregates:
+    """Tek bir filtre durumunun özetleri; her parça ilk erişimde hesaplanır."""
+
+    def __init__(self, frame, key=(), top_n=10, selection=None):
+        self.frame = frame
+        # Filtre durumunun anahtarı; grafik önbelleği de bunu kullanır
+        self.key = key
+        self.top_n = top_n
+        self.selection = selection
+
+    def prefill(self, **parts):
+        """Önceden hesaplanmış parçaları (ör. artifact paketindeki overall,
+        by_level) yerleştirir; bunlar artık ilk erişimde hesaplanmaz."""
+        for name, value in parts.items():
+            if not isinstance(getattr(type(self), name, None), cached_property):
+                raise AttributeError(f"{name} önceden doldurulabilen bir özet değil")
+            self.__dict__[name] = value
+        return self
+
+    @cached_property
+    def summaries(self):
+        """Büyük seçimlerde histogram özetleri; küçüklerde None (kesin hesap)."""
+        if self.selection is None or not use_approx(len(self.frame)):
+            return None
+        summaries = build_level_summaries(self.selection.index)
+        return summaries if summaries.available else None
+
+    def _quantiles(self, col, qs):
+        if self.summaries is not None:
+            return self.summaries.overall(self.selection, col).quantile(qs)
+        return self.frame[col].quantile(qs).to_numpy()
+
+    def __len__(self):
+        return len(self.frame)
+
+    @cached_property
+    @traced('aggregates.by_level')
+    def by_level(self):
+        """Seviye × (sütun, istatistik) tablosu; tek groupby geçişi."""
+        grouped = self.frame.groupby('CustomerLevel', observed=True)[STAT_COLUMNS]
+        stats = grouped.agg(LEVEL_STATS)
+        if self.summaries is None:
+            quantiles = grouped.quantile(QUANTILES).unstack()
+            quantiles.columns = pd.MultiIndex.from_tuples(
+                [(col, f"q{q:g}") for col, q in quantiles.columns]
+            )
+        else:
+            quantiles = {}
+            for col in STAT_COLUMNS:
+                per_level = self.summaries.by_level(self.selection, col)
+                values = np.array([per_level[level].quantile(QUANTILES) for level in stats.index])
+                for i, q in enumerate(QUANTILES):
+                    quantiles[(col, f"q{q:g}")] = values[:, i]
+            quantiles = pd.DataFrame(quantiles, index=stats.index)
+        order = [
+            (col, stat) for col in STAT_COLUMNS
+            for stat in LEVEL_STATS + [f"q{q:g}" for q in QUANTILES]
+        ]
+        return pd.concat([stats, quantiles], axis=1)[order]
+
+    def stat(self, col, stat):
+        """Seviye indeksli tek istatistik, ör. stat('Monetary', 'sum')."""
+        return self.by_level[(col, stat)]
+
+    def means(self):
+        return self.by_level.xs('mean', axis=1, level=1)[STAT_COLUMNS]
+
+    @cached_property
+    @traced('aggregates.overall')
+    def overall(self):
+        """Tüm seçim için sütun başına count/mean/std/min/max ve quantile'lar."""
+        data = self.frame[STAT_COLUMNS]
+        stats = data.agg(['count', 'mean', 'std', 'min', 'max'])
+        quantiles = pd.DataFrame(
+            {col: self._quantiles(col, QUANTILES) for col in STAT_COLUMNS},
+            index=[f"q{q:g}" for q in QUANTILES],
+        )
+        return pd.concat([stats, quantiles])
+
+    def mean(self, col):
+        return self.overall.loc['mean', col]
+
+    def quantiles(self, col, qs=QUANTILES):
+        return pd.Series(
+            [self.overall.loc[f"q{q:g}", col] for q in qs], index=qs, name=col
+        )
+
+    def describe(self, col):
+        """Series.describe() ile aynı satırlar."""
+        overall = self.overall[col]
+        index = ['count', 'mean', 'std', 'min'] + [f"{q:.0%}" for q in DESCRIBE_QUANTILES] + ['max']
+        values = [overall['count'], overall['mean'], overall['std'], overall['min']]
+        values += [overall[f"q{q:g}"] for q in DESCRIBE_QUANTILES] + [overall['max']]
+        return pd.Series(values, index=index, name=col)
+
+    @cached_property
+    def linear_fit(self):
+        """RFMScore -> Monetary en küçük kareler doğrusu (eğim, kesişim).
+
+        np.polyfit(x, y, 1) ile aynı sonuç; yalnızca toplamlar kullanılır.
+        """
+        x = self.frame['RFMScore'].to_numpy(dtype='float64')
+        y = self.frame['Monetary'].to_numpy(dtype='float64')
+        n = len(x)
+        if n == 0:
+            return np.nan, np.nan
+        sx, sy = x.sum(), y.sum()
+        denom = n * (x @ x) - sx * sx
+        slope = (n * (x @ y) - sx * sy) / denom if denom else 0.0
+        return slope, (sy - slope * sx) / n
+
+    @cached_property
+    @traced('aggregates.corr')
+    def corr(self):
+        return self.frame[STAT_COLUMNS].corr()
+
+    @cached_property
+    @traced('aggregates.top')
+    def top(self):
+        return self.frame.nlargest(self.top_n, 'RFMScore')
+
+    @cached_property
+    def rfm_category(self):
+        return pd.cut(self.frame['RFMScore'], bins=5, labels=RFM_CATEGORY_LABELS)
+
+    @cached_property
+    @traced('aggregates.crosstab')
+    def crosstab(self):
+        return pd.crosstab(self.frame['CustomerLevel'], self.rfm_category)
+
+    def iter_rows(self, chunk_rows):
+        """Dışa aktarım için RFM_Category eklenmiş satır parçaları."""
+        frame, category = self.frame, self.rfm_category
+        for start in range(0, max(len(frame), 1), chunk_rows):
+            stop = start + chunk_rows
+            yield frame.iloc[start:stop].assign(RFM_Category=category.iloc[start:stop])
+
+
+class AggregateCache:
+    """Filtre durumuna göre SegmentAggregates saklayan LRU önbellek."""
+
+    def __init__(self, maxsize=8, factory=None):
+        self.maxsize = maxsize
+        # factory(selection, key) -> SegmentAggregates; disk tabanlı veri
+        # setleri kendi özet sınıflarını verir
+        self.factory = factory or (
+            lambda selection, key: SegmentAggregates(selection.frame(), key, selection=selection)
+        )
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, selection):
+        key = tuple(selection.ranges.items())
+        with self._lock:
+            aggregates = self._entries.get(key)
+            if aggregates is not None:
+                self._entries.move_to_end(key)
+                return aggregates
+        aggregates = self.factory(selection, key)
+        with self._lock:
+            self._entries[key] = aggregates
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return aggregates
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@memoize_per_frame
+def build_aggregate_cache(df):
+    """Veri seti başına bir AggregateCache."""
+    return AggregateCache()
@@ -0,0 +1,303 @@
+"""Varsayılan veri seti için önceden hesaplanmış artifact paketi.
+
+Dağıtımda (python -m rfm bundle) ya da varsayılan CSV değiştiğinde ilk
+sayfa çizildikten sonra arka planda bir kez üretilir. Paket CSV'nin içerik hash'i ve BUNDLE_VERSION ile
+adlandırılan bir klasördür:
+
+    manifest.json       parmak izi, varsayılan filtre anahtarı, satır sayısı
+    data.arrow          sıralı, belleğe eşlenebilen sütunlu veri
+    overall.parquet     filtresiz seçimin genel özetleri
+    by_level.parquet    filtresiz seçimin seviye başına özetleri
+    summaries.npz       quantile özetleri (LevelSummaries; yalnızca büyük veride)
+    charts/<id>.png     varsayılan filtre durumunun grafikleri
+
+install() bunları uygulamanın kendi önbelleklerine yerleştirir: veri Arrow
+dosyası olarak, parmak izi ve özetler veri setinin memoize sonuçları olarak,
+grafikler FigureCache'e. Böylece yeni bir oturumun ilk sayfası hiçbir grafik
+çizilmeden ve veri taranmadan gösterilir. Grafik süreç havuzu arka planda
+hazırlanır; filtre değiştiğinde çizim beklemeden başlar.
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from rfm.filtering import build_filter_index
+from rfm.loader import (
+    CACHE_DIR, HAS_PYARROW, SCHEMA_VERSION, install_sidecar, sidecar_path, source_digest,
+)
+from rfm.profiling import traced
+
+# Paket içeriği veya anahtarları değişince eski paketler geçersiz sayılsın diye artırılır
+BUNDLE_VERSION = 2
+BUNDLE_DIR = os.environ.get('RFM_BUNDLE_DIR', os.path.join(CACHE_DIR, 'bundles'))
+DEFAULT_SOURCE = 'data/OnlineRetail_RFMSCORE.csv'
+MAX_BUNDLES = 4
+MANIFEST_FILE = 'manifest.json'
+DATA_FILE = 'data.arrow'
+SUMMARIES_FILE = 'summaries.npz'
+PREFILLED = ['overall', 'by_level']
+
+_lock = threading.Lock()
+_bundles = {}
+_building = set()
+_prewarmed = False
+
+
+def default_selection(filter_index):
+    """Uygulamanın varsayılan filtre durumu: tüm seviyeler, tüm skor aralığı."""
+    return filter_index.query(
+        filter_index.levels, int(filter_index.score_min), int(filter_index.score_max)
+    )
+
+
+def bundle_path(digest, root=BUNDLE_DIR):
+    return os.path.join(root, f"{digest}-v{BUNDLE_VERSION}.{SCHEMA_VERSION}")
+
+
+class ArtifactBundle:
+    """Diskteki bir paketin okuyucusu."""
+
+    def __init__(self, path, manifest, mtime=None):
+        self.path = path
+        self.manifest = manifest
+        self.mtime = mtime
+        self.digest = manifest['digest']
+        self.fingerprint = manifest['fingerprint']
+        self.rows = manifest['rows']
+        self.filter_key = tuple((level, (a, b)) for level, a, b in manifest['filter_key'])
+        self._installed = None
+
+    def __repr__(self):
+        return f"ArtifactBundle({self.path!r}, rows={self.rows}, charts={len(self.charts)})"
+
+    @property
+    def charts(self):
+        return self.manifest['charts']
+
+    def chart(self, chart_id):
+        with open(os.path.join(self.path, 'charts', f"{chart_id}.png"), 'rb') as f:
+            return f.read()
+
+    def _file(self, name):
+        path = os.path.join(self.path, name)
+        return path if os.path.exists(path) else None
+
+    def install_data(self):
+        """data.arrow'u CSV'nin Arrow dosyası olarak yerleştirir; CSV hiç ayrıştırılmaz."""
+        path = self._file(DATA_FILE)
+        if path is not None and HAS_PYARROW:
+            try:
+                install_sidecar(self.digest, path)
+            except OSError:
+                pass
+
+    @traced('bundle.install')
+    def install(self, df, renderer=None):
+        """Paketteki sonuçları df'in önbelleklerine yerleştirir.
+
+        df bu paketin CSV'sinden yüklenmiş olmalıdır; uyuşmazsa hiçbir şey
+        yapılmaz ve False döner. Paket klasörü bu arada silindiyse (eski
+        paketlerin temizlenmesi ya da başka bir sürecin yeniden üretmesi) de
+        False döner; uygulama normal yoldan devam eder.
+        """
+        if self._installed is not None and self._installed() is df:
+            return True
+        try:
+            return self._install(df, renderer)
+        except OSError:
+            return False
+
+    def _install(self, df, renderer):
+        from rfm.figures import frame_fingerprint, get_renderer
+        from rfm.ondisk import table_backend
+        from rfm.summaries import LevelSummaries, build_level_summaries
+
+        if len(df) != self.rows:
+            return False
+        # Dosyalar önbelleklere dokunmadan önce okunur; eksik dosya hiçbir
+        # şeyi yarım yerleştirmez
+        charts = {chart_id: self.chart(chart_id) for chart_id in self.charts}
+        prefilled, summaries = {}, None
+        if isinstance(df, pd.DataFrame):
+            prefilled = {
+                name: pd.read_parquet(os.path.join(self.path, f"{name}.parquet"))
+                for name in PREFILLED if self._file(f"{name}.parquet")
+            }
+            path = self._file(SUMMARIES_FILE)
+            if path is not None:
+                with np.load(path) as arrays:
+                    summaries = dict(arrays)
+
+        if isinstance(df, pd.DataFrame):
+            # İçerik hash'i aynı CSV'yi gösterdiğinden veri yeniden hashlenmez
+            frame_fingerprint.seed(df, self.fingerprint)
+            if summaries is not None:
+                filter_index = build_filter_index(df)
+                build_level_summaries.seed(filter_index, LevelSummaries.from_arrays(filter_index, summaries))
+        filter_index, aggregate_cache, fingerprint = table_backend(df)
+        if fingerprint != self.fingerprint:
+            return False
+        aggregates = aggregate_cache.get(default_selection(filter_index))
+        if aggregates.key != self.filter_key:
+            return False
+        if prefilled:
+            aggregates.prefill(**prefilled)
+        cache = (renderer or get_renderer()).cache
+        for chart_id, image in charts.items():
+            cache.put((chart_id, aggregates.key, fingerprint), image)
+        self._installed = weakref.ref(df)
+        return True
+
+
+def open_bundle(source=DEFAULT_SOURCE, root=BUNDLE_DIR):
+    """source'un güncel paketi; yoksa (ya da CSV değiştiyse) None.
+
+    Süreçteki paket nesnesi, manifest dosyası hâlâ aynıysa yeniden kullanılır;
+    paket silindiyse ya da yeniden üretildiyse diskten yeniden okunur.
+    """
+    digest, _ = source_digest(source)
+    path = bundle_path(digest, root)
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    try:
+        mtime = os.stat(manifest_path).st_mtime_ns
+    except OSError:
+        mtime = None
+    with _lock:
+        bundle = _bundles.get(path)
+        if bundle is not None and (mtime is None or bundle.mtime != mtime):
+            del _bundles[path]
+            bundle = None
+    if bundle is not None:
+        return bundle
+    if mtime is None:
+        return None
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    bundle = ArtifactBundle(path, manifest, mtime)
+    bundle.install_data()
+    with _lock:
+        _bundles[path] = bundle
+    return bundle
+
+
+@traced('bundle.build')
+def build_bundle(source=DEFAULT_SOURCE, root=BUNDLE_DIR, renderer=None):
+    """source için paketi üretip yazar ve ArtifactBundle döndürür."""
+    from rfm.figures import get_renderer
+    from rfm.ondisk import open_rfm_table, table_backend
+    from rfm.summaries import build_level_summaries
+
+    renderer = renderer or get_renderer()
+    digest, _ = source_digest(source)
+    df = open_rfm_table(source)
+    filter_index, aggregate_cache, fingerprint = table_backend(df)
+    aggregates = aggregate_cache.get(default_selection(filter_index))
+    futures = renderer.submit_all(fingerprint, aggregates)
+
+    path = bundle_path(digest, root)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    os.makedirs(os.path.join(tmp_path, 'charts'))
+    try:
+        if isinstance(df, pd.DataFrame):
+            if os.path.exists(sidecar_path(digest)):
+                shutil.copyfile(sidecar_path(digest), os.path.join(tmp_path, DATA_FILE))
+            for name in PREFILLED:
+                getattr(aggregates, name).to_parquet(os.path.join(tmp_path, f"{name}.parquet"))
+            # Histogram özetleri yalnızca büyük veride kullanılır
+            if aggregates.summaries is not None:
+                summaries = build_level_summaries(filter_index)
+                np.savez(os.path.join(tmp_path, SUMMARIES_FILE), **summaries.to_arrays())
+        for chart_id, future in futures.items():
+            with open(os.path.join(tmp_path, 'charts', f"{chart_id}.png"), 'wb') as f:
+                f.write(future.result())
+        manifest = {
+            'version': BUNDLE_VERSION,
+            'schema': SCHEMA_VERSION,
+            'source': os.path.basename(str(source)),
+            'digest': digest,
+            'fingerprint': fingerprint,
+            'rows': len(df),
+            'filter_key': [[level, int(a), int(b)] for level, (a, b) in aggregates.key],
+            'charts': list(futures),
+            'created': time.time(),
+        }
+        with open(os.path.join(tmp_path, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        if os.path.exists(path):
+            shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        mtime = os.stat(os.path.join(path, MANIFEST_FILE)).st_mtime_ns
+    finally:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    _prune_bundles(root)
+    bundle = ArtifactBundle(path, manifest, mtime)
+    with _lock:
+        _bundles[path] = bundle
+    return bundle
+
+
+def _prune_bundles(root):
+    paths = [
+        os.path.join(root, name) for name in os.listdir(root)
+        if os.path.exists(os.path.join(root, name, MANIFEST_FILE))
+    ]
+    if len(paths) <= MAX_BUNDLES:
+        return
+    paths.sort(key=os.path.getmtime)
+    for path in paths[:len(paths) - MAX_BUNDLES]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _build_in_background(source, root):
+    try:
+        build_bundle(source, root)
+    except Exception:
+        # Paket yalnızca hızlandırır; üretilemezse uygulama normal yoldan çalışır
+        pass
+    finally:
+        with _lock:
+            _building.discard((source, root))
+
+
+def hydrate(source=DEFAULT_SOURCE, root=BUNDLE_DIR):
+    """İlk sayfayı bekletmeden arka planda hazırlık yapar; source'un güncel paketi
+    varsa döndürür.
+
+    Grafik süreç havuzu süreç başına bir kez arka planda kurulur ve ısıtılır.
+    """
+    global _prewarmed
+    from rfm.figures import get_renderer
+
+    with _lock:
+        prewarm, _prewarmed = not _prewarmed, True
+    if prewarm:
+        threading.Thread(target=get_renderer().prewarm, name='rfm-prewarm', daemon=True).start()
+    return open_bundle(source, root)
+
+
+def build_bundle_async(source=DEFAULT_SOURCE, root=BUNDLE_DIR):
+    """Güncel paket yoksa süreç başına bir kez arka planda üretir.
+
+    Sayfa çizildikten sonra çağrılmalıdır: veri, özetler ve grafikler o anda
+    önbellekte olduğundan üretim yalnızca dosya yazmaktır ve oturumla yarışmaz.
+    """
+    if open_bundle(source, root) is not None:
+        return False
+    with _lock:
+        if (source, root) in _building:
+            return False
+        _building.add((source, root))
+    threading.Thread(
+        target=_build_in_background, args=(source, root), name='rfm-bundle', daemon=True
+    ).start()
+    return True
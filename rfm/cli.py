@@ -0,0 +1,222 @@
+"""Dashboard açmadan özet rapor ve filtrelenmiş dışa aktarım üreten komut satırı.
+
+    python -m rfm report data/OnlineRetail_RFMSCORE.csv --levels Top Middle
+    python -m rfm export data/OnlineRetail_RFMSCORE.csv -o top.csv.gz --min-score 300
+    python -m rfm report 'exports/*/2011-*.csv' --partitions DE/2011-05 FR/2011-05
+    python -m rfm top data/OnlineRetail_RFMSCORE.csv --by Monetary --limit 500 --levels Top
+    python -m rfm lookup data/OnlineRetail_RFMSCORE.csv 12347 12348
+    python -m rfm segments data/OnlineRetail_RFMSCORE.csv -k 5 -o segments.csv
+    python -m rfm bundle data/OnlineRetail_RFMSCORE.csv --root /srv/rfm-bundles
+    python -m rfm ingest gunluk/2011-12-09.csv --state rfm-state/ -o rfm.csv
+
+Streamlit ve grafik kütüphaneleri hiç yüklenmez.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from rfm.artifacts import BUNDLE_DIR, DEFAULT_SOURCE, build_bundle
+from rfm.export import EXPORT_FORMATS, available_formats, write_export
+from rfm.incremental import RFMStateStore
+from rfm.lookup import RANK_COLUMNS, customer_index
+from rfm.ondisk import open_rfm_table, table_backend
+from rfm.partitions import discover_partitions, is_multi_source, load_partitions
+from rfm.report import TOP_COLUMNS, missing_columns, segment_table, summary_report, top_customers
+from rfm.segmentation import (
+    FEATURES, MISSING_SEGMENT, SEGMENT_COLUMN, fit_segments, iter_feature_chunks, segment_names,
+)
+
+
+def _add_filters(parser):
+    parser.add_argument('csv', help="RFM CSV dosyası, klasör ya da glob deseni")
+    parser.add_argument('--partitions', nargs='+', help="Yalnızca bu bölümler (klasör/glob girdilerinde)")
+    parser.add_argument('--levels', nargs='+', help="Müşteri seviyeleri (varsayılan: hepsi)")
+    parser.add_argument('--min-score', type=float, default=-np.inf, help="En küçük RFMScore")
+    parser.add_argument('--max-score', type=float, default=np.inf, help="En büyük RFMScore")
+
+
+def _open(args):
+    if not is_multi_source(args.csv):
+        return open_rfm_table(args.csv)
+    sources = discover_partitions(args.csv)
+    if args.partitions:
+        sources = {name: source for name, source in sources.items() if name in args.partitions}
+    if not sources:
+        raise SystemExit(f"{args.csv} için CSV dosyası bulunamadı")
+    return load_partitions(sources)
+
+
+def _query(args):
+    df = _open(args)
+    missing = missing_columns(df.columns)
+    if missing:
+        raise SystemExit(f"Eksik sütunlar: {', '.join(missing)}")
+    filter_index, aggregate_cache, _ = table_backend(df)
+    selection = filter_index.query(args.levels, args.min_score, args.max_score)
+    return filter_index, aggregate_cache, selection
+
+
+def _select(args):
+    _, aggregate_cache, selection = _query(args)
+    return selection, aggregate_cache.get(selection)
+
+
+def _format_for(path, fmt):
+    if fmt is not None:
+        return fmt
+    # En uzun uzantı önce: .csv.gz, .csv'den önce denenir
+    for name, (extension, _, _) in sorted(EXPORT_FORMATS.items(), key=lambda item: -len(item[1][0])):
+        if path.endswith(f".{extension}"):
+            return name
+    return 'csv'
+
+
+def run_report(args):
+    selection, aggregates = _select(args)
+    text = summary_report(aggregates, segment_table(selection))
+    if args.top:
+        text += "\n**En Değerli Müşteriler:**\n" + top_customers(aggregates).to_string(index=False) + "\n"
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    return 0
+
+
+def run_export(args):
+    fmt = _format_for(args.output, args.format)
+    if fmt not in available_formats():
+        raise SystemExit(f"{fmt} formatı için gerekli paket kurulu değil")
+    _, aggregates = _select(args)
+    write_export(aggregates, args.output, fmt)
+    print(f"{len(aggregates):,} satır -> {args.output}", file=sys.stderr)
+    return 0
+
+
+def run_top(args):
+    filter_index, _, selection = _query(args)
+    page = customer_index(filter_index).top(selection, args.by, args.offset, args.limit)
+    sys.stdout.write(page[TOP_COLUMNS].to_string(index=False) + "\n")
+    return 0
+
+
+def run_lookup(args):
+    filter_index, _, selection = _query(args)
+    customers = customer_index(filter_index)
+    found = 0
+    for customer_id in args.customer_ids:
+        matches = customers.lookup(customer_id, selection)
+        if matches.empty:
+            print(f"{customer_id}: bulunamadı", file=sys.stderr)
+            continue
+        found += 1
+        sys.stdout.write(matches[TOP_COLUMNS + ['LevelRank', 'Selected']].to_string(index=False) + "\n")
+    return 0 if found == len(args.customer_ids) else 1
+
+
+def run_segments(args):
+    df = _open(args)
+    missing = missing_columns(df.columns)
+    if missing:
+        raise SystemExit(f"Eksik sütunlar: {', '.join(missing)}")
+    model = fit_segments(df, args.clusters, args.seed)
+    sys.stdout.write(model.describe().to_string() + "\n")
+    if args.output:
+        # Diskteki tablolar da parça parça etiketlenir; tablo belleğe alınmaz
+        # predict eksik satırlarda -1 döndürür: son ad MISSING_SEGMENT
+        names = np.array(segment_names(len(model.centers)) + [MISSING_SEGMENT], dtype=object)
+        columns = ['CustomerID', 'CustomerLevel'] + FEATURES
+        rows, header = 0, True
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            for chunk in iter_feature_chunks(df, columns)():
+                labels = chunk[['CustomerID', 'CustomerLevel']].copy()
+                labels[SEGMENT_COLUMN] = names[model.predict(chunk)]
+                labels.to_csv(f, index=False, header=header)
+                rows += len(labels)
+                header = False
+        print(f"{rows:,} satır -> {args.output}", file=sys.stderr)
+    return 0
+
+
+def run_bundle(args):
+    bundle = build_bundle(args.csv, args.root)
+    print(f"{bundle.rows:,} satır, {len(bundle.charts)} grafik -> {bundle.path}", file=sys.stderr)
+    return 0
+
+
+def run_ingest(args):
+    store = RFMStateStore.open(args.state, frequency_by=args.frequency_by)
+    for source in args.transactions:
+        customers = store.apply_csv(source)
+        if customers is None:
+            print(f"{source}: daha önce eklenmiş, atlandı", file=sys.stderr)
+        else:
+            print(f"{source}: {len(customers):,} müşteri güncellendi", file=sys.stderr)
+    store.save(args.state)
+    if args.output:
+        rfm = store.scores(args.analyze_date)
+        rfm.to_csv(args.output, index=False)
+        print(f"{len(rfm):,} müşteri -> {args.output}", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m rfm', description="RFM analizi komut satırı")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    report = commands.add_parser('report', help="Markdown özet rapor")
+    _add_filters(report)
+    report.add_argument('-o', '--output', help="Rapor dosyası (varsayılan: standart çıktı)")
+    report.add_argument('--top', action='store_true', help="En değerli müşterileri de ekle")
+    report.set_defaults(run=run_report)
+
+    export = commands.add_parser('export', help="Filtrelenmiş veriyi dışa aktar")
+    _add_filters(export)
+    export.add_argument('-o', '--output', required=True, help="Çıktı dosyası")
+    export.add_argument('--format', choices=list(EXPORT_FORMATS),
+                        help="Dosya formatı (varsayılan: uzantıdan)")
+    export.set_defaults(run=run_export)
+
+    top = commands.add_parser('top', help="Seçimdeki en yüksek değerli müşteriler (sayfalı)")
+    _add_filters(top)
+    top.add_argument('--by', choices=RANK_COLUMNS, default='RFMScore', help="Sıralama sütunu")
+    top.add_argument('--limit', type=int, default=10, help="Müşteri sayısı")
+    top.add_argument('--offset', type=int, default=0, help="Atlanacak müşteri sayısı")
+    top.set_defaults(run=run_top)
+
+    lookup = commands.add_parser('lookup', help="CustomerID ile müşteri ara")
+    _add_filters(lookup)
+    lookup.add_argument('customer_ids', nargs='+', type=int, metavar='CustomerID')
+    lookup.set_defaults(run=run_lookup)
+
+    segments = commands.add_parser('segments', help="RFM değerlerinden k-means kümeleri")
+    segments.add_argument('csv', help="RFM CSV dosyası, klasör ya da glob deseni")
+    segments.add_argument('--partitions', nargs='+', help="Yalnızca bu bölümler (klasör/glob girdilerinde)")
+    segments.add_argument('-k', '--clusters', type=int, default=4, choices=range(2, 10), metavar='2-9',
+                          help="Küme sayısı")
+    segments.add_argument('--seed', type=int, default=0, help="Başlangıç merkezleri için tohum")
+    segments.add_argument('-o', '--output', help="Müşteri başına küme CSV dosyası")
+    segments.set_defaults(run=run_segments)
+
+    bundle = commands.add_parser('bundle', help="Varsayılan veri için artifact paketini üret (dağıtımda)")
+    bundle.add_argument('csv', nargs='?', default=DEFAULT_SOURCE, help="RFM CSV dosyası")
+    bundle.add_argument('--root', default=BUNDLE_DIR, help="Paket klasörü (varsayılan: RFM_BUNDLE_DIR)")
+    bundle.set_defaults(run=run_bundle)
+
+    ingest = commands.add_parser('ingest', help="Yeni fatura satırlarını RFM durumuna ekle (artımlı)")
+    ingest.add_argument('transactions', nargs='+', help="Fatura satırı CSV dosyaları")
+    ingest.add_argument('--state', required=True, help="Durum klasörü (yoksa oluşturulur)")
+    ingest.add_argument('--frequency-by', choices=['invoice', 'line'], default='invoice',
+                        help="Yeni durumda Frequency sayımı (varsayılan: fatura)")
+    ingest.add_argument('--analyze-date', help="Analiz tarihi (varsayılan: bugün)")
+    ingest.add_argument('-o', '--output', help="Güncel RFM tablosu CSV dosyası")
+    ingest.set_defaults(run=run_ingest)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.run(args)
@@ -0,0 +1,131 @@
+"""Filtrelenmiş verinin parça parça dışa aktarılması.
+
+Dosya yalnızca kullanıcı istediğinde üretilir ve satırlar parça parça
+geçici bir dosyaya yazılır; tüm CSV metni hiçbir zaman bellekte tutulmaz.
+Üretilen dosyalar (veri parmak izi, filtre durumu, format) anahtarıyla
+saklanır ve aynı filtre için tekrar kullanılır.
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+
+from rfm.loader import CACHE_DIR, HAS_PYARROW
+from rfm.profiling import traced
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+EXPORT_DIR = os.path.join(CACHE_DIR, 'exports')
+MAX_EXPORT_FILES = 16
+CHUNK_ROWS = 100_000
+
+# format -> (dosya uzantısı, MIME türü, etiket)
+EXPORT_FORMATS = {
+    'csv': ('csv', 'text/csv', 'CSV'),
+    'csv.gz': ('csv.gz', 'application/gzip', 'CSV (gzip)'),
+    'csv.zst': ('csv.zst', 'application/zstd', 'CSV (zstd)'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet', 'Parquet'),
+}
+
+_lock = threading.Lock()
+# Dosya başına kilit: bir dışa aktarımın yazımı diğer dosyaları bekletmez
+_building = {}
+
+
+def available_formats():
+    """Kurulu bağımlılıklara göre kullanılabilen formatlar."""
+    formats = ['csv', 'csv.gz']
+    if HAS_ZSTD:
+        formats.append('csv.zst')
+    if HAS_PYARROW:
+        formats.append('parquet')
+    return formats
+
+
+def iter_chunks(aggregates, chunk_rows=CHUNK_ROWS):
+    """RFM_Category eklenmiş satır parçaları; tüm tablo kopyalanmaz."""
+    return aggregates.iter_rows(chunk_rows)
+
+
+def iter_csv_bytes(aggregates, chunk_rows=CHUNK_ROWS):
+    for i, chunk in enumerate(iter_chunks(aggregates, chunk_rows)):
+        yield chunk.to_csv(index=False, header=(i == 0)).encode('utf-8')
+
+
+@traced('export.write')
+def write_export(aggregates, path, fmt, chunk_rows=CHUNK_ROWS):
+    if fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in iter_chunks(aggregates, chunk_rows):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
+        return
+
+    if fmt == 'csv':
+        f = open(path, 'wb')
+    elif fmt == 'csv.gz':
+        f = gzip.open(path, 'wb', compresslevel=6)
+    elif fmt == 'csv.zst':
+        f = zstandard.ZstdCompressor(level=3).stream_writer(open(path, 'wb'))
+    else:
+        raise ValueError(f"Bilinmeyen format: {fmt}")
+    with f:
+        for data in iter_csv_bytes(aggregates, chunk_rows):
+            f.write(data)
+
+
+def _prune_exports():
+    files = [os.path.join(EXPORT_DIR, name) for name in os.listdir(EXPORT_DIR)]
+    files = [path for path in files if not path.endswith('.tmp')]
+    if len(files) <= MAX_EXPORT_FILES:
+        return
+    files.sort(key=os.path.getmtime)
+    for path in files[:len(files) - MAX_EXPORT_FILES]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def export_artifact(aggregates, fingerprint, fmt):
+    """Dışa aktarım dosyasının yolunu döndürür; yoksa üretir.
+
+    Aynı dosyayı isteyen oturumlar yazımı bekler; diğer dosyalar beklemez.
+    """
+    extension = EXPORT_FORMATS[fmt][0]
+    name = hashlib.sha1(repr((fingerprint, aggregates.key, fmt)).encode()).hexdigest()
+    path = os.path.join(EXPORT_DIR, f"{name}.{extension}")
+    with _lock:
+        if os.path.exists(path):
+            os.utime(path)
+            return path
+        building = _building.setdefault(path, threading.Lock())
+    with building:
+        if os.path.exists(path):
+            return path
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            write_export(aggregates, tmp_path, fmt)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        with _lock:
+            _prune_exports()
+            _building.pop(path, None)
+    return path
@@ -0,0 +1,587 @@
+"""Dashboard grafiklerinin çizimi, PNG önbelleği ve arka planda üretimi.
+
+Her grafik (grafik kimliği, filtre durumu, veri parmak izi) anahtarıyla PNG
+bayt dizisi olarak önbelleğe alınır. Önbellekte olmayan grafikler Agg
+backend'i kullanan bir süreç havuzunda paralel çizilir. Alt süreçlere tüm
+tablo değil, yalnızca grafiğin ihtiyaç duyduğu sütunlar ve özetler gönderilir.
+"""
+
+import hashlib
+import io
+import multiprocessing
+import os
+import threading
+import warnings
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from rfm.density import bin_levels, marker_sizes, use_density
+from rfm.loader import memoize_per_frame
+from rfm.profiling import span
+
+FIGURE_DPI = 200
+# Streamlit bu genişlikten büyük görselleri her gösterimde yeniden
+# boyutlandırıp kodlar; PNG'ler baştan bu sınırın altında üretilir
+MAX_IMAGE_WIDTH = 1400
+RENDER_WORKERS = int(os.environ.get('RFM_RENDER_WORKERS', min(4, os.cpu_count() or 1)))
+MAX_RENDER_GROUPS = 256
+
+_plt = None
+_sns = None
+
+
+def _pyplot():
+    """matplotlib/seaborn yalnızca ilk çizimde yüklenir."""
+    global _plt, _sns
+    if _plt is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        from mpl_toolkits.mplot3d import Axes3D  # noqa: F401
+
+        plt.style.use('default')
+        sns.set_palette("husl")
+        # seaborn'un pandas sürüm uyarıları alt süreçlerde de bastırılır
+        warnings.filterwarnings('ignore', category=FutureWarning)
+        _plt, _sns = plt, sns
+    return _plt, _sns
+
+
+def _levels_frame(frame, columns):
+    """Kullanılmayan kategorileri atılmış, yalnızca gereken sütunlar."""
+    data = frame[['CustomerLevel'] + columns]
+    if isinstance(data['CustomerLevel'].dtype, pd.CategoricalDtype):
+        data = data.assign(CustomerLevel=data['CustomerLevel'].cat.remove_unused_categories())
+    return data
+
+
+# Çizim fonksiyonları: payload -> Figure
+
+def draw_pie(level_counts):
+    plt, sns = _pyplot()
+    fig, ax = plt.subplots(figsize=(8, 6))
+    colors = sns.color_palette("husl", len(level_counts))
+    ax.pie(level_counts.values, labels=level_counts.index,
+           autopct='%1.1f%%', colors=colors, startangle=90)
+    ax.set_title("Müşteri Seviyesi Dağılımı", fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    return fig
+
+
+def _values_payload(agg, col, positive=False):
+    """Büyük seçimlerde histogram kovaları (değer, sayı), küçüklerde satırlar."""
+    if agg.summaries is not None:
+        summary = agg.summaries.overall(agg.selection, col)
+        keep = summary.counts > 0
+        if positive:
+            keep &= summary.values > 0
+        return {'values': summary.values[keep], 'weights': summary.counts[keep]}
+    values = agg.frame[col].to_numpy()
+    return values[values > 0] if positive else values
+
+
+def _hist(ax, payload, transform=None, **kwargs):
+    values, weights = payload, None
+    if isinstance(payload, dict):
+        values, weights = payload['values'], payload['weights']
+    if transform is not None:
+        values = transform(values)
+    ax.hist(values, weights=weights, **kwargs)
+
+
+def draw_rfm_hist(scores):
+    plt, _ = _pyplot()
+    fig, ax = plt.subplots(figsize=(8, 6))
+    _hist(ax, scores, bins=20, alpha=0.7, color='skyblue', edgecolor='black')
+    ax.set_xlabel('RFM Score')
+    ax.set_ylabel('Müşteri Sayısı')
+    ax.set_title('RFM Score Dağılımı', fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    plt.tight_layout()
+    return fig
+
+
+def draw_corr_heatmap(corr_data):
+    plt, sns = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 8))
+    mask = np.triu(np.ones_like(corr_data, dtype=bool))
+    sns.heatmap(corr_data, mask=mask, annot=True, cmap='RdBu_r', center=0,
+                square=True, linewidths=.5, ax=ax)
+    ax.set_title('RFM Bileşenleri Korelasyon Matrisi', fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    return fig
+
+
+def _scatter_payload(agg, columns):
+    """Küçük veride noktaların kendisi, büyük veride yoğunluk hücreleri."""
+    data = _levels_frame(agg.frame, columns)
+    if use_density(len(data)):
+        return {'bins': bin_levels(data, columns)}
+    return {'data': data}
+
+
+def draw_scatter_3d(payload):
+    plt, sns = _pyplot()
+    fig = plt.figure(figsize=(10, 8))
+    ax = fig.add_subplot(111, projection='3d')
+
+    if 'bins' in payload:
+        level_bins = payload['bins']
+        colors = sns.color_palette("husl", len(level_bins))
+        max_count = max((b.counts.max() for b in level_bins.values() if len(b.counts)), default=1)
+        for (level, bins), color in zip(level_bins.items(), colors):
+            ax.scatter(bins.centers[:, 0], bins.centers[:, 1], bins.centers[:, 2],
+                       c=[color], s=marker_sizes(bins.counts, max_count),
+                       label=level, alpha=0.5, edgecolors='none')
+            if len(bins.outliers):
+                ax.scatter(bins.outliers[:, 0], bins.outliers[:, 1], bins.outliers[:, 2],
+                           c=[color], s=8, alpha=0.8, marker='x')
+    else:
+        data = payload['data']
+
+        # Müşteri seviyelerine göre renklendirme
+        unique_levels = data['CustomerLevel'].unique()
+        colors = sns.color_palette("husl", len(unique_levels))
+        color_map = dict(zip(unique_levels, colors))
+
+        for level in unique_levels:
+            level_data = data[data['CustomerLevel'] == level]
+            ax.scatter(level_data['Recency'], level_data['Frequency'],
+                       level_data['Monetary'], c=[color_map[level]],
+                       label=level, alpha=0.6, s=50)
+
+    ax.set_xlabel('Recency (Gün)')
+    ax.set_ylabel('Frequency (Adet)')
+    ax.set_zlabel('Monetary ($)')
+    ax.set_title('3D RFM Analizi', fontsize=14, fontweight='bold')
+    ax.legend()
+    plt.tight_layout()
+    return fig
+
+
+def _score_vs_monetary_payload(agg):
+    payload = _scatter_payload(agg, ['RFMScore', 'Monetary'])
+    payload['fit'] = agg.linear_fit
+    payload['x_range'] = (agg.overall.loc['min', 'RFMScore'], agg.overall.loc['max', 'RFMScore'])
+    return payload
+
+
+def draw_score_vs_monetary(payload):
+    plt, _ = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 8))
+
+    if 'bins' in payload:
+        level_bins = payload['bins']
+        max_count = max((b.counts.max() for b in level_bins.values() if len(b.counts)), default=1)
+        for level, bins in level_bins.items():
+            paths = ax.scatter(bins.centers[:, 0], bins.centers[:, 1],
+                               s=marker_sizes(bins.counts, max_count),
+                               label=level, alpha=0.5, edgecolors='none')
+            if len(bins.outliers):
+                ax.scatter(bins.outliers[:, 0], bins.outliers[:, 1],
+                           color=paths.get_facecolor()[0], s=8, alpha=0.8, marker='x')
+    else:
+        data = payload['data']
+        for level in data['CustomerLevel'].unique():
+            level_data = data[data['CustomerLevel'] == level]
+            ax.scatter(level_data['RFMScore'], level_data['Monetary'],
+                       label=level, alpha=0.6, s=60)
+
+    # Trend line
+    slope, intercept = payload['fit']
+    x = np.array(payload['x_range'], dtype='float64')
+    ax.plot(x, slope * x + intercept, "r--", alpha=0.8, linewidth=2)
+
+    ax.set_xlabel('RFM Score')
+    ax.set_ylabel('Monetary Değer ($)')
+    ax.set_title('RFM Score vs Monetary Değer', fontsize=14, fontweight='bold')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    plt.tight_layout()
+    return fig
+
+
+def _box_payload(agg, col):
+    """Büyük seçimlerde hazır kutu istatistikleri, küçüklerde satırlar."""
+    if agg.summaries is not None:
+        per_level = agg.summaries.by_level(agg.selection, col)
+        return {'column': col, 'stats': [s.box_stats(level) for level, s in per_level.items()]}
+    return {'column': col, 'data': _levels_frame(agg.frame, [col])}
+
+
+def draw_boxplot(payload):
+    plt, sns = _pyplot()
+    col = payload['column']
+    fig, ax = plt.subplots(figsize=(8, 6))
+    if 'stats' in payload:
+        stats = payload['stats']
+        artists = ax.bxp(stats, patch_artist=True, widths=0.8,
+                         medianprops={'color': '.26'}, flierprops={'marker': 'd', 'markersize': 5})
+        for box, color in zip(artists['boxes'], sns.color_palette(n_colors=len(stats), desat=.75)):
+            box.set_facecolor(color)
+        ax.set_xlabel('CustomerLevel')
+        ax.set_ylabel(col)
+    else:
+        sns.boxplot(data=payload['data'], x='CustomerLevel', y=col, ax=ax)
+    ax.set_title(f'{col} Dağılımı', fontsize=12, fontweight='bold')
+    ax.tick_params(axis='x', rotation=45)
+    plt.tight_layout()
+    return fig
+
+
+def draw_revenue_bars(revenue_by_segment):
+    plt, sns = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    bars = ax.bar(revenue_by_segment.index, revenue_by_segment.values,
+                  color=sns.color_palette("husl", len(revenue_by_segment)))
+    ax.set_xlabel('Müşteri Seviyesi')
+    ax.set_ylabel('Toplam Gelir ($)')
+    ax.set_title('Segmentlere Göre Toplam Gelir', fontsize=14, fontweight='bold')
+
+    # Bar değerlerini göster
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+                f'${height/1000:.1f}K', ha='center', va='bottom')
+
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    return fig
+
+
+def draw_avg_rfm_bars(avg_rfm_by_segment):
+    plt, sns = _pyplot()
+    fig, ax = plt.subplots(figsize=(10, 6))
+    bars = ax.bar(avg_rfm_by_segment.index, avg_rfm_by_segment.values,
+                  color=sns.color_palette("viridis", len(avg_rfm_by_segment)))
+    ax.set_xlabel('Müşteri Seviyesi')
+    ax.set_ylabel('Ortalama RFM Score')
+    ax.set_title('Segmentlere Göre Ortalama RFM Score', fontsize=14, fontweight='bold')
+
+    # Bar değerlerini göster
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+                f'{height:.1f}', ha='center', va='bottom')
+
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    return fig
+
+
+def draw_radar(segment_radar):
+    plt, sns = _pyplot()
+    segment_radar = segment_radar.copy()
+
+    # Normalize et (0-1 arası)
+    for col in segment_radar.columns:
+        segment_radar[col] = (segment_radar[col] - segment_radar[col].min()) / (segment_radar[col].max() - segment_radar[col].min())
+
+    categories = ['Recency (Ters)', 'Frequency', 'Monetary', 'RFM Score']
+    fig, ax = plt.subplots(figsize=(10, 10), subplot_kw=dict(projection='polar'))
+
+    angles = np.linspace(0, 2*np.pi, len(categories), endpoint=False).tolist()
+    angles += angles[:1]  # Döngüyü tamamla
+
+    colors = sns.color_palette("husl", len(segment_radar))
+
+    for segment, color in zip(segment_radar.index, colors):
+        values = [
+            1 - segment_radar.loc[segment, 'Recency'],  # Recency için ters
+            segment_radar.loc[segment, 'Frequency'],
+            segment_radar.loc[segment, 'Monetary'],
+            segment_radar.loc[segment, 'RFMScore']
+        ]
+        values += values[:1]  # Döngüyü tamamla
+
+        ax.plot(angles, values, 'o-', linewidth=2, label=segment, color=color)
+        ax.fill(angles, values, alpha=0.25, color=color)
+
+    ax.set_xticks(angles[:-1])
+    ax.set_xticklabels(categories)
+    ax.set_ylim(0, 1)
+    ax.set_title('Müşteri Segmentleri Radar Analizi', fontsize=14, fontweight='bold', pad=20)
+    ax.legend(loc='upper right', bbox_to_anchor=(1.2, 1.0))
+    ax.grid(True)
+
+    plt.tight_layout()
+    return fig
+
+
+def draw_monetary_log_hist(positive_monetary):
+    plt, _ = _pyplot()
+    fig, ax = plt.subplots(figsize=(8, 6))
+    _hist(ax, positive_monetary, transform=np.log10, bins=30, alpha=0.7, color='green', edgecolor='black')
+    ax.set_xlabel('Log10(Monetary Değer)')
+    ax.set_ylabel('Müşteri Sayısı')
+    ax.set_title('Monetary Değer Dağılımı (Log Scale)', fontsize=12, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    plt.tight_layout()
+    return fig
+
+
+def draw_crosstab_heatmap(heatmap_data):
+    plt, sns = _pyplot()
+    fig, ax = plt.subplots(figsize=(12, 8))
+    sns.heatmap(heatmap_data, annot=True, fmt='d', cmap='Blues', ax=ax)
+    ax.set_title('Müşteri Seviyesi vs RFM Kategorisi', fontsize=14, fontweight='bold')
+    ax.set_xlabel('RFM Kategorisi')
+    ax.set_ylabel('Müşteri Seviyesi')
+    plt.tight_layout()
+    return fig
+
+
+def _violin_payload(agg):
+    if agg.summaries is not None:
+        per_level = agg.summaries.by_level(agg.selection, 'RFMScore')
+        return {
+            'labels': list(per_level),
+            'violins': [s.violin_stats() for s in per_level.values()],
+            'boxes': [s.box_stats(level) for level, s in per_level.items()],
+        }
+    return {'data': _levels_frame(agg.frame, ['RFMScore'])}
+
+
+def _draw_violins(ax, sns, payload):
+    """Hazır yoğunluk eğrilerinden seaborn violinplot görünümü."""
+    violins, boxes = payload['violins'], payload['boxes']
+    positions = np.arange(len(violins))
+    # seaborn'daki scale='area': genişlikler en yüksek yoğunluğa göre oranlanır
+    peak = max(v['vals'].max() for v in violins)
+    widths = [0.8 * v['vals'].max() / peak for v in violins]
+    parts = ax.violin(violins, positions=positions, widths=widths,
+                      showmeans=False, showextrema=False, showmedians=False)
+    for body, color in zip(parts['bodies'], sns.color_palette(n_colors=len(violins), desat=.75)):
+        body.set_facecolor(color)
+        body.set_edgecolor('.26')
+        body.set_alpha(1)
+    for x, box in zip(positions, boxes):
+        ax.vlines(x, box['whislo'], box['whishi'], color='.26', linewidth=1.5)
+        ax.vlines(x, box['q1'], box['q3'], color='.26', linewidth=6)
+        ax.scatter([x], [box['med']], color='white', s=25, zorder=3)
+    ax.set_xticks(positions)
+    ax.set_xticklabels(payload['labels'])
+    ax.set_xlabel('CustomerLevel')
+    ax.set_ylabel('RFMScore')
+
+
+def draw_violin(payload):
+    plt, sns = _pyplot()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    if 'violins' in payload:
+        _draw_violins(ax, sns, payload)
+    else:
+        sns.violinplot(data=payload['data'], x='CustomerLevel', y='RFMScore', ax=ax)
+    ax.set_title('Müşteri Seviyelerine Göre RFM Score Dağılımı', fontsize=14, fontweight='bold')
+    ax.tick_params(axis='x', rotation=45)
+    plt.tight_layout()
+    return fig
+
+
+# Grafik kimliği -> (payload üretici, çizim fonksiyonu). Payload üreticiler
+# SegmentAggregates alır ve alt sürece gönderilecek en küçük veriyi döndürür.
+CHARTS = {
+    'pie': (lambda agg: agg.stat('RFMScore', 'count').astype('int64').sort_values(ascending=False), draw_pie),
+    'rfm_hist': (lambda agg: _values_payload(agg, 'RFMScore'), draw_rfm_hist),
+    'corr_heatmap': (lambda agg: agg.corr, draw_corr_heatmap),
+    'scatter_3d': (lambda agg: _scatter_payload(agg, ['Recency', 'Frequency', 'Monetary']), draw_scatter_3d),
+    'score_vs_monetary': (_score_vs_monetary_payload, draw_score_vs_monetary),
+    'box_recency': (lambda agg: _box_payload(agg, 'Recency'), draw_boxplot),
+    'box_frequency': (lambda agg: _box_payload(agg, 'Frequency'), draw_boxplot),
+    'box_monetary': (lambda agg: _box_payload(agg, 'Monetary'), draw_boxplot),
+    'revenue_bars': (lambda agg: agg.stat('Monetary', 'sum'), draw_revenue_bars),
+    'avg_rfm_bars': (lambda agg: agg.stat('RFMScore', 'mean'), draw_avg_rfm_bars),
+    'radar': (lambda agg: agg.means(), draw_radar),
+    'monetary_log_hist': (lambda agg: _values_payload(agg, 'Monetary', positive=True), draw_monetary_log_hist),
+    'crosstab_heatmap': (lambda agg: agg.crosstab, draw_crosstab_heatmap),
+    'violin': (_violin_payload, draw_violin),
+}
+
+
+def render_png(chart_id, payload, dpi=FIGURE_DPI):
+    """Grafiği çizip PNG baytlarını döndürür; alt süreçlerde çalışır."""
+    plt, _ = _pyplot()
+    fig = CHARTS[chart_id][1](payload)
+    try:
+        # Kenara taşan lejantlar için %10 pay bırakılır
+        dpi = min(dpi, 0.9 * MAX_IMAGE_WIDTH / fig.get_size_inches()[0])
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def warm_up():
+    """Alt süreçte grafik kütüphanelerini önceden yükler; ilk çizim beklemesin."""
+    _pyplot()
+    return os.getpid()
+
+
+class FigureCache:
+    """PNG baytlarını toplam boyutla sınırlı LRU düzeninde saklar."""
+
+    def __init__(self, max_bytes=128 * 1024 ** 2):
+        self.max_bytes = max_bytes
+        self._images = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def put(self, key, image):
+        with self._lock:
+            if key in self._images:
+                self._size -= len(self._images.pop(key))
+            self._images[key] = image
+            self._size += len(image)
+            while len(self._images) > 1 and self._size > self.max_bytes:
+                _, old = self._images.popitem(last=False)
+                self._size -= len(old)
+
+    def __len__(self):
+        return len(self._images)
+
+
+@memoize_per_frame
+def frame_fingerprint(df):
+    """Veri setinin içerik parmak izi; veri seti başına bir kez hesaplanır."""
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha1(hashes.tobytes()).hexdigest()
+
+
+class FigureRenderer:
+    """Önbellekte olmayan grafikleri süreç havuzunda paralel çizer.
+
+    workers=0 ise grafikler çağıran iş parçacığında çizilir.
+    """
+
+    def __init__(self, cache=None, workers=RENDER_WORKERS):
+        self.cache = FigureCache() if cache is None else cache
+        self.workers = workers
+        self._pool = None
+        self._pending = {}
+        # Oturum -> son submit_all'daki anahtarlar; eskileri iptal etmek için
+        self._groups = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        if self._pool is None and self.workers > 0:
+            # Streamlit çok iş parçacıklı çalıştığından fork yerine spawn
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return self._pool
+
+    def _store(self, key, future):
+        with self._lock:
+            self._pending.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+
+    def submit(self, chart_id, fingerprint, aggregates):
+        """PNG baytlarını verecek bir Future döndürür."""
+        key = (chart_id, aggregates.key, fingerprint)
+        image = self.cache.get(key)
+        if image is not None:
+            future = Future()
+            future.set_result(image)
+            return future
+
+        with self._lock:
+            future = self._pending.get(key)
+        if future is not None:
+            return future
+        # Yük (gruplama, binleme, örnekleme) kilit dışında hazırlanır; aynı
+        # anahtarı aynı anda isteyen oturumlar en fazla işi tekrarlar
+        with span(f"chart.{chart_id}.payload"):
+            payload = CHARTS[chart_id][0](aggregates)
+
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            pool = self._executor()
+            if pool is not None:
+                try:
+                    future = pool.submit(render_png, chart_id, payload)
+                except (BrokenProcessPool, RuntimeError):
+                    # Çöken havuz bir sonraki çağrıda yeniden kurulur
+                    self._pool = None
+            if future is not None:
+                self._pending[key] = future
+
+        if future is None:
+            future = Future()
+            try:
+                with span(f"chart.{chart_id}.render"):
+                    future.set_result(render_png(chart_id, payload))
+            except Exception as e:
+                future.set_exception(e)
+        future.add_done_callback(lambda f: self._store(key, f))
+        return future
+
+    def _supersede(self, group, keys):
+        """group'un önceki isteğinden kalan ve henüz başlamamış çizimleri iptal eder.
+
+        Başka bir grubun da beklediği çizimlere dokunulmaz.
+        """
+        with self._lock:
+            stale = self._groups.pop(group, set()) - keys
+            self._groups[group] = keys
+            while len(self._groups) > MAX_RENDER_GROUPS:
+                self._groups.popitem(last=False)
+            if stale:
+                stale -= set().union(*self._groups.values())
+            futures = [self._pending[key] for key in stale if key in self._pending]
+        # İptal geri çağrıları _store'da kilidi aldığından kilit dışında
+        return sum(future.cancel() for future in futures)
+
+    def submit_all(self, fingerprint, aggregates, chart_ids=None, group=None):
+        """chart_ids için Future'lar; group (ör. oturum) verilirse aynı grubun
+        önceki filtre durumu için kuyrukta bekleyen çizimler iptal edilir."""
+        chart_ids = CHARTS if chart_ids is None else chart_ids
+        if group is not None:
+            self._supersede(group, {(chart_id, aggregates.key, fingerprint) for chart_id in chart_ids})
+        return {
+            chart_id: self.submit(chart_id, fingerprint, aggregates)
+            for chart_id in chart_ids
+        }
+
+    def prewarm(self):
+        """Süreç havuzunu kurar ve her işçide grafik kütüphanelerini yükler."""
+        pool = self._executor()
+        if pool is None:
+            return []
+        try:
+            return [pool.submit(warm_up) for _ in range(self.workers)]
+        except (BrokenProcessPool, RuntimeError):
+            self._pool = None
+            return []
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_renderer = None
+
+
+def get_renderer():
+    """Süreç genelinde paylaşılan FigureRenderer."""
+    global _renderer
+    if _renderer is None:
+        _renderer = FigureRenderer()
+    return _renderer
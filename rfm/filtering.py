@@ -0,0 +1,143 @@
+"""CustomerLevel / RFMScore filtresi için önceden hesaplanmış indeks.
+
+Veri bir kez (CustomerLevel, RFMScore) sırasına dizilir. Her seviyenin
+başlangıç konumu ve Recency/Frequency/Monetary/RFMScore önek toplamları
+saklanır. NaN değerler toplama katılmaz; NaN içeren sütunlar için ayrıca
+geçerli değer sayısının önek toplamı tutulur ve ortalamalar pandas'taki gibi
+yalnızca geçerli değerler üzerinden alınır. Böylece herhangi bir slider aralığı için sayım ve ortalamalar
+ikili arama ile O(log n) sürede, veri kopyalanmadan bulunur.
+"""
+
+import numpy as np
+import pandas as pd
+
+from rfm.loader import level_order, memoize_per_frame
+from rfm.profiling import traced
+
+SUM_COLUMNS = ['Recency', 'Frequency', 'Monetary', 'RFMScore']
+
+
+def index_order(codes, scores):
+    """(seviye kodu, RFMScore) sırası; veri zaten bu sıradaysa None."""
+    if len(codes) > 1:
+        code_step, score_step = np.diff(codes), np.diff(scores)
+        if not ((code_step > 0) | ((code_step == 0) & (score_step >= 0))).all():
+            return np.lexsort((scores, codes))
+    return None
+
+
+class FilterIndex:
+    """Seviye ve RFMScore aralığı sorgularını yanıtlayan sıralı indeks."""
+
+    @traced('filter.index_build')
+    def __init__(self, df):
+        levels = df['CustomerLevel']
+        # Seçim kutusunda dosyadaki görünüş sırası korunur
+        self.levels = level_order(df) or list(levels.dropna().unique())
+        codes, uniques = pd.factorize(levels, sort=True)
+        scores = df['RFMScore'].to_numpy(dtype='float64')
+
+        # Önbellekten gelen veri zaten bu sırada saklanır; kopyalanmaz
+        order = index_order(codes, scores)
+        self.frame = df if order is None else df.take(order)
+        self.scores = scores if order is None else scores[order]
+        codes = codes if order is None else codes[order]
+        self.sorted_levels = list(uniques)
+        self._codes = {level: i for i, level in enumerate(self.sorted_levels)}
+        self.offsets = np.searchsorted(codes, np.arange(len(uniques) + 1))
+
+        self.prefix = {}
+        self.valid_prefix = {}
+        for col in SUM_COLUMNS:
+            if col in df.columns:
+                values = self.frame[col].to_numpy(dtype='float64')
+                missing = np.isnan(values)
+                self.prefix[col] = np.concatenate([[0.0], np.cumsum(np.where(missing, 0.0, values))])
+                if missing.any():
+                    self.valid_prefix[col] = np.concatenate([[0], np.cumsum(~missing)])
+
+        valid = scores[~np.isnan(scores)]
+        self.score_min = valid.min() if len(valid) else 0
+        self.score_max = valid.max() if len(valid) else 0
+
+    def __len__(self):
+        return int(self.offsets[-1] - self.offsets[0])
+
+    def valid_count(self, col, a, b):
+        """[a, b) satırlarında col'un NaN olmayan değer sayısı."""
+        valid = self.valid_prefix.get(col)
+        return b - a if valid is None else int(valid[b] - valid[a])
+
+    def _level_range(self, code, lo, hi):
+        start, stop = self.offsets[code], self.offsets[code + 1]
+        segment = self.scores[start:stop]
+        a = start + np.searchsorted(segment, lo, side='left')
+        b = start + np.searchsorted(segment, hi, side='right')
+        return int(a), int(b)
+
+    @traced('filter.query')
+    def query(self, levels=None, lo=-np.inf, hi=np.inf):
+        """Seçili seviyeler ve [lo, hi] RFMScore aralığındaki satırlar."""
+        if levels is None:
+            levels = self.sorted_levels
+        codes = sorted(self._codes[level] for level in levels if level in self._codes)
+        ranges = {}
+        for code in codes:
+            a, b = self._level_range(code, lo, hi)
+            if b > a:
+                ranges[self.sorted_levels[code]] = (a, b)
+        return FilterResult(self, ranges)
+
+    def all(self):
+        return self.query()
+
+
+class FilterResult:
+    """Bir filtre durumunun sonucu; satırlar yalnızca istenince üretilir."""
+
+    def __init__(self, index, ranges):
+        self.index = index
+        self.ranges = ranges
+
+    def __len__(self):
+        return sum(b - a for a, b in self.ranges.values())
+
+    def sum(self, col):
+        prefix = self.index.prefix[col]
+        return float(sum(prefix[b] - prefix[a] for a, b in self.ranges.values()))
+
+    def mean(self, col):
+        n = sum(self.index.valid_count(col, a, b) for a, b in self.ranges.values())
+        return self.sum(col) / n if n else np.nan
+
+    def by_level(self):
+        """Seviye başına müşteri sayısı ve ortalamalar (groupby gerektirmez)."""
+        rows = {}
+        for level, (a, b) in self.ranges.items():
+            row = {'count': b - a}
+            for col, prefix in self.index.prefix.items():
+                n = self.index.valid_count(col, a, b)
+                row[col] = (prefix[b] - prefix[a]) / n if n else np.nan
+            rows[level] = row
+        table = pd.DataFrame.from_dict(
+            rows, orient='index', columns=['count'] + list(self.index.prefix)
+        )
+        table.index.name = 'CustomerLevel'
+        return table
+
+    def frame(self):
+        """Filtrelenmiş satırlar; tek aralıkta kopyasız dilim döner."""
+        frame = self.index.frame
+        spans = list(self.ranges.values())
+        if not spans:
+            return frame.iloc[0:0]
+        if len(spans) == 1 or all(spans[i][1] == spans[i + 1][0] for i in range(len(spans) - 1)):
+            return frame.iloc[spans[0][0]:spans[-1][1]]
+        positions = np.concatenate([np.arange(a, b) for a, b in spans])
+        return frame.take(positions)
+
+
+@memoize_per_frame
+def build_filter_index(df):
+    """Veri seti başına bir kez kurulan FilterIndex."""
+    return FilterIndex(df)
@@ -0,0 +1,324 @@
+"""RFM tablolarının anlık görüntü geçmişi; segment geçişleri ve kohort trendleri.
+
+Her anlık görüntü AnalyzeDate ile tanımlanır. İlk görüntü tam olarak, sonrakiler
+CustomerID'ye göre önceki görüntüden farkı olarak (değişen, yeni ve ayrılan
+müşteriler) Parquet dosyalarına yazılır. Recency her analiz tarihinde
+herkes için değiştiğinden saklanmaz; AnalyzeDate - InvoiceDate_max ile bulunur.
+
+Seviye sayımları ve kohort tablosu (son fatura ayı x seviye) her görüntü için
+farktan güncellenir. İki görüntü arasındaki geçiş matrisi yalnızca aradaki
+farklarda geçen müşteriler için seviyeler bulunarak hesaplanır; diğerleri
+köşegene eklenir. Maliyet değişen müşteri sayısıyla büyür, görüntü sayısı x
+müşteri sayısıyla değil.
+"""
+
+import json
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from rfm.loader import CACHE_DIR
+from rfm.profiling import traced
+from rfm.segmentation import SOURCE_LEVEL_COLUMN
+
+HISTORY_DIR = os.environ.get('RFM_HISTORY_DIR', os.path.join(CACHE_DIR, 'history'))
+HISTORY_COLUMNS = ['InvoiceDate_max', 'Frequency', 'Monetary', 'RFMScore', 'CustomerLevel']
+META_FILE = 'meta.json'
+LATEST_FILE = 'latest.parquet'
+COHORT_FILE = 'cohorts.parquet'
+NEW_LABEL = '(yeni)'
+GONE_LABEL = '(ayrıldı)'
+
+_lock = threading.Lock()
+_stores = {}
+
+
+def _snapshot_file(snapshot_id):
+    return f"{snapshot_id:05d}.parquet"
+
+
+def _history_frame(df):
+    """CustomerID indeksli, yalnızca saklanan sütunlar; tekrarlarda son satır.
+
+    k-means görünümlerinde (segment_view) dosyadaki seviye saklanır; geçişler
+    ve kohortlar görüntüler arasında aynı seviye adlarıyla karşılaştırılır.
+    """
+    source = {'CustomerLevel': SOURCE_LEVEL_COLUMN} if SOURCE_LEVEL_COLUMN in df.columns else {}
+    frame = pd.DataFrame(
+        {col: df[source.get(col, col)].to_numpy() for col in HISTORY_COLUMNS},
+        index=pd.Index(df['CustomerID'].to_numpy(), name='CustomerID'),
+    )
+    frame['CustomerLevel'] = frame['CustomerLevel'].astype('string')
+    frame = frame[~frame.index.duplicated(keep='last')]
+    return frame.sort_index()
+
+
+def _changed_mask(old, new):
+    """Aynı indeksli iki tabloda herhangi bir sütunu farklı olan satırlar."""
+    changed = np.zeros(len(new), dtype=bool)
+    for col in HISTORY_COLUMNS:
+        a, b = old[col], new[col]
+        changed |= a.ne(b).fillna(True).to_numpy(dtype=bool) & ~(a.isna() & b.isna()).to_numpy()
+    return changed
+
+
+def _cohort_table(rows):
+    """(son fatura ayı, seviye) başına müşteri sayısı ve Monetary toplamı."""
+    if rows.empty:
+        return pd.DataFrame(columns=['count', 'Monetary']).rename_axis(['Cohort', 'CustomerLevel'])
+    keys = [
+        pd.to_datetime(rows['InvoiceDate_max']).dt.strftime('%Y-%m').fillna('?').rename('Cohort'),
+        rows['CustomerLevel'].fillna('?').rename('CustomerLevel'),
+    ]
+    return rows.groupby(keys).agg(count=('Monetary', 'size'), Monetary=('Monetary', 'sum'))
+
+
+@lru_cache(maxsize=8)
+def _cached_levels(path, mtime_ns):
+    frame = pd.read_parquet(path, columns=['CustomerID', 'CustomerLevel', 'Removed'])
+    return frame.set_index('CustomerID')
+
+
+def _read_levels(path):
+    """Bir görüntü dosyasındaki CustomerID -> CustomerLevel, Removed."""
+    return _cached_levels(path, os.stat(path).st_mtime_ns)
+
+
+def _file_version(path):
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns
+
+
+class SnapshotHistory:
+    """Klasörde tutulan anlık görüntü geçmişi."""
+
+    def __init__(self, root=HISTORY_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        self.meta = {'snapshots': []}
+        self._meta_version = None
+        self.version()
+
+    def version(self):
+        """meta.json'un (inode, değişiklik zamanı) ikilisi; geçmişten türetilen
+        sonuçların anahtarı.
+
+        meta.json her yazımda yerine taşındığından inode da değişir. Dosya
+        başka bir süreçte değiştiyse (ör. görüntü eklendi ya da geçmiş yeniden
+        oluşturuldu) meta yeniden okunur.
+        """
+        with self._lock:
+            try:
+                version = _file_version(self._path(META_FILE))
+            except OSError:
+                version = None
+            if version != self._meta_version:
+                if version is None:
+                    self.meta = {'snapshots': []}
+                else:
+                    with open(self._path(META_FILE)) as f:
+                        self.meta = json.load(f)
+                self._meta_version = version
+            return self._meta_version
+
+    def __len__(self):
+        return len(self.meta['snapshots'])
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def snapshots(self):
+        """Görüntü başına analiz tarihi, müşteri ve değişiklik sayıları."""
+        table = pd.DataFrame(
+            [{key: s[key] for key in ('id', 'analyze_date', 'rows', 'changed', 'added', 'removed')}
+             for s in self.meta['snapshots']],
+            columns=['id', 'analyze_date', 'rows', 'changed', 'added', 'removed'],
+        )
+        table['analyze_date'] = pd.to_datetime(table['analyze_date'])
+        return table.set_index('id')
+
+    def _write_meta(self):
+        tmp_path = self._path(f"{META_FILE}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(self.meta, f, indent=1)
+        os.replace(tmp_path, self._path(META_FILE))
+        self._meta_version = _file_version(self._path(META_FILE))
+
+    @traced('history.append')
+    def append(self, df, analyze_date=None):
+        """df'i yeni bir görüntü olarak ekler; AnalyzeDate önceki görüntülerden
+        sonra olmalıdır. Eklenen görüntünün özetini döndürür."""
+        if not isinstance(df, pd.DataFrame):
+            # OnDiskTable: yalnızca gereken sütunlar okunur
+            df = df.to_pandas(['CustomerID', 'AnalyzeDate'] + HISTORY_COLUMNS)
+        if analyze_date is None:
+            analyze_date = pd.to_datetime(df['AnalyzeDate']).max()
+        analyze_date = pd.Timestamp(analyze_date).normalize()
+        with self._lock:
+            snapshots = self.meta['snapshots']
+            if snapshots and analyze_date <= pd.Timestamp(snapshots[-1]['analyze_date']):
+                raise ValueError(
+                    f"{analyze_date:%Y-%m-%d} tarihli görüntü son görüntüden "
+                    f"({snapshots[-1]['analyze_date']}) sonra olmalı"
+                )
+            os.makedirs(self.root, exist_ok=True)
+            new = _history_frame(df)
+            snapshot_id = len(snapshots)
+
+            if not snapshots:
+                delta = new.assign(Removed=False)
+                old_rows, new_rows = new.iloc[0:0], new
+                counts = {}
+                cohorts = _cohort_table(new)
+                changed, added, removed = 0, len(new), 0
+            else:
+                old = pd.read_parquet(self._path(LATEST_FILE)).set_index('CustomerID')
+                common = new.index.intersection(old.index)
+                changed_ids = common[_changed_mask(old.loc[common], new.loc[common])]
+                added_ids = new.index.difference(old.index)
+                removed_ids = old.index.difference(new.index)
+                delta = pd.concat([
+                    new.loc[changed_ids.union(added_ids)].assign(Removed=False),
+                    old.loc[removed_ids].assign(Removed=True),
+                ]).sort_index()
+                old_rows = old.loc[changed_ids.union(removed_ids)]
+                new_rows = new.loc[changed_ids.union(added_ids)]
+                counts = snapshots[-1]['level_counts']
+                previous = pd.read_parquet(self._path(COHORT_FILE))
+                previous = previous[previous['snapshot'] == snapshot_id - 1].drop(columns='snapshot')
+                cohorts = previous.set_index(['Cohort', 'CustomerLevel']).add(
+                    _cohort_table(new_rows), fill_value=0
+                ).sub(_cohort_table(old_rows), fill_value=0)
+                cohorts = cohorts[cohorts['count'] > 0].astype({'count': 'int64'})
+                changed, added, removed = len(changed_ids), len(added_ids), len(removed_ids)
+
+            # Seviye sayımları farktan güncellenir
+            counts = pd.Series(counts, dtype='int64')
+            counts = counts.add(new_rows['CustomerLevel'].value_counts(), fill_value=0)
+            counts = counts.sub(old_rows['CustomerLevel'].value_counts(), fill_value=0)
+            counts = counts[counts > 0].astype('int64')
+
+            delta.reset_index().to_parquet(self._path(_snapshot_file(snapshot_id)), index=False)
+            new.reset_index().to_parquet(self._path(LATEST_FILE), index=False)
+            cohorts = cohorts.reset_index().assign(snapshot=snapshot_id)
+            if snapshot_id:
+                cohorts = pd.concat([pd.read_parquet(self._path(COHORT_FILE)), cohorts], ignore_index=True)
+            cohorts.to_parquet(self._path(COHORT_FILE), index=False)
+
+            summary = {
+                'id': snapshot_id, 'analyze_date': f"{analyze_date:%Y-%m-%d}", 'rows': len(new),
+                'changed': changed, 'added': added, 'removed': removed,
+                'level_counts': {level: int(n) for level, n in counts.items()},
+            }
+            snapshots.append(summary)
+            self._write_meta()
+            return summary
+
+    def level_counts(self):
+        """Görüntü (AnalyzeDate) başına seviye sayımları."""
+        rows = {pd.Timestamp(s['analyze_date']): s['level_counts'] for s in self.meta['snapshots']}
+        table = pd.DataFrame.from_dict(rows, orient='index').fillna(0).astype('int64')
+        table.index.name = 'AnalyzeDate'
+        return table.sort_index(axis=1)
+
+    def _levels(self, ids, snapshot_ids):
+        """ids müşterilerinin istenen görüntülerdeki seviyeleri (yoksa NaN).
+
+        Görüntüler sırayla yalnızca ids için oynatılır; her dosyadan ids ile
+        kesişen satırlar okunur."""
+        levels = pd.Series(pd.NA, index=ids, dtype='string')
+        result = {}
+        for snapshot_id in range(max(snapshot_ids) + 1):
+            rows = _read_levels(self._path(_snapshot_file(snapshot_id)))
+            rows = rows.loc[rows.index.intersection(ids)]
+            removed = rows['Removed'].to_numpy(dtype=bool)
+            levels.loc[rows.index[~removed]] = rows['CustomerLevel'][~removed].astype('string')
+            levels.loc[rows.index[removed]] = pd.NA
+            if snapshot_id in snapshot_ids:
+                result[snapshot_id] = levels.copy()
+        return pd.DataFrame(result, columns=list(snapshot_ids))
+
+    def _touched(self, start, end):
+        """start'tan sonra end'e kadar farklarda geçen müşteriler."""
+        ids = [
+            _read_levels(self._path(_snapshot_file(snapshot_id))).index
+            for snapshot_id in range(start + 1, end + 1)
+        ]
+        return pd.Index(np.unique(np.concatenate(ids)) if ids else [], name='CustomerID')
+
+    @traced('history.transitions')
+    def transitions(self, start, end):
+        """start -> end görüntüleri arasındaki seviye geçiş matrisi (müşteri sayısı).
+
+        Satırlar başlangıç, sütunlar bitiş seviyesidir; yeni gelenler (yeni)
+        satırında, ayrılanlar (ayrıldı) sütununda sayılır."""
+        if not 0 <= start < end < len(self):
+            raise ValueError("0 <= start < end < görüntü sayısı olmalı")
+        ids = self._touched(start, end)
+        levels = self._levels(ids, [start, end]).fillna({start: NEW_LABEL, end: GONE_LABEL})
+        # Aradaki bir görüntüde gelip giden müşteriler iki uçta da yoktur
+        levels = levels[(levels[start] != NEW_LABEL) | (levels[end] != GONE_LABEL)]
+        moved = levels[levels[start] != levels[end]]
+        matrix = pd.crosstab(moved[start], moved[end])
+        # Değişmeyen müşteriler köşegende: başlangıç sayımı eksi ayrılan/geçenler
+        stayed = pd.Series(self.meta['snapshots'][start]['level_counts'], dtype='int64')
+        stayed = stayed.sub(moved[start][moved[start] != NEW_LABEL].value_counts(), fill_value=0).astype('int64')
+        labels = sorted((set(stayed.index) | set(matrix.index) | set(matrix.columns)) - {NEW_LABEL, GONE_LABEL})
+        matrix = matrix.reindex(
+            index=labels + [NEW_LABEL], columns=labels + [GONE_LABEL], fill_value=0
+        )
+        for level, count in stayed.items():
+            matrix.loc[level, level] += count
+        matrix = matrix.loc[(matrix.sum(axis=1) > 0) | (matrix.index != NEW_LABEL)]
+        matrix = matrix.loc[:, (matrix.sum() > 0) | (matrix.columns != GONE_LABEL)]
+        matrix.index.name, matrix.columns.name = 'Önceki', 'Sonraki'
+        return matrix.astype('int64')
+
+    @traced('history.paths')
+    def migration_paths(self, snapshot_ids, min_count=1):
+        """Görüntüler boyunca seviye yolları ('Top → Middle → Low') ve müşteri
+        sayıları; hiç değişmeyen müşteriler de kendi yollarında sayılır."""
+        snapshot_ids = sorted(snapshot_ids)
+        ids = self._touched(snapshot_ids[0], snapshot_ids[-1])
+        levels = self._levels(ids, snapshot_ids)
+        levels = levels[levels.notna().any(axis=1)]
+        # Daha önce görülüp sonra kaybolan müşteri (ayrıldı), henüz gelmemiş olan (yeni)
+        seen = levels[snapshot_ids[0]].notna()
+        for snapshot_id in snapshot_ids[1:]:
+            levels.loc[levels[snapshot_id].isna() & seen, snapshot_id] = GONE_LABEL
+            seen |= levels[snapshot_id].notna()
+        levels = levels.fillna(NEW_LABEL)
+        paths = levels.astype(str).agg(' → '.join, axis=1).value_counts()
+        stayed = pd.Series(self.meta['snapshots'][snapshot_ids[0]]['level_counts'], dtype='int64')
+        first = levels[snapshot_ids[0]]
+        stayed = stayed.sub(first[first != NEW_LABEL].value_counts(), fill_value=0)
+        stayed.index = [' → '.join([level] * len(snapshot_ids)) for level in stayed.index]
+        paths = paths.add(stayed, fill_value=0).astype('int64')
+        paths = paths[paths >= min_count].sort_values(ascending=False)
+        paths.index.name = 'Yol'
+        return paths
+
+    def cohort_trend(self, level=None, value='count'):
+        """Görüntü x kohort (son fatura ayı) tablosu; value 'count' ya da
+        'Monetary', level verilirse yalnızca o seviye."""
+        cohorts = pd.read_parquet(self._path(COHORT_FILE))
+        if level is not None:
+            cohorts = cohorts[cohorts['CustomerLevel'] == level]
+        table = cohorts.pivot_table(index='snapshot', columns='Cohort', values=value, aggfunc='sum', fill_value=0)
+        dates = {s['id']: pd.Timestamp(s['analyze_date']) for s in self.meta['snapshots']}
+        table.index = pd.DatetimeIndex([dates[i] for i in table.index], name='AnalyzeDate')
+        return table.sort_index(axis=1)
+
+
+def history_store(root=HISTORY_DIR):
+    """root için süreç başına tek SnapshotHistory; meta.json değiştiyse yeniden okunur."""
+    root = os.path.abspath(root)
+    with _lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = SnapshotHistory(root)
+    store.version()
+    return store
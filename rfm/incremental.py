@@ -0,0 +1,170 @@
+"""Günlük işlem farklarından artımlı RFM güncellemesi.
+
+Müşteri başına son fatura tarihi, Frequency ve Monetary diskte tutulur. Yeni
+bir satır grubu geldiğinde yalnızca o gruptaki müşteriler güncellenir; diğer
+müşterilerin Recency değeri analiz tarihinden son fatura tarihinin
+çıkarılmasıyla bulunur.
+
+Skor sınırları quantile özetlerinden okunur, tüm tablo yeniden sıralanmaz:
+
+- Recency için son fatura günlerinin kesin histogramı tutulur. Analiz tarihi
+  değişince histogram değişmez, Recency quantile'ları aynalanarak bulunur.
+- Frequency için kesin tamsayı histogramı, Monetary için göreli hatası
+  sınırlı logaritmik özet kullanılır.
+
+Faturaların gruplar arasında bölünmediği varsayılır; aynı InvoiceNo iki ayrı
+grupta gelirse Frequency'de iki kez sayılır. apply_csv bir dosyayı tek grup
+olarak işler ve içerik hash'ini kaydeder; aynı dosya ikinci kez eklenmez.
+
+    python -m rfm ingest gunluk/2011-12-09.csv --state rfm-state/ -o rfm.csv
+"""
+
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from rfm.loader import source_digest
+from rfm.scoring import DEFAULT_CHUNKSIZE, QUANTILES, RFMAccumulator, read_transactions, score_customers
+from rfm.sketches import CountHistogram, QuantileSketch
+
+STATE_FILE = 'customers.parquet'
+SKETCH_FILE = 'sketches.npz'
+META_FILE = 'meta.json'
+
+_EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def _day_numbers(dates):
+    return (np.asarray(dates, dtype='datetime64[D]') - _EPOCH).astype('int64')
+
+
+class RFMStateStore:
+    """Müşteri bazlı RFM durumunu ve skor özetlerini tutan kalıcı depo."""
+
+    def __init__(self, frequency_by='invoice', relative_accuracy=0.01):
+        self.frequency_by = frequency_by
+        self.relative_accuracy = relative_accuracy
+        self.state = RFMAccumulator(frequency_by=frequency_by).customers()
+        self.last_dates = CountHistogram()
+        self.frequencies = CountHistogram()
+        self.monetary = QuantileSketch(relative_accuracy)
+        # İşlenmiş dosyaların içerik hash'leri
+        self.batches = []
+
+    def __len__(self):
+        return len(self.state)
+
+    def _sketch(self, rows, weight):
+        self.last_dates.add(_day_numbers(rows['last_date']), weight)
+        self.frequencies.add(rows['Frequency'].to_numpy(), weight)
+        self.monetary.add(rows['Monetary'].to_numpy(), weight)
+
+    def apply_batch(self, lines):
+        """Yeni satırları işler ve etkilenen CustomerID'leri döndürür."""
+        return self._apply(RFMAccumulator(frequency_by=self.frequency_by).update(lines).customers())
+
+    def apply_csv(self, source, chunksize=DEFAULT_CHUNKSIZE):
+        """Satır CSV'sini tek grup olarak işler; etkilenen CustomerID'ler.
+
+        Dosya daha önce işlendiyse hiçbir şey yapılmaz ve None döner.
+        """
+        digest, data = source_digest(source)
+        if digest in self.batches:
+            return None
+        acc = RFMAccumulator(frequency_by=self.frequency_by)
+        for chunk in read_transactions(source if data is None else io.BytesIO(data), chunksize=chunksize):
+            acc.update(chunk)
+        customers = self._apply(acc.customers())
+        self.batches.append(digest)
+        return customers
+
+    def _apply(self, batch):
+        if batch.empty:
+            return batch.index
+
+        known = batch.index.isin(self.state.index)
+        updated = batch[known]
+        if len(updated):
+            old = self.state.loc[updated.index]
+            self._sketch(old, -1)
+            new = pd.DataFrame({
+                'last_date': np.maximum(old['last_date'], updated['last_date']),
+                'Frequency': old['Frequency'] + updated['Frequency'],
+                'Monetary': old['Monetary'] + updated['Monetary'],
+            })
+            self.state.loc[updated.index, new.columns] = new
+            self._sketch(new, 1)
+
+        added = batch[~known]
+        if len(added):
+            self._sketch(added, 1)
+            self.state = pd.concat([self.state, added]).sort_index()
+
+        return batch.index
+
+    def edges(self, analyze_date):
+        """Skor sınırları; score_customers(edges=...) ile kullanılır."""
+        analyze_day = int(_day_numbers([pd.Timestamp(analyze_date)])[0])
+        qs = np.asarray(QUANTILES)
+        return {
+            'Recency': analyze_day - self.last_dates.quantile(1 - qs),
+            'Frequency': self.frequencies.quantile(qs),
+            'Monetary': self.monetary.quantile(qs),
+        }
+
+    def scores(self, analyze_date=None):
+        """Tüm müşteriler için RFM tablosu; sıralama yapmadan skorlanır."""
+        analyze_date = pd.Timestamp(analyze_date or pd.Timestamp.today()).normalize()
+        return score_customers(self.state, analyze_date, edges=self.edges(analyze_date))
+
+    @classmethod
+    def from_transactions(cls, lines, **kwargs):
+        store = cls(**kwargs)
+        store.apply_batch(lines)
+        return store
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.state.to_parquet(os.path.join(path, STATE_FILE))
+        arrays = {}
+        for name, sketch in self._sketches().items():
+            arrays.update({f"{name}__{key}": value for key, value in sketch.to_arrays().items()})
+        np.savez(os.path.join(path, SKETCH_FILE), **arrays)
+        with open(os.path.join(path, META_FILE), 'w') as f:
+            json.dump({
+                'frequency_by': self.frequency_by,
+                'relative_accuracy': self.relative_accuracy,
+                'batches': self.batches,
+            }, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        batches = meta.pop('batches', [])
+        store = cls(**meta)
+        store.batches = batches
+        store.state = pd.read_parquet(os.path.join(path, STATE_FILE))
+        with np.load(os.path.join(path, SKETCH_FILE)) as data:
+            for name, sketch in store._sketches().items():
+                prefix = f"{name}__"
+                arrays = {key[len(prefix):]: data[key] for key in data.files if key.startswith(prefix)}
+                setattr(store, name, type(sketch).from_arrays(arrays))
+        return store
+
+    @classmethod
+    def open(cls, path, **kwargs):
+        """path'teki depo; henüz kaydedilmediyse kwargs ile yeni bir depo."""
+        if os.path.exists(os.path.join(path, META_FILE)):
+            return cls.load(path)
+        return cls(**kwargs)
+
+    def _sketches(self):
+        return {
+            'last_dates': self.last_dates,
+            'frequencies': self.frequencies,
+            'monetary': self.monetary,
+        }
@@ -0,0 +1,458 @@
+"""RFM CSV dosyalarının önbellekli ve tipli yüklenmesi.
+
+Streamlit her widget etkileşiminde betiği baştan çalıştırır. Bu modül aynı
+içeriğin tekrar tekrar ayrıştırılmasını önler:
+
+- Bellek içi önbellek dosya içeriğinin hash'i ile anahtarlanır ve hem kayıt
+  sayısı hem de toplam bellek ile sınırlandırılır (LRU). Oturumlar
+  DatasetLease ile kullandıkları veri setini kiralar; kiralık kayıtlar
+  atılmaz, böylece aynı dosyayı açan oturumlar tek bir kopyayı paylaşır.
+- İlk yüklemeden sonra veri (CustomerLevel, RFMScore) sırasıyla Arrow IPC
+  dosyası olarak diske yazılır ve belleğe eşlenir. Sayısal sütunlar dosya
+  sayfalarını kopyasız gösterir; aynı makinedeki süreçler de bu sayfaları
+  paylaşır. Veri salt okunurdur; türetilen sütunlar ayrı Series olarak tutulur.
+- Dosya yolları (yol, mtime, boyut) ile izlenir; dosya değişince içerik yeniden
+  hash'lenir ve yeni bir kayıt açılır.
+"""
+
+import functools
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict
+
+import pandas as pd
+
+from rfm.profiling import traced
+
+# Şema değiştiğinde eski Parquet dosyaları geçersiz sayılsın diye artırılır
+SCHEMA_VERSION = 2
+
+DTYPES = {
+    'CustomerID': 'int32',
+    'Recency': 'int32',
+    'Frequency': 'int32',
+    'Monetary': 'float32',
+    'RecencyScore': 'int32',
+    'FrequencyScore': 'int32',
+    'MonetaryScore': 'int32',
+    'RFMScore': 'int32',
+    'RFMValue': 'int32',
+    'CustomerLevel': 'category',
+}
+
+DATE_COLUMNS = ['InvoiceDate_max', 'AnalyzeDate']
+
+CACHE_DIR = os.environ.get(
+    'RFM_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'rfm_dashboard')
+)
+MAX_SIDECAR_FILES = 32
+
+# pyarrow yalnızca Parquet okunup yazılırken yüklenir; içe aktarma süresi
+# komut satırı ve toplu işlerde ilk çalıştırmayı yavaşlatmasın
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+class FrameCache:
+    """İçerik hash'i ile anahtarlanan, boyutu sınırlı LRU DataFrame önbelleği.
+
+    acquire ile kiralanan kayıtlar release edilene kadar sınırlar aşılsa da
+    atılmaz.
+    """
+
+    def __init__(self, max_entries=4, max_bytes=1024 ** 3):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self._sizes = {}
+        self._refs = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+            return frame
+
+    def put(self, key, frame):
+        size = int(frame.memory_usage(deep=True).sum())
+        with self._lock:
+            self._frames[key] = frame
+            self._frames.move_to_end(key)
+            self._sizes[key] = size
+            self._evict(keep=key)
+
+    def acquire(self, key, frame=None):
+        """key'i kiralar; kayıt atılmışsa ve frame verilmişse yeniden ekler."""
+        with self._lock:
+            if key not in self._frames:
+                if frame is None:
+                    return None
+                self._frames[key] = frame
+                self._sizes[key] = int(frame.memory_usage(deep=True).sum())
+            self._refs[key] = self._refs.get(key, 0) + 1
+            return self._frames[key]
+
+    def release(self, key):
+        with self._lock:
+            count = self._refs.pop(key, 0) - 1
+            if count > 0:
+                self._refs[key] = count
+            self._evict()
+
+    def refcount(self, key):
+        return self._refs.get(key, 0)
+
+    def _evict(self, keep=None):
+        # En az kullanılanları at; kiralık kayıtlar ve son eklenen kalır
+        for key in list(self._frames):
+            if not (
+                len(self._frames) > self.max_entries
+                or sum(self._sizes.values()) > self.max_bytes
+            ):
+                break
+            if key != keep and key not in self._refs:
+                del self._frames[key]
+                del self._sizes[key]
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self._sizes.clear()
+            self._refs.clear()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __contains__(self, key):
+        return key in self._frames
+
+
+_cache = FrameCache()
+# (yol, mtime, boyut) -> içerik hash'i; varsayılan dosya her seferinde okunmasın
+_path_digests = {}
+# id(df) -> (zayıf referans, önbellek anahtarı, dosyadaki seviye sırası)
+_frame_info = {}
+
+
+def frame_key(df):
+    """df load_cached'den geldiyse önbellek anahtarı, değilse None."""
+    entry = _frame_info.get(id(df))
+    return entry[1] if entry is not None and entry[0]() is df else None
+
+
+def level_order(df):
+    """Sıralı saklanan veri setlerinde seviyelerin dosyadaki görünüş sırası."""
+    entry = _frame_info.get(id(df))
+    return entry[2] if entry is not None and entry[0]() is df else None
+
+
+def _register(df, key, levels=None):
+    for old in [i for i, entry in _frame_info.items() if entry[0]() is None]:
+        _frame_info.pop(old, None)
+    _frame_info[id(df)] = (weakref.ref(df), key, levels)
+    return df
+
+
+def register_view(df, levels):
+    """Önbellekte olmayan türetilmiş bir görünüm için seviye sırasını kaydeder."""
+    return _register(df, None, list(levels))
+
+
+def _release_all(cache, keys):
+    for key in keys:
+        cache.release(key)
+    keys.clear()
+
+
+class DatasetLease:
+    """Bir oturumun açık tuttuğu veri seti.
+
+    Oturum durumunda saklanır. hold() önceki veri setini bırakır; oturum
+    kapanıp nesne çöp toplandığında kira kendiliğinden bırakılır.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = _cache if cache is None else cache
+        self.keys = set()
+        self._finalizer = weakref.finalize(self, _release_all, self.cache, self.keys)
+
+    def hold(self, df):
+        key = frame_key(df)
+        if key is None or key in self.keys:
+            return
+        self.cache.acquire(key, df)
+        _release_all(self.cache, self.keys)
+        self.keys.add(key)
+
+    def release(self):
+        _release_all(self.cache, self.keys)
+
+
+def memoize_per_frame(func):
+    """func(df) sonucunu aynı DataFrame nesnesi yaşadığı sürece saklar.
+
+    Önbellekten gelen DataFrame her yeniden çalıştırmada aynı nesne olduğundan
+    indeks gibi türetilmiş yapılar veri seti başına bir kez kurulur. Zayıf
+    referans verilebilen her nesneyle (ör. FilterIndex) kullanılabilir.
+    """
+    results = {}
+
+    @functools.wraps(func)
+    def wrapper(df):
+        entry = results.get(id(df))
+        if entry is not None and entry[0]() is df:
+            return entry[1]
+        for key in [key for key, (ref, _) in results.items() if ref() is None]:
+            results.pop(key, None)
+        value = func(df)
+        results[id(df)] = (weakref.ref(df), value)
+        return value
+
+    def seed(df, value):
+        """Önceden hesaplanmış sonucu (ör. artifact paketinden) df için yerleştirir."""
+        results[id(df)] = (weakref.ref(df), value)
+
+    wrapper.seed = seed
+    return wrapper
+
+
+def content_hash(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+def apply_schema(df):
+    """Tip dönüşümü başarısız olan sütunları olduğu gibi bırakır."""
+    for col, dtype in DTYPES.items():
+        if col in df.columns and str(df[col].dtype) != dtype:
+            try:
+                df[col] = df[col].astype(dtype)
+            except (ValueError, TypeError):
+                pass
+    for col in DATE_COLUMNS:
+        if col in df.columns and str(df[col].dtype) != 'datetime64[ns]':
+            df[col] = pd.to_datetime(df[col], errors='coerce').astype('datetime64[ns]')
+    return df
+
+
+@traced('load.read_csv')
+def read_rfm_csv(buffer):
+    """CSV'yi DTYPES şemasıyla okur; şemaya uymayan dosyalarda esnek okumaya düşer."""
+    if isinstance(buffer, (bytes, bytearray)):
+        buffer = io.BytesIO(buffer)
+    start = buffer.tell()
+    header = pd.read_csv(buffer, nrows=0).columns
+    buffer.seek(start)
+    try:
+        df = pd.read_csv(
+            buffer,
+            dtype={col: dtype for col, dtype in DTYPES.items() if col in header},
+            parse_dates=[col for col in DATE_COLUMNS if col in header],
+        )
+    except (ValueError, TypeError):
+        # Ör. boş CustomerID içeren dosyalar int32'ye sığmaz
+        buffer.seek(start)
+        df = pd.read_csv(buffer)
+    return apply_schema(df)
+
+
+def sidecar_path(key):
+    return os.path.join(CACHE_DIR, f"{key}-v{SCHEMA_VERSION}.arrow")
+
+
+def install_sidecar(key, path):
+    """Hazır bir Arrow IPC dosyasını (ör. artifact paketindeki) key'in dosyası yapar.
+
+    Önce sabit bağlantı denenir, olmazsa kopyalanır; dosya zaten varsa dokunulmaz.
+    """
+    target = sidecar_path(key)
+    if os.path.exists(target):
+        return target
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    try:
+        os.link(path, tmp_path)
+    except OSError:
+        shutil.copyfile(path, tmp_path)
+    os.replace(tmp_path, target)
+    return target
+
+
+def open_sidecar(key):
+    """key'in Arrow IPC dosyası belleğe eşlenmiş pyarrow.Table olarak; yoksa None."""
+    path = sidecar_path(key)
+    if not HAS_PYARROW or not os.path.exists(path):
+        return None
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+
+def _map_sidecar(path):
+    """Arrow IPC dosyasını belleğe eşleyerek DataFrame ve seviye sırasını döndürür."""
+    import pyarrow as pa
+
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    levels = (table.schema.metadata or {}).get(b'rfm.level_order')
+    # split_blocks: her sütun ayrı blok, boş değersiz sayısal sütunlar kopyalanmaz
+    df = table.to_pandas(split_blocks=True)
+    return df, json.loads(levels) if levels else None
+
+
+def _read_sidecar(key):
+    path = sidecar_path(key)
+    if not HAS_PYARROW or not os.path.exists(path):
+        return None
+    try:
+        return _map_sidecar(path)
+    except Exception:
+        # Bozuk veya yarım kalmış dosya; CSV'den yeniden üretilecek
+        return None
+
+
+def write_sidecar(key, df, prune=True):
+    """df'i filtre indeksinin sırasıyla yazar ve eşlenmiş kopyasını döndürür.
+
+    prune=False ile eski dosyalar temizlenmez; aynı yüklemenin birden çok
+    dosyası yazılırken çağıran temizliği sonunda prune_sidecars ile yapar.
+    """
+    if not HAS_PYARROW:
+        return None
+    import pyarrow as pa
+
+    from rfm.filtering import index_order
+
+    levels = None
+    if {'CustomerLevel', 'RFMScore'}.issubset(df.columns):
+        levels = list(df['CustomerLevel'].dropna().unique())
+        if not all(isinstance(level, str) for level in levels):
+            levels = None
+        codes, _ = pd.factorize(df['CustomerLevel'], sort=True)
+        order = index_order(codes, df['RFMScore'].to_numpy(dtype='float64'))
+        if order is not None:
+            df = df.take(order).reset_index(drop=True)
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if levels is not None:
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}),
+                b'rfm.level_order': json.dumps(levels).encode(),
+            })
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        path = sidecar_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+        if prune:
+            prune_sidecars()
+        return _map_sidecar(path)
+    except (OSError, pa.ArrowException):
+        # Arrow'a çevrilemeyen (ör. karışık tipli) sütunlar: yalnızca bellekte tutulur
+        return None
+
+
+def prune_sidecars(keep=()):
+    """En eski Arrow/Parquet dosyalarını MAX_SIDECAR_FILES'a inene kadar siler.
+
+    keep'teki anahtarların dosyaları sınır aşılsa da silinmez.
+    """
+    kept = {sidecar_path(key) for key in keep}
+    files = [
+        os.path.join(CACHE_DIR, name)
+        for name in os.listdir(CACHE_DIR)
+        if name.endswith(('.arrow', '.parquet'))
+    ]
+    excess = len(files) - MAX_SIDECAR_FILES
+    if excess <= 0:
+        return
+    files = sorted((path for path in files if path not in kept), key=os.path.getmtime)
+    for path in files[:excess]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def read_source(source):
+    """Dosya yolu ya da yüklenen dosya nesnesinden ham baytları döndürür."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read()
+    if hasattr(source, 'getvalue'):
+        return source.getvalue()
+    data = source.read()
+    return data.encode() if isinstance(data, str) else data
+
+
+def _file_hash(path, block_size=1024 ** 2):
+    """content_hash ile aynı sonuç; dosya belleğe alınmadan parça parça okunur."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_digest(source):
+    """(içerik hash'i, okunduysa ham baytlar); dosya yollarında baytlar None."""
+    if isinstance(source, (str, os.PathLike)):
+        stat = os.stat(source)
+        path_key = (os.path.abspath(source), stat.st_mtime_ns, stat.st_size)
+        digest = _path_digests.get(path_key)
+        if digest is None:
+            digest = _file_hash(source)
+            # Dosya değiştiyse aynı yolun eski kaydı artık kullanılmaz
+            for old in [key for key in _path_digests if key[0] == path_key[0]]:
+                _path_digests.pop(old, None)
+            _path_digests[path_key] = digest
+        return digest, None
+    data = read_source(source)
+    return content_hash(data), data
+
+
+def cached_frame(key, build):
+    """key için önbellekteki DataFrame; yoksa build() ile üretip saklar."""
+    df = _cache.get(key)
+    if df is not None:
+        return df
+
+    mapped = _read_sidecar(key)
+    if mapped is None:
+        df = build()
+        mapped = write_sidecar(key, df)
+    if mapped is not None:
+        df, levels = mapped
+    else:
+        levels = None
+
+    _cache.put(key, _register(df, key, levels))
+    return df
+
+
+@traced('load')
+def load_cached(source, build, tag=''):
+    """source içeriğini build(baytlar) ile DataFrame'e çevirir ve önbelleğe alır.
+
+    Anahtar içerik hash'i ve tag'den oluşur; aynı dosyadan farklı tablolar
+    üretildiğinde (ör. farklı analiz tarihleri) tag ile ayrılır.
+    """
+    digest, data = source_digest(source)
+    key = f"{tag}-{digest}" if tag else digest
+    return cached_frame(key, lambda: build(read_source(source) if data is None else data))
+
+
+def load_rfm_data(source):
+    """RFM verisini yükler: önce bellek, sonra Arrow dosyası, en son CSV.
+
+    Dönen DataFrame önbellekle ve diğer oturumlarla paylaşılır; salt okunurdur.
+    """
+    return load_cached(source, read_rfm_csv)
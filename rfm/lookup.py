@@ -0,0 +1,139 @@
+"""CustomerID ile müşteri arama ve sayfalı top-N listeleri.
+
+CustomerIndex FilterIndex'in sıralı tablosu üzerine veri seti başına bir kez
+kurulur: CustomerID için bir hash indeksi (pandas.Index) ve her sıralama
+sütunu için seviye içinde azalan sırada konum dizileri tutulur. Bir filtre
+durumu her seviyede tek bir konum aralığı olduğundan top-N sayfası, her
+seviyenin sıra dizisinin başından aralığa düşen ilk offset+limit konumu
+alınarak bulunur; sıralama sonucu nlargest(keep='first') ile aynıdır.
+"""
+
+import numpy as np
+import pandas as pd
+
+from rfm.loader import memoize_per_frame
+from rfm.profiling import traced
+
+RANK_COLUMNS = ['RFMScore', 'Monetary', 'Frequency']
+
+
+def _first_in_range(ranks, a, b, need):
+    """ranks içinde a <= konum < b olan ilk need konum; parça parça taranır."""
+    if need <= 0:
+        return ranks[:0]
+    if b - a == len(ranks):
+        return ranks[:need]
+    found, count, start, chunk = [], 0, 0, max(2 * need, 1024)
+    while start < len(ranks) and count < need:
+        block = ranks[start:start + chunk]
+        hits = block[(block >= a) & (block < b)]
+        found.append(hits)
+        count += len(hits)
+        start += chunk
+        chunk *= 2
+    return np.concatenate(found)[:need] if found else ranks[:0]
+
+
+class CustomerIndex:
+    """Bellek içi veri seti için arama ve top-N indeksi."""
+
+    @traced('lookup.index_build')
+    def __init__(self, filter_index):
+        frame = filter_index.frame
+        self.filter_index = filter_index
+        self.frame = frame
+        self.ids = pd.Index(frame['CustomerID'].to_numpy())
+
+        offsets = filter_index.offsets
+        codes = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        positions = np.arange(offsets[0], offsets[-1])
+        dtype = 'int32' if len(frame) < 2 ** 31 else 'int64'
+        self.values = {}
+        self.ranks = {}
+        for col in RANK_COLUMNS:
+            if col not in frame.columns:
+                continue
+            values = frame[col].to_numpy(dtype='float64')
+            self.values[col] = values
+            # Seviye, azalan değer, eşitlikte tablodaki konum
+            order = np.lexsort((positions, -values[positions], codes))
+            self.ranks[col] = positions[order].astype(dtype)
+
+    def _segment(self, level):
+        code = self.filter_index._codes[level]
+        return self.filter_index.offsets[code], self.filter_index.offsets[code + 1]
+
+    @traced('lookup.top')
+    def top(self, selection, column='RFMScore', offset=0, limit=10):
+        """selection içinde column'a göre offset'ten başlayan limit müşteri."""
+        need = offset + limit
+        ranks, values = self.ranks[column], self.values[column]
+        candidates = []
+        for level, (a, b) in selection.ranges.items():
+            start, stop = self._segment(level)
+            candidates.append(_first_in_range(ranks[start:stop], a, b, need))
+        if not candidates:
+            return self.frame.iloc[0:0]
+        positions = np.concatenate(candidates)
+        positions = positions[~np.isnan(values[positions])]
+        order = np.lexsort((positions, -values[positions]))[offset:need]
+        return self.frame.take(positions[order])
+
+    def _probe(self, customer_id):
+        """customer_id, indeksin tipinde tek elemanlı dizi; bu tipte
+        gösterilemiyorsa None.
+
+        Farklı tipte bir sorgu (ör. int32 indekse Python int listesi) pandas'ın
+        indeksi her çağrıda yükseltip hash tablosunu yeniden kurmasına yol açar.
+        """
+        probe = np.array([customer_id])
+        if probe.dtype == self.ids.dtype:
+            return probe
+        try:
+            cast = probe.astype(self.ids.dtype)
+        except (TypeError, ValueError, OverflowError):
+            return None
+        return cast if cast[0] == probe[0] else None
+
+    @traced('lookup.customer')
+    def lookup(self, customer_id, selection=None):
+        """customer_id'nin satırları; LevelRank seviyesindeki RFMScore sırası,
+        Selected satırın selection içinde olup olmadığıdır."""
+        probe = self._probe(customer_id)
+        if probe is None:
+            positions = np.empty(0, dtype='intp')
+        elif self.ids.is_unique:
+            positions = self.ids.get_indexer(probe)
+        else:
+            positions = np.sort(self.ids.get_indexer_non_unique(probe)[0])
+        positions = positions[positions >= 0]
+        scores = self.filter_index.scores
+        level_ranks, selected = [], []
+        for position in positions:
+            level = self.frame['CustomerLevel'].iat[position]
+            if pd.isna(level):
+                level_ranks.append(None)
+                selected.append(False)
+                continue
+            start, stop = self._segment(level)
+            greater = stop - (start + np.searchsorted(scores[start:stop], scores[position], side='right'))
+            level_ranks.append(int(greater) + 1)
+            a, b = selection.ranges.get(level, (0, 0)) if selection is not None else (start, stop)
+            selected.append(bool(a <= position < b))
+        rows = self.frame.take(positions)
+        rows['LevelRank'] = level_ranks
+        rows['Selected'] = selected
+        return rows
+
+
+@memoize_per_frame
+def build_customer_index(filter_index):
+    """Filtre indeksi (veri seti sürümü) başına bir kez kurulan CustomerIndex."""
+    return CustomerIndex(filter_index)
+
+
+def customer_index(filter_index):
+    """table_backend'in filtre indeksine uygun arama indeksi."""
+    if hasattr(filter_index, 'customer_index'):
+        return filter_index.customer_index
+    return build_customer_index(filter_index)
@@ -0,0 +1,704 @@
+"""Belleğe sığmayan RFM tabloları için disk üzerinde sütunlu arka uç.
+
+Satır sayısı eşiği aşan CSV dosyaları pandas'a hiç tam olarak yüklenmez.
+Dosya parça parça okunup CustomerLevel'a göre bölümlenmiş (hive) bir Parquet
+veri setine yazılır. Her parça yazılmadan önce RFMScore'a göre sıralanır;
+böylece satır gruplarının min/max istatistikleri dar kalır ve skor aralığı
+filtresi okunmayacak grupları atlayabilir. Dosyalar bellek eşlemeli okunur.
+
+Yazım sırasında (seviye, RFMScore) çifti başına sayım ve toplamlar da tutulur.
+Metrikler ve segment tablosu bu küçük tablodan, veri taranmadan hesaplanır.
+Quantile, kutu grafiği, korelasyon, çapraz tablo ve top-N gibi satır
+gerektiren özetler ise filtre ifadesi Parquet okuyucusuna verilerek tek bir
+taramada toplanır; Python'a yalnızca sonuçlar gelir.
+"""
+
+import io
+import json
+import os
+import shutil
+import threading
+from functools import cached_property
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from rfm.aggregates import (
+    LEVEL_STATS, QUANTILES, RFM_CATEGORY_LABELS, STAT_COLUMNS, AggregateCache, SegmentAggregates,
+    build_aggregate_cache,
+)
+from rfm.filtering import SUM_COLUMNS, build_filter_index
+from rfm.loader import (
+    CACHE_DIR, DATE_COLUMNS, DTYPES, HAS_PYARROW, SCHEMA_VERSION, apply_schema, load_rfm_data,
+    source_digest,
+)
+from rfm.profiling import traced
+from rfm.summaries import SUMMARY_COLUMNS, ColumnBinning, HistogramSummary, merge_bounds, value_bounds
+
+ONDISK_THRESHOLD = int(os.environ.get('RFM_ONDISK_THRESHOLD', 5_000_000))
+DATASET_DIR = os.path.join(CACHE_DIR, 'datasets')
+MAX_DATASETS = 4
+CHUNK_ROWS = 1_000_000
+ROW_GROUP_ROWS = 64 * 1024
+# Nokta düzeyindeki grafikler (dağılım) için taşınan en fazla satır
+SAMPLE_ROWS = 100_000
+# blocks.parquet'ta sütunun NaN olmayan değer sayısı: valid_<sütun>
+VALID_PREFIX = 'valid_'
+
+_lock = threading.Lock()
+_tables = {}
+# Veri seti başına kilit: bir dosyanın dönüşümü diğer kaynakları bekletmez
+_building = {}
+
+
+def use_ondisk(n_rows, threshold=None):
+    threshold = ONDISK_THRESHOLD if threshold is None else threshold
+    return threshold > 0 and n_rows > threshold
+
+
+def estimate_rows(source, sample_bytes=1024 ** 2):
+    """Dosyanın başındaki satır uzunluğundan toplam satır sayısı tahmini."""
+    if isinstance(source, (str, os.PathLike)):
+        size = os.path.getsize(source)
+        with open(source, 'rb') as f:
+            head = f.read(sample_bytes)
+    elif hasattr(source, 'getvalue'):
+        data = source.getvalue()
+        size, head = len(data), data[:sample_bytes]
+    else:
+        return 0
+    lines = head.count(b'\n')
+    if len(head) >= size or lines == 0:
+        return max(lines - 1, 0)
+    return int(size * lines / len(head))
+
+
+def _open_csv(source, data):
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'rb')
+    return io.BytesIO(data if data is not None else source.getvalue())
+
+
+def _level_dir(root, level):
+    return os.path.join(root, 'data', f"CustomerLevel={quote(str(level), safe='')}")
+
+
+def dataset_schema(chunk):
+    """Parquet şeması; DTYPES ve tarih sütunlarının tipleri sabittir.
+
+    Tüm alanlar boş değer alabilir. Yalnızca şemada tanımlı olmayan sütunların
+    tipi ilk parçadan alınır.
+    """
+    import pyarrow as pa
+
+    inferred = pa.Schema.from_pandas(chunk, preserve_index=False)
+    fields = []
+    for col in chunk.columns:
+        if col == 'CustomerLevel':
+            continue
+        if col in DTYPES:
+            fields.append(pa.field(col, pa.from_numpy_dtype(np.dtype(DTYPES[col]))))
+        elif col in DATE_COLUMNS:
+            fields.append(pa.field(col, pa.timestamp('ns')))
+        else:
+            fields.append(inferred.field(col))
+    return pa.schema(fields)
+
+
+def conform_chunk(chunk):
+    """apply_schema'nın dönüştüremediği sayısal sütunları sayıya çevirir.
+
+    apply_schema başarısız dönüşümde sütunu olduğu gibi bırakır (ör. boş değer
+    içeren bir int32 sütunu float64, metin içeren bir sütun object kalır).
+    Sabit şemalı Parquet dosyasına yazılacak parçada bu değerler NaN olur.
+    """
+    chunk = apply_schema(chunk)
+    for col, dtype in DTYPES.items():
+        if col in chunk.columns and dtype != 'category' and str(chunk[col].dtype) != dtype:
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+    return chunk
+
+
+def arrow_table(part, schema):
+    """Parçanın şemaya açıkça dönüştürülmüş Arrow tablosu; NaN boş yazılır."""
+    import pyarrow as pa
+
+    return pa.Table.from_arrays([
+        pa.array(part[field.name], from_pandas=True).cast(field.type, safe=False)
+        for field in schema
+    ], schema=schema)
+
+
+@traced('ondisk.build')
+def write_dataset(source, data, root):
+    """CSV'yi parça parça okuyup bölümlenmiş Parquet veri setini ve özetleri yazar."""
+    import pyarrow.parquet as pq
+
+    schema = None
+    writers = {}
+    levels = []
+    bounds = dict.fromkeys(SUMMARY_COLUMNS)
+    blocks = []
+    n_rows = 0
+    try:
+        with _open_csv(source, data) as f:
+            for chunk in pd.read_csv(f, chunksize=CHUNK_ROWS):
+                chunk = conform_chunk(chunk)
+                n_rows += len(chunk)
+                if schema is None:
+                    columns = list(chunk.columns)
+                    schema = dataset_schema(chunk)
+                for level in chunk['CustomerLevel'].dropna().unique():
+                    if level not in levels:
+                        levels.append(level)
+                for col in SUMMARY_COLUMNS:
+                    if col in chunk.columns:
+                        chunk_bounds = value_bounds(chunk[col].to_numpy(dtype='float64'))
+                        bounds[col] = merge_bounds(bounds[col], chunk_bounds)
+
+                grouped = chunk.groupby(['CustomerLevel', 'RFMScore'], observed=True)
+                sum_columns = [col for col in SUM_COLUMNS if col in chunk.columns]
+                # Toplamlar NaN'ı atlar; ortalamalar geçerli değer sayısına bölünür
+                block = grouped[sum_columns].sum().join(grouped[sum_columns].count().add_prefix(VALID_PREFIX))
+                blocks.append(block.assign(count=grouped.size()))
+
+                chunk = chunk.sort_values('RFMScore', kind='stable')
+                for level, part in chunk.groupby('CustomerLevel', observed=True):
+                    writer = writers.get(level)
+                    if writer is None:
+                        os.makedirs(_level_dir(root, level), exist_ok=True)
+                        path = os.path.join(_level_dir(root, level), 'part-0.parquet')
+                        writer = writers[level] = pq.ParquetWriter(path, schema)
+                    writer.write_table(arrow_table(part, schema), row_group_size=ROW_GROUP_ROWS)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    if schema is None:
+        raise ValueError("CSV dosyası boş")
+    blocks = pd.concat(blocks).groupby(level=[0, 1], observed=True).sum()
+    # RFMScore hem anahtar hem toplam sütunu; anahtar Score adını alır
+    blocks = blocks.rename_axis(['CustomerLevel', 'Score']).reset_index()
+    blocks['CustomerLevel'] = blocks['CustomerLevel'].astype(str)
+    blocks.to_parquet(os.path.join(root, 'blocks.parquet'), index=False)
+    with open(os.path.join(root, 'meta.json'), 'w') as f:
+        json.dump({
+            'columns': columns,
+            'levels': [str(level) for level in levels],
+            'n_rows': n_rows,
+            'bounds': bounds,
+        }, f)
+
+
+def _prune_datasets():
+    paths = [
+        os.path.join(DATASET_DIR, name)
+        for name in os.listdir(DATASET_DIR)
+        if not name.endswith('.tmp')
+    ]
+    if len(paths) <= MAX_DATASETS:
+        return
+    paths.sort(key=os.path.getmtime)
+    for path in paths[:len(paths) - MAX_DATASETS]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class OnDiskSelection:
+    """FilterResult karşılığı; aralıklar seviyenin farklı skor değerleri üzerindedir."""
+
+    def __init__(self, table, ranges):
+        self.table = table
+        self.ranges = ranges
+
+    def _total(self, col):
+        return {
+            level: self.table.prefix[level][col][b] - self.table.prefix[level][col][a]
+            for level, (a, b) in self.ranges.items()
+        }
+
+    def _valid(self, col):
+        """Seviye başına col'un NaN olmayan değer sayısı."""
+        valid = VALID_PREFIX + col
+        # Geçerli sayı tutulmadan yazılmış eski veri setlerinde satır sayısı
+        return self._total(valid if valid in self.table.block_columns else 'count')
+
+    def __len__(self):
+        return int(sum(self._total('count').values()))
+
+    def sum(self, col):
+        return float(sum(self._total(col).values()))
+
+    def mean(self, col):
+        n = sum(self._valid(col).values())
+        return self.sum(col) / n if n else np.nan
+
+    def by_level(self):
+        counts = self._total('count')
+        columns = [col for col in SUM_COLUMNS if col in self.table.columns]
+        totals = {col: self._total(col) for col in columns}
+        valid = {col: self._valid(col) for col in columns}
+        rows = {}
+        for level, count in counts.items():
+            row = {'count': int(count)}
+            for col in columns:
+                n = valid[col][level]
+                row[col] = totals[col][level] / n if n else np.nan
+            rows[level] = row
+        table = pd.DataFrame.from_dict(rows, orient='index', columns=['count'] + columns)
+        table.index.name = 'CustomerLevel'
+        return table
+
+    def expression(self):
+        """Parquet okuyucusuna verilecek filtre; seviye bölümleri ve satır
+        grubu istatistikleri bununla elenir."""
+        import pyarrow.dataset as ds
+
+        expression = None
+        for level, (a, b) in self.ranges.items():
+            scores = self.table.scores[level]
+            term = (
+                (ds.field('CustomerLevel') == level)
+                & (ds.field('RFMScore') >= scores[a].item())
+                & (ds.field('RFMScore') <= scores[b - 1].item())
+            )
+            expression = term if expression is None else expression | term
+        return expression
+
+
+class OnDiskTable:
+    """Disk üzerindeki veri seti; FilterIndex ile aynı sorgu arayüzünü sunar."""
+
+    def __init__(self, root):
+        with open(os.path.join(root, 'meta.json')) as f:
+            meta = json.load(f)
+        self.root = root
+        # Grafik ve dışa aktarım önbellekleri için veri parmak izi
+        self.fingerprint = os.path.basename(root)
+        self.columns = meta['columns']
+        self.levels = meta['levels']
+        self.sorted_levels = sorted(self.levels)
+        self.n_rows = meta['n_rows']
+        self.binnings = {
+            col: ColumnBinning.from_bounds(tuple(bounds) if bounds else None)
+            for col, bounds in meta['bounds'].items()
+        }
+
+        blocks = pd.read_parquet(os.path.join(root, 'blocks.parquet'))
+        blocks = blocks.sort_values(['CustomerLevel', 'Score'])
+        self.block_columns = [col for col in blocks.columns if col not in ('CustomerLevel', 'Score')]
+        self.scores = {}
+        self.prefix = {}
+        for level, block in blocks.groupby('CustomerLevel'):
+            self.scores[level] = block['Score'].to_numpy()
+            self.prefix[level] = {
+                col: np.concatenate([[0.0], np.cumsum(block[col].to_numpy(dtype='float64'))])
+                for col in self.block_columns
+            }
+        scores = blocks['Score']
+        self.score_min = scores.min() if len(scores) else 0
+        self.score_max = scores.max() if len(scores) else 0
+
+        self.aggregates = AggregateCache(
+            factory=lambda selection, key: OnDiskAggregates(self, selection, key)
+        )
+
+    def __len__(self):
+        return self.n_rows
+
+    @cached_property
+    def dataset(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        from pyarrow.fs import LocalFileSystem
+
+        return ds.dataset(
+            os.path.join(self.root, 'data'),
+            format='parquet',
+            partitioning=ds.partitioning(pa.schema([('CustomerLevel', pa.string())]), flavor='hive'),
+            filesystem=LocalFileSystem(use_mmap=True),
+        )
+
+    def query(self, levels=None, lo=-np.inf, hi=np.inf):
+        if levels is None:
+            levels = self.sorted_levels
+        ranges = {}
+        for level in sorted(level for level in levels if level in self.scores):
+            scores = self.scores[level]
+            a = int(np.searchsorted(scores, lo, side='left'))
+            b = int(np.searchsorted(scores, hi, side='right'))
+            if b > a:
+                ranges[level] = (a, b)
+        return OnDiskSelection(self, ranges)
+
+    def all(self):
+        return self.query()
+
+    def to_pandas(self, columns=None):
+        """Tüm tablo ya da yalnızca columns; dar sütun kümeleri için."""
+        frame = self.dataset.to_table(columns=columns).to_pandas()
+        return apply_schema(frame)[columns or self.columns]
+
+    @cached_property
+    def customer_index(self):
+        return OnDiskCustomerIndex(self)
+
+    def scan(self, selection, batch_size=CHUNK_ROWS):
+        """Seçimdeki satırlar, dosyadaki sütun sırasıyla DataFrame parçaları olarak."""
+        expression = selection.expression()
+        if expression is None:
+            return
+        for batch in self.dataset.to_batches(filter=expression, batch_size=batch_size):
+            if batch.num_rows:
+                yield apply_schema(batch.to_pandas())[self.columns]
+
+
+class OnDiskCustomerIndex:
+    """rfm.lookup.CustomerIndex arayüzü; disk veri setinde filtreli okuma ile.
+
+    RFMScore sıralamasında blok sayımlarından gereken en düşük skor bulunur ve
+    yalnızca o skorun üstündeki satırlar okunur. Monetary ve Frequency
+    sıralamaları seçimi bir kez tarar. Eşitlikler CustomerID ile ayrılır.
+    """
+
+    def __init__(self, table):
+        self.table = table
+
+    def _read(self, expression):
+        frame = self.table.dataset.to_table(filter=expression).to_pandas()
+        return apply_schema(frame)[self.table.columns]
+
+    def _score_threshold(self, selection, need):
+        scores, counts = [], []
+        for level, (a, b) in selection.ranges.items():
+            scores.append(self.table.scores[level][a:b])
+            counts.append(np.diff(self.table.prefix[level]['count'])[a:b])
+        scores, counts = np.concatenate(scores), np.concatenate(counts)
+        order = np.argsort(-scores, kind='stable')
+        covered = np.searchsorted(np.cumsum(counts[order]), need)
+        return scores[order][min(covered, len(order) - 1)].item()
+
+    @traced('lookup.top')
+    def top(self, selection, column='RFMScore', offset=0, limit=10):
+        import pyarrow.dataset as ds
+
+        need = offset + limit
+        expression = selection.expression()
+        if expression is None or need <= 0:
+            return pd.DataFrame(columns=self.table.columns)
+        if column == 'RFMScore':
+            threshold = self._score_threshold(selection, need)
+            frame = self._read(expression & (ds.field('RFMScore') >= threshold))
+        else:
+            frame = None
+            for batch in self.table.scan(selection):
+                candidates = batch.nlargest(need, column)
+                frame = candidates if frame is None else pd.concat([frame, candidates]).nlargest(need, column)
+        frame = frame.sort_values([column, 'CustomerID'], ascending=[False, True], kind='stable')
+        return frame.iloc[offset:need].reset_index(drop=True)
+
+    @traced('lookup.customer')
+    def lookup(self, customer_id, selection=None):
+        import pyarrow.dataset as ds
+
+        frame = self._read(ds.field('CustomerID') == customer_id)
+        level_ranks, selected = [], []
+        for level, score in zip(frame['CustomerLevel'], frame['RFMScore']):
+            scores, counts = self.table.scores[level], self.table.prefix[level]['count']
+            level_ranks.append(int(counts[-1] - counts[np.searchsorted(scores, score, side='right')]) + 1)
+            if selection is None:
+                selected.append(True)
+            else:
+                a, b = selection.ranges.get(level, (0, 0))
+                selected.append(bool(b > a and scores[a] <= score <= scores[b - 1]))
+        return frame.assign(LevelRank=level_ranks, Selected=selected)
+
+
+class ScanSummaries:
+    """LevelSummaries arayüzü; histogramlar tek bir taramada toplanmıştır."""
+
+    def __init__(self, table, histograms):
+        self.table = table
+        self.histograms = histograms
+
+    def by_level(self, selection, col):
+        values = self.table.binnings[col].values
+        return {
+            level: HistogramSummary(self.histograms[col][self.table.sorted_levels.index(level)], values)
+            for level in selection.ranges
+        }
+
+    def overall(self, selection, col):
+        counts = np.zeros(self.table.binnings[col].n_bins, dtype='int64')
+        for summary in self.by_level(selection, col).values():
+            counts += summary.counts
+        return HistogramSummary(counts, self.table.binnings[col].values)
+
+
+class OnDiskAggregates(SegmentAggregates):
+    """SegmentAggregates'in disk üzerindeki karşılığı.
+
+    frame, dağılım grafikleri için en fazla SAMPLE_ROWS satırlık düzgün bir
+    örnektir; diğer tüm özetler seçimin tamamından hesaplanır.
+    """
+
+    def __init__(self, table, selection, key, top_n=10, seed=0):
+        # frame burada önbellekli bir özellik olduğundan üst sınıfın
+        # __init__'i çağrılmaz
+        self.table = table
+        self.selection = selection
+        self.key = key
+        self.top_n = top_n
+        self.seed = seed
+
+    def __len__(self):
+        return len(self.selection)
+
+    @cached_property
+    @traced('ondisk.scan')
+    def _scan(self):
+        table = self.table
+        n_levels = len(table.sorted_levels)
+        histograms = {
+            col: np.zeros((n_levels, table.binnings[col].n_bins), dtype='int64')
+            for col in SUMMARY_COLUMNS
+        }
+        partials = []
+        cross = np.zeros((len(STAT_COLUMNS), len(STAT_COLUMNS)))
+        sums = np.zeros(len(STAT_COLUMNS))
+        n_complete = 0
+        top = None
+        sample, sample_keys = None, np.empty(0)
+        rng = np.random.default_rng(self.seed)
+
+        for batch in table.scan(self.selection):
+            levels = batch['CustomerLevel']
+            grouped = batch[STAT_COLUMNS].astype('float64').groupby(levels, observed=True)
+            squares = (batch[STAT_COLUMNS].astype('float64') ** 2).groupby(levels, observed=True)
+            partials.append(pd.concat({
+                'count': grouped.count(), 'sum': grouped.sum(), 'sumsq': squares.sum(),
+                'min': grouped.min(), 'max': grouped.max(),
+            }, axis=1))
+
+            codes = pd.Categorical(levels, categories=table.sorted_levels).codes.astype('int64')
+            for col, hist in histograms.items():
+                binning = table.binnings[col]
+                values = batch[col].to_numpy(dtype='float64')
+                valid = (codes >= 0) & np.isfinite(values)
+                flat = codes[valid] * binning.n_bins + binning.bins(values[valid])
+                hist += np.bincount(flat, minlength=hist.size).reshape(hist.shape)
+
+            matrix = batch[STAT_COLUMNS].to_numpy(dtype='float64')
+            matrix = matrix[np.isfinite(matrix).all(axis=1)]
+            cross += matrix.T @ matrix
+            sums += matrix.sum(axis=0)
+            n_complete += len(matrix)
+
+            candidates = batch.nlargest(self.top_n, 'RFMScore')
+            top = candidates if top is None else pd.concat([top, candidates]).nlargest(self.top_n, 'RFMScore')
+
+            # En küçük rastgele anahtarlı SAMPLE_ROWS satır: düzgün örneklem
+            keys = rng.random(len(batch))
+            keep = np.argsort(keys)[:SAMPLE_ROWS]
+            part = batch[['CustomerLevel'] + STAT_COLUMNS].iloc[keep]
+            sample = part if sample is None else pd.concat([sample, part])
+            sample_keys = np.concatenate([sample_keys, keys[keep]])
+            if len(sample) > SAMPLE_ROWS:
+                keep = np.argsort(sample_keys)[:SAMPLE_ROWS]
+                sample, sample_keys = sample.iloc[keep], sample_keys[keep]
+
+        if partials:
+            combined = pd.concat(partials)
+            stats = combined.groupby(level=0, observed=True).agg({
+                column: column[0] if column[0] in ('min', 'max') else 'sum'
+                for column in combined.columns
+            })
+        else:
+            stats = None
+        empty = pd.DataFrame(columns=table.columns)
+        return {
+            'stats': stats,
+            'histograms': histograms,
+            'cross': cross, 'sums': sums, 'n': n_complete,
+            'top': empty if top is None else top.reset_index(drop=True),
+            'sample': empty if sample is None else sample.reset_index(drop=True),
+        }
+
+    @cached_property
+    def frame(self):
+        return apply_schema(self._scan['sample'])
+
+    @cached_property
+    def summaries(self):
+        return ScanSummaries(self.table, self._scan['histograms'])
+
+    @staticmethod
+    def _std(count, total, sumsq):
+        """Toplam ve kareler toplamından örneklem standart sapması (ddof=1)."""
+        count, total, sumsq = (np.asarray(x, dtype='float64') for x in (count, total, sumsq))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variance = (sumsq - total ** 2 / count) / (count - 1)
+        return np.where(count > 1, np.sqrt(np.clip(variance, 0, None)), np.nan)
+
+    @cached_property
+    def by_level(self):
+        stats = self._scan['stats']
+        index = pd.Index(list(self.selection.ranges), name='CustomerLevel')
+        columns = {}
+        for col in STAT_COLUMNS:
+            per_level = self.summaries.by_level(self.selection, col)
+            quantiles = np.array([per_level[level].quantile(QUANTILES) for level in index])
+            quantiles = quantiles.reshape(len(index), len(QUANTILES))
+            if stats is None:
+                level_stats = pd.DataFrame(index=index, columns=['count', 'sum', 'sumsq', 'min', 'max'], dtype='float64')
+            else:
+                level_stats = pd.DataFrame({
+                    stat: stats[(stat, col)] for stat in ['count', 'sum', 'sumsq', 'min', 'max']
+                }).reindex(index)
+            columns[(col, 'count')] = level_stats['count'].fillna(0).astype('int64')
+            columns[(col, 'sum')] = level_stats['sum']
+            columns[(col, 'mean')] = level_stats['sum'] / level_stats['count']
+            columns[(col, 'std')] = self._std(level_stats['count'], level_stats['sum'], level_stats['sumsq'])
+            columns[(col, 'min')] = level_stats['min']
+            columns[(col, 'max')] = level_stats['max']
+            for i, q in enumerate(QUANTILES):
+                columns[(col, f"q{q:g}")] = quantiles[:, i]
+        order = [
+            (col, stat) for col in STAT_COLUMNS
+            for stat in LEVEL_STATS + [f"q{q:g}" for q in QUANTILES]
+        ]
+        return pd.DataFrame(columns, index=index)[order]
+
+    @cached_property
+    def overall(self):
+        by_level = self.by_level
+        rows = {}
+        for col in STAT_COLUMNS:
+            count = by_level[(col, 'count')].sum()
+            total = by_level[(col, 'sum')].sum()
+            sumsq = self._scan['stats'][('sumsq', col)].sum() if self._scan['stats'] is not None else np.nan
+            std = float(self._std(count, total, sumsq))
+            rows[col] = [count, total / count if count else np.nan, std,
+                         by_level[(col, 'min')].min(), by_level[(col, 'max')].max()]
+            rows[col] += list(self._quantiles(col, QUANTILES))
+        return pd.DataFrame(
+            rows, index=['count', 'mean', 'std', 'min', 'max'] + [f"q{q:g}" for q in QUANTILES]
+        )
+
+    @cached_property
+    def linear_fit(self):
+        n, sums, cross = self._scan['n'], self._scan['sums'], self._scan['cross']
+        if n == 0:
+            return np.nan, np.nan
+        x, y = STAT_COLUMNS.index('RFMScore'), STAT_COLUMNS.index('Monetary')
+        denom = n * cross[x, x] - sums[x] ** 2
+        slope = (n * cross[x, y] - sums[x] * sums[y]) / denom if denom else 0.0
+        return slope, (sums[y] - slope * sums[x]) / n
+
+    @cached_property
+    @traced('aggregates.corr')
+    def corr(self):
+        n, sums, cross = self._scan['n'], self._scan['sums'], self._scan['cross']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            covariance = (cross - np.outer(sums, sums) / n) / (n - 1)
+            scale = np.sqrt(np.diag(covariance))
+            corr = covariance / np.outer(scale, scale)
+        return pd.DataFrame(corr, index=STAT_COLUMNS, columns=STAT_COLUMNS)
+
+    @cached_property
+    def top(self):
+        return apply_schema(self._scan['top'])
+
+    @cached_property
+    def _category_edges(self):
+        """pd.cut(bins=5) yalnızca en küçük ve en büyük değere bakar."""
+        lo, hi = self.overall.loc['min', 'RFMScore'], self.overall.loc['max', 'RFMScore']
+        _, edges = pd.cut(pd.Series([lo, hi]), bins=5, retbins=True)
+        return edges
+
+    @cached_property
+    def rfm_category(self):
+        return pd.cut(self.frame['RFMScore'], bins=self._category_edges, labels=RFM_CATEGORY_LABELS)
+
+    @cached_property
+    def crosstab(self):
+        values = self.table.binnings['RFMScore'].values
+        categories = pd.cut(values, bins=self._category_edges, labels=RFM_CATEGORY_LABELS)
+        rows = {
+            level: pd.Series(summary.counts).groupby(categories, observed=False).sum()
+            for level, summary in self.summaries.by_level(self.selection, 'RFMScore').items()
+        }
+        table = pd.DataFrame(rows).T.astype('int64')
+        table = table.loc[:, table.sum() > 0]
+        table.index.name = 'CustomerLevel'
+        table.columns.name = 'RFMScore'
+        return table
+
+    def iter_rows(self, chunk_rows):
+        for chunk in self.table.scan(self.selection, batch_size=chunk_rows):
+            yield chunk.assign(RFM_Category=pd.cut(
+                chunk['RFMScore'], bins=self._category_edges, labels=RFM_CATEGORY_LABELS
+            ))
+
+
+def load_ondisk_table(source):
+    """source için disk veri setini açar; yoksa bir kez üretir.
+
+    Veri seti geçici bir klasöre yazılıp yerine taşınır. Aynı kaynağı açan
+    oturumlar dönüşümü bekler; diğer kaynaklar beklemez.
+    """
+    digest, data = source_digest(source)
+    root = os.path.join(DATASET_DIR, f"{digest}-v{SCHEMA_VERSION}")
+    with _lock:
+        table = _tables.get(root)
+        if table is not None and os.path.exists(root):
+            return table
+        building = _building.setdefault(root, threading.Lock())
+    with building:
+        with _lock:
+            table = _tables.get(root)
+            if table is not None and os.path.exists(root):
+                return table
+        if not os.path.exists(root):
+            os.makedirs(DATASET_DIR, exist_ok=True)
+            tmp_root = f"{root}.{os.getpid()}.{threading.get_ident()}.tmp"
+            shutil.rmtree(tmp_root, ignore_errors=True)
+            try:
+                write_dataset(source, data, tmp_root)
+                os.replace(tmp_root, root)
+            finally:
+                shutil.rmtree(tmp_root, ignore_errors=True)
+            with _lock:
+                _prune_datasets()
+        table = OnDiskTable(root)
+        with _lock:
+            _tables[root] = table
+            _building.pop(root, None)
+    return table
+
+
+def table_backend(df):
+    """(filtre indeksi, özet önbelleği, veri parmak izi) üçlüsü.
+
+    Bellek içi DataFrame ve OnDiskTable için aynı sorgu arayüzünü verir.
+    """
+    if isinstance(df, OnDiskTable):
+        return df, df.aggregates, df.fingerprint
+    from rfm.figures import frame_fingerprint
+
+    return build_filter_index(df), build_aggregate_cache(df), frame_fingerprint(df)
+
+
+def open_rfm_table(source, threshold=None):
+    """Eşiğin altında load_rfm_data DataFrame'i, üstünde OnDiskTable döndürür.
+
+    Gerekli sütunları olmayan dosyalar her zaman bellek içi yoldan yüklenir;
+    eksik sütun uyarısı orada verilir.
+    """
+    if not HAS_PYARROW or not use_ondisk(estimate_rows(source), threshold):
+        return load_rfm_data(source)
+    with _open_csv(source, None) as f:
+        header = pd.read_csv(f, nrows=0).columns
+    if not {'CustomerLevel', 'RFMScore'}.issubset(header):
+        return load_rfm_data(source)
+    return load_ondisk_table(source)
@@ -0,0 +1,179 @@
+"""Birden çok RFM CSV dosyasının (ör. ülke ve ay bazında dışa aktarımlar) tek
+tabloya yüklenmesi.
+
+Kaynak bir klasör, glob deseni ya da yüklenen dosya listesi olabilir; her dosya
+bir bölümdür ve Partition sütununda adıyla işaretlenir. Önbellekte olmayan
+dosyalar süreç havuzunda paralel ayrıştırılır ve her biri kendi Arrow dosyasına
+yazılır. Seçili bölümler Arrow tabloları olarak kopyasız birleştirilir ve tek
+seferde DataFrame'e çevrilir. Seçilmeyen bölümlerin dosyaları hiç okunmaz.
+"""
+
+import glob
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+import pandas as pd
+
+from rfm.loader import (
+    HAS_PYARROW, cached_frame, content_hash, open_sidecar, prune_sidecars, read_rfm_csv,
+    read_source, source_digest, write_sidecar,
+)
+from rfm.profiling import span, traced
+
+PARTITION_COLUMN = 'Partition'
+INGEST_WORKERS = int(os.environ.get('RFM_INGEST_WORKERS', min(4, os.cpu_count() or 1)))
+# Daha küçük girdilerde süreç başlatma maliyeti ayrıştırmadan uzun sürer
+PARALLEL_MIN_BYTES = 16 * 1024 ** 2
+
+
+def _stem(path):
+    name = os.path.basename(path)
+    return name[:-4] if name.lower().endswith('.csv') else os.path.splitext(name)[0]
+
+
+def _relative_name(path, root):
+    rel = os.path.relpath(path, root)
+    return os.path.join(os.path.dirname(rel), _stem(rel)).replace(os.sep, '/')
+
+
+def discover_partitions(spec):
+    """{bölüm adı: kaynak}; spec bir klasör, glob deseni ya da dosya listesidir.
+
+    Klasörler alt klasörleriyle taranır; bölüm adı köke göre göreli yoldur
+    (ör. 'DE/2011-05'). Yüklenen dosyalarda dosya adı kullanılır.
+    """
+    if not spec:
+        return {}
+    if isinstance(spec, (list, tuple)):
+        partitions = {}
+        for source in spec:
+            name = _stem(getattr(source, 'name', None) or str(source))
+            unique, i = name, 2
+            while unique in partitions:
+                unique, i = f"{name} ({i})", i + 1
+            partitions[unique] = source
+        return partitions
+    if os.path.isdir(spec):
+        paths = glob.glob(os.path.join(spec, '**', '*.csv'), recursive=True)
+        root = spec
+    else:
+        paths = [path for path in glob.glob(spec, recursive=True) if os.path.isfile(path)]
+        root = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in paths]) if paths else ''
+    return {_relative_name(os.path.abspath(path), os.path.abspath(root)): path for path in sorted(paths)}
+
+
+def is_multi_source(spec):
+    """Klasör ya da glob deseni mi (tek bir dosya yolu değil)."""
+    return os.path.isdir(spec) or glob.has_magic(spec)
+
+
+def _parse_partition(key, source):
+    """Havuz işçisi: dosyayı ayrıştırıp Arrow dosyasına yazar.
+
+    Yazılamazsa (ör. pyarrow yok) DataFrame'in kendisini döndürür. Eski
+    dosyalar burada temizlenmez; aynı yüklemenin önceki bölümleri silinmesin.
+    """
+    df = read_rfm_csv(read_source(source))
+    return None if write_sidecar(key, df, prune=False) is not None else df
+
+
+def _source_size(source):
+    return os.path.getsize(source) if isinstance(source, (str, os.PathLike)) else len(source)
+
+
+def _parse_all(pending, workers):
+    """{ad: (anahtar, kaynak)} -> {ad: DataFrame veya None}."""
+    if (
+        workers < 2 or len(pending) < 2
+        or sum(_source_size(source) for _, source in pending.values()) < PARALLEL_MIN_BYTES
+    ):
+        return {name: _parse_partition(key, source) for name, (key, source) in pending.items()}
+    try:
+        # Streamlit çok iş parçacıklı çalıştığından fork yerine spawn
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(pending)),
+            mp_context=multiprocessing.get_context('spawn'),
+        ) as pool:
+            futures = {
+                name: pool.submit(_parse_partition, key, source)
+                for name, (key, source) in pending.items()
+            }
+            return {name: future.result() for name, future in futures.items()}
+    except (BrokenProcessPool, RuntimeError):
+        # Havuz kurulamadıysa dosyalar bu süreçte sırayla okunur
+        return _parse_all(pending, 0)
+
+
+def _concat_tables(tables):
+    """Bölüm tablolarını Partition sütunuyla birleştirir; veri kopyalanmaz."""
+    import pyarrow as pa
+
+    parts = []
+    for name, table in tables.items():
+        partition = pa.DictionaryArray.from_arrays(
+            pa.array(np.zeros(table.num_rows, dtype='int32')), pa.array([name])
+        )
+        parts.append(table.append_column(PARTITION_COLUMN, partition))
+    # Eksik sütunlar boş, farklı sayısal tipler geniş olana çevrilir
+    try:
+        return pa.concat_tables(parts, promote_options='permissive')
+    except TypeError:
+        # pyarrow < 14: yalnızca eksik sütunlar doldurulur; tipler farklıysa
+        # ArrowInvalid yükselir ve çağıran pandas ile birleştirir
+        return pa.concat_tables(parts, promote=True)
+
+
+def _combine(keys, workers):
+    pending = {
+        name: (key, source) for name, (key, source) in keys.items()
+        if open_sidecar(key) is None
+    }
+    with span('load.partitions.parse', files=len(pending)):
+        parsed = _parse_all(pending, workers)
+
+    tables = {name: open_sidecar(key) for name, (key, _) in keys.items()}
+    if HAS_PYARROW:
+        prune_sidecars(keep=[key for key, _ in keys.values()])
+    if HAS_PYARROW and all(table is not None for table in tables.values()):
+        import pyarrow as pa
+
+        try:
+            df = _concat_tables(tables).to_pandas(split_blocks=True)
+        except pa.ArrowException:
+            df = None
+        if df is not None:
+            df[PARTITION_COLUMN] = df[PARTITION_COLUMN].cat.set_categories(list(keys))
+            return df
+
+    # pyarrow yoksa ya da tablolar birleştirilemiyorsa pandas ile
+    frames = []
+    for name, (_, source) in keys.items():
+        frame = parsed.get(name)
+        if frame is None and tables[name] is not None:
+            frame = tables[name].to_pandas()
+        if frame is None:
+            # Dosya bu arada silindi (ör. başka bir oturumun temizliği)
+            frame = read_rfm_csv(read_source(source))
+        frames.append(frame.assign(**{PARTITION_COLUMN: name}))
+    df = pd.concat(frames, ignore_index=True, copy=False)
+    df[PARTITION_COLUMN] = pd.Categorical(df[PARTITION_COLUMN], categories=list(keys))
+    return df
+
+
+@traced('load.partitions')
+def load_partitions(sources, workers=INGEST_WORKERS):
+    """{bölüm adı: kaynak} dosyalarını Partition sütunlu tek bir DataFrame'e yükler.
+
+    Bölüm kümesi başına bir kez birleştirilir; dönen DataFrame load_rfm_data
+    gibi önbellekle paylaşılır ve salt okunurdur.
+    """
+    keys = {}
+    for name, source in sources.items():
+        digest, data = source_digest(source)
+        # Yüklenen dosyalar işçilere baytlarıyla gönderilir
+        keys[name] = (digest, source if data is None else data)
+    combined = content_hash('\n'.join(f"{name}\t{key}" for name, (key, _) in keys.items()).encode())
+    return cached_frame(f"parts-{combined}", lambda: _combine(keys, workers))
@@ -0,0 +1,210 @@
+"""Yeniden çalıştırma başına süre ve bellek ölçümü.
+
+Uygulama her yeniden çalıştırmanın başında start_run, sonunda finish_run
+çağırır. Aradaki span() blokları ve @traced fonksiyonlar duvar saati süresini,
+iş parçacığı CPU süresini ve (istenirse tracemalloc ile) ayrılan bellek
+farkını kaydeder. Biten çalıştırmalar süreç genelinde sınırlı bir halka
+tamponda tutulur; JSON veya Chrome trace-event biçiminde dışa aktarılabilir.
+
+Ölçüm kapalıyken span() paylaşılan boş bir bağlam yöneticisi döndürür ve
+@traced yalnızca bir iş parçacığı yereli okur; ek maliyet ihmal edilebilir.
+Ölçüm oturuma özeldir: yalnızca start_run'ı çağıran iş parçacığında açıktır.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import nullcontext
+
+HISTORY_SIZE = int(os.environ.get('RFM_PROFILE_HISTORY', 50))
+PROFILE_DEFAULT = os.environ.get('RFM_PROFILE', '') not in ('', '0')
+
+_local = threading.local()
+_history = deque(maxlen=HISTORY_SIZE)
+_lock = threading.Lock()
+_memory_runs = 0
+_NULL = nullcontext()
+
+
+class Span:
+    """Tek bir ölçülen blok; süreler nanosaniye."""
+
+    __slots__ = ('name', 'start', 'wall', 'cpu', 'alloc', 'depth', 'thread', 'args')
+
+    def __init__(self, name, start, depth, thread, args):
+        self.name = name
+        self.start = start
+        self.depth = depth
+        self.thread = thread
+        self.args = args
+        self.wall = self.cpu = 0
+        self.alloc = None
+
+    def to_dict(self):
+        return {
+            'name': self.name, 'start_ns': self.start, 'wall_ns': self.wall,
+            'cpu_ns': self.cpu, 'alloc_bytes': self.alloc, 'depth': self.depth,
+            'thread': self.thread, 'args': self.args,
+        }
+
+
+class RunTrace:
+    """Bir yeniden çalıştırmanın span'leri."""
+
+    def __init__(self, label='', memory=False):
+        self.label = label
+        self.memory = memory
+        self.created = time.time()
+        self.start = time.perf_counter_ns()
+        self.wall = None
+        self.depth = 0
+        self.spans = []
+
+    def ordered(self):
+        return sorted(self.spans, key=lambda s: (s.start, -s.wall))
+
+    def to_dict(self):
+        return {
+            'label': self.label, 'created': self.created, 'wall_ns': self.wall,
+            'memory': self.memory, 'spans': [s.to_dict() for s in self.ordered()],
+        }
+
+    def rows(self):
+        """Panel tablosu için satırlar; iç içe span'ler girintilenir."""
+        return [{
+            'Aşama': '\u2003' * s.depth + s.name,
+            'Süre (ms)': round(s.wall / 1e6, 2),
+            'CPU (ms)': round(s.cpu / 1e6, 2),
+            'Bellek (KB)': round(s.alloc / 1024, 1) if s.alloc is not None else None,
+        } for s in self.ordered()]
+
+    def trace_events(self, pid=0):
+        """Chrome trace-event 'X' (tamamlanmış) olayları, mikrosaniye."""
+        events = [{
+            'name': self.label or 'rerun', 'cat': 'run', 'ph': 'X', 'pid': pid, 'tid': 0,
+            'ts': self.start / 1000, 'dur': (self.wall or 0) / 1000,
+        }]
+        for s in self.ordered():
+            args = dict(s.args, cpu_ms=s.cpu / 1e6)
+            if s.alloc is not None:
+                args['alloc_bytes'] = s.alloc
+            events.append({
+                'name': s.name, 'cat': 'span', 'ph': 'X', 'pid': pid, 'tid': s.thread,
+                'ts': s.start / 1000, 'dur': s.wall / 1000, 'args': args,
+            })
+        return events
+
+
+class _SpanContext:
+    __slots__ = ('run', 'record', 'cpu', 'memory')
+
+    def __init__(self, run, name, args):
+        self.run = run
+        self.record = Span(name, 0, run.depth, threading.get_ident(), args)
+
+    def __enter__(self):
+        self.run.depth += 1
+        self.memory = tracemalloc.get_traced_memory()[0] if self.run.memory else None
+        self.cpu = time.thread_time_ns()
+        self.record.start = time.perf_counter_ns()
+        return self.record
+
+    def __exit__(self, *exc):
+        record = self.record
+        record.wall = time.perf_counter_ns() - record.start
+        record.cpu = time.thread_time_ns() - self.cpu
+        if self.memory is not None:
+            record.alloc = tracemalloc.get_traced_memory()[0] - self.memory
+        self.run.depth -= 1
+        self.run.spans.append(record)
+        return False
+
+
+def current_run():
+    return getattr(_local, 'run', None)
+
+
+def start_run(label='', enabled=True, memory=False):
+    """Bu iş parçacığı için yeni bir ölçüm başlatır; enabled=False ise kapatır."""
+    global _memory_runs
+    finish_run(record=False)
+    if not enabled:
+        return None
+    if memory:
+        with _lock:
+            _memory_runs += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+    run = _local.run = RunTrace(label, memory)
+    return run
+
+
+def finish_run(record=True):
+    """Açık ölçümü kapatır ve (record ise) halka tampona ekler."""
+    global _memory_runs
+    run = current_run()
+    if run is None:
+        return None
+    _local.run = None
+    run.wall = time.perf_counter_ns() - run.start
+    with _lock:
+        if run.memory:
+            _memory_runs -= 1
+            # Başka bir oturum hâlâ ölçüyorsa tracemalloc açık kalır
+            if _memory_runs == 0 and tracemalloc.is_tracing():
+                tracemalloc.stop()
+        if record:
+            _history.append(run)
+    return run
+
+
+def span(name, **args):
+    """with span('filter'): ... ; ölçüm kapalıyken hiçbir şey yapmaz."""
+    run = getattr(_local, 'run', None)
+    if run is None:
+        return _NULL
+    return _SpanContext(run, name, args)
+
+
+def traced(name=None):
+    """Fonksiyonu bir span ile sarar; ad verilmezse __qualname__ kullanılır."""
+    def decorator(func):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            run = getattr(_local, 'run', None)
+            if run is None:
+                return func(*args, **kwargs)
+            with _SpanContext(run, label, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def history():
+    with _lock:
+        return list(_history)
+
+
+def clear_history():
+    with _lock:
+        _history.clear()
+
+
+def to_json(runs):
+    return json.dumps({'runs': [run.to_dict() for run in runs]}, indent=2)
+
+
+def to_chrome_trace(runs):
+    """chrome://tracing veya Perfetto ile açılabilen trace-event JSON'u."""
+    events = []
+    for run in runs:
+        events += run.trace_events(pid=os.getpid())
+    return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'})
@@ -0,0 +1,51 @@
+"""Dashboard'daki tablo ve özet raporun Streamlit'ten bağımsız hali.
+
+Aynı fonksiyonlar hem uygulamada hem de komut satırında (python -m rfm)
+kullanılır; grafik kütüphaneleri yüklenmez.
+"""
+
+REQUIRED_COLUMNS = ['CustomerID', 'Recency', 'Frequency', 'Monetary', 'RFMScore', 'CustomerLevel']
+TOP_COLUMNS = ['CustomerID', 'Recency', 'Frequency', 'Monetary', 'RFMScore', 'CustomerLevel']
+
+RECOMMENDATIONS = [
+    "**Top Müşteriler**: RFM score'u yüksek müşterilere özel kampanyalar düzenleyin",
+    "**Middle Müşteriler**: Frequency artırıcı aktiviteler planlayın",
+    "**Low Müşteriler**: Reaktivasyon kampanyaları ile geri kazanmaya odaklanın",
+]
+
+
+def missing_columns(columns):
+    """REQUIRED_COLUMNS içinden columns'ta bulunmayanlar."""
+    columns = set(columns)
+    return [col for col in REQUIRED_COLUMNS if col not in columns]
+
+
+def segment_table(selection):
+    """Seviye başına müşteri sayısı ve ortalamalar, 2 basamağa yuvarlanmış."""
+    table = selection.by_level().round(2)
+    return table.rename(columns={'count': 'Müşteri Sayısı'})
+
+
+def top_customers(aggregates):
+    return aggregates.top[TOP_COLUMNS]
+
+
+def summary_report(aggregates, segments):
+    """Markdown özet rapor; segments, segment_table çıktısıdır."""
+    lines = [
+        "## RFM Analizi Özet Raporu",
+        "",
+        "**Genel Bilgiler:**",
+        f"- Toplam Müşteri Sayısı: {len(aggregates):,}",
+        f"- Ortalama RFM Score: {aggregates.mean('RFMScore'):.2f}",
+        f"- Ortalama Monetary Değer: ${aggregates.mean('Monetary'):,.2f}",
+        f"- Ortalama Frequency: {aggregates.mean('Frequency'):.2f}",
+        f"- Ortalama Recency: {aggregates.mean('Recency'):.1f} gün",
+        "",
+        "**Müşteri Segmentleri:**",
+        segments.to_string(),
+        "",
+        "**Öneriler:**",
+    ]
+    lines += [f"- {item}" for item in RECOMMENDATIONS]
+    return "\n".join(lines) + "\n"
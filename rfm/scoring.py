@@ -0,0 +1,244 @@
+"""Ham fatura satırlarından RFM skorlarının hesaplanması.
+
+Girdi Online Retail formatındaki satırlardır (InvoiceNo, CustomerID,
+InvoiceDate, Quantity, UnitPrice). Çıktı, dashboard'un beklediği
+OnlineRetail_RFMSCORE.csv şemasıdır.
+
+Skorlama kuralları mevcut veri setiyle aynıdır:
+
+- Recency, Frequency ve Monetary çeyreklere bölünür; küçük değerler 4,
+  büyük değerler 1 puan alır (pd.qcut(x, 4, labels=[4, 3, 2, 1])).
+- RFMScore = R*100 + F*10 + M, RFMValue = R + F + M.
+- RFMValue 3-5 Low, 6-8 Middle, 9-12 Top.
+"""
+
+import io
+
+import numpy as np
+import pandas as pd
+
+from rfm.loader import apply_schema, load_cached
+from rfm.profiling import traced
+
+TRANSACTION_COLUMNS = ['InvoiceNo', 'CustomerID', 'InvoiceDate', 'Quantity', 'UnitPrice']
+
+# Online Retail II dosyalarındaki sütun adları
+COLUMN_ALIASES = {
+    'Invoice': 'InvoiceNo',
+    'Customer ID': 'CustomerID',
+    'Price': 'UnitPrice',
+}
+
+RFM_COLUMNS = [
+    'CustomerID', 'InvoiceDate_max', 'AnalyzeDate', 'Recency', 'Frequency',
+    'Monetary', 'RecencyScore', 'FrequencyScore', 'MonetaryScore',
+    'RFMScore', 'RFMValue', 'CustomerLevel',
+]
+
+QUANTILES = [0.25, 0.5, 0.75]
+LEVEL_BINS = [0, 5, 8, 12]
+LEVEL_LABELS = ['Low', 'Middle', 'Top']
+
+DEFAULT_CHUNKSIZE = 1_000_000
+
+
+def clean_transactions(lines):
+    """Müşterisiz, iptal edilmiş ve sıfır/negatif tutarlı satırları atar."""
+    lines = lines.rename(columns=COLUMN_ALIASES)
+    missing = [col for col in TRANSACTION_COLUMNS if col not in lines.columns]
+    if missing:
+        raise ValueError(f"Eksik sütunlar: {', '.join(missing)}")
+
+    invoice = lines['InvoiceNo'].astype(str)
+    mask = (
+        lines['CustomerID'].notna()
+        & ~invoice.str.startswith('C')
+        & (lines['Quantity'] > 0)
+        & (lines['UnitPrice'] > 0)
+    )
+    lines = lines.loc[mask, TRANSACTION_COLUMNS]
+
+    return pd.DataFrame({
+        'InvoiceNo': invoice[mask].values,
+        'CustomerID': lines['CustomerID'].astype('int64').values,
+        'InvoiceDate': pd.to_datetime(lines['InvoiceDate']).dt.normalize().values,
+        'Revenue': (lines['Quantity'] * lines['UnitPrice']).astype('float64').values,
+    })
+
+
+class RFMAccumulator:
+    """Satır parçalarını müşteri bazında özetleyen, belleği sınırlı toplayıcı.
+
+    Bellek satır sayısına değil müşteri ve (Frequency için) fatura sayısına
+    göre büyür. Faturalar 64 bitlik hash olarak tutulur.
+    """
+
+    def __init__(self, frequency_by='invoice', compact_every=5_000_000):
+        if frequency_by not in ('invoice', 'line'):
+            raise ValueError("frequency_by 'invoice' ya da 'line' olmalıdır")
+        self.frequency_by = frequency_by
+        self.compact_every = compact_every
+        self._parts = []
+        self._invoices = []
+        self._pending_invoices = 0
+
+    def update(self, lines):
+        lines = clean_transactions(lines)
+        if lines.empty:
+            return self
+
+        part = lines.groupby('CustomerID', sort=False).agg(
+            last_date=('InvoiceDate', 'max'),
+            lines=('Revenue', 'size'),
+            monetary=('Revenue', 'sum'),
+        )
+        self._parts.append(part)
+
+        if self.frequency_by == 'invoice':
+            invoices = pd.DataFrame({
+                'invoice': pd.util.hash_array(lines['InvoiceNo'].values),
+                'CustomerID': lines['CustomerID'].values,
+            }).drop_duplicates('invoice')
+            self._invoices.append(invoices)
+            self._pending_invoices += len(invoices)
+
+        if self._pending_invoices >= self.compact_every or len(self._parts) > 16:
+            self._compact()
+        return self
+
+    def _compact(self):
+        if len(self._parts) > 1:
+            merged = pd.concat(self._parts)
+            self._parts = [merged.groupby(level=0, sort=False).agg(
+                last_date=('last_date', 'max'),
+                lines=('lines', 'sum'),
+                monetary=('monetary', 'sum'),
+            )]
+        if len(self._invoices) > 1:
+            self._invoices = [pd.concat(self._invoices).drop_duplicates('invoice')]
+        self._pending_invoices = 0
+
+    def customers(self):
+        """CustomerID indeksli last_date, Frequency ve Monetary tablosu."""
+        self._compact()
+        if not self._parts:
+            return pd.DataFrame(
+                {'last_date': pd.Series(dtype='datetime64[ns]'),
+                 'Frequency': pd.Series(dtype='int64'),
+                 'Monetary': pd.Series(dtype='float64')},
+                index=pd.Index([], name='CustomerID', dtype='int64'),
+            )
+        state = self._parts[0]
+        if self.frequency_by == 'invoice':
+            frequency = self._invoices[0].groupby('CustomerID', sort=False).size()
+        else:
+            frequency = state['lines']
+        return pd.DataFrame({
+            'last_date': state['last_date'],
+            'Frequency': frequency.reindex(state.index).astype('int64'),
+            'Monetary': state['monetary'],
+        }).sort_index()
+
+
+def score_bins(values):
+    """Çeyrek sınırlarına göre 4 (en küçük) ile 1 (en büyük) arası skor."""
+    values = np.asarray(values, dtype='float64')
+    if len(values) == 0:
+        return np.empty(0, dtype='int32'), np.full(len(QUANTILES), np.nan)
+    edges = np.quantile(values, QUANTILES)
+    return score_with_edges(values, edges), edges
+
+
+def score_with_edges(values, edges):
+    # qcut aralıkları sağdan kapalıdır: x <= q25 ilk dilime düşer
+    bins = np.searchsorted(edges, np.asarray(values, dtype='float64'), side='left')
+    return (len(edges) + 1 - bins).astype('int32')
+
+
+def customer_level(rfm_value):
+    return pd.cut(rfm_value, bins=LEVEL_BINS, labels=LEVEL_LABELS)
+
+
+def score_customers(customers, analyze_date=None, edges=None):
+    """Müşteri özetinden RFM tablosunu üretir.
+
+    edges verilirse ({'Recency': [...], ...}) çeyrek sınırları yeniden
+    hesaplanmaz.
+    """
+    analyze_date = pd.Timestamp(analyze_date or pd.Timestamp.today()).normalize()
+    recency = (analyze_date - customers['last_date']).dt.days
+
+    columns = {
+        'Recency': recency.to_numpy(),
+        'Frequency': customers['Frequency'].to_numpy(),
+        'Monetary': customers['Monetary'].to_numpy(),
+    }
+    scores = {}
+    for col, values in columns.items():
+        if edges is None:
+            scores[col], _ = score_bins(values)
+        else:
+            scores[col] = score_with_edges(values, edges[col])
+
+    rfm_score = scores['Recency'] * 100 + scores['Frequency'] * 10 + scores['Monetary']
+    rfm_value = scores['Recency'] + scores['Frequency'] + scores['Monetary']
+
+    df = pd.DataFrame({
+        'CustomerID': customers.index.to_numpy(),
+        'InvoiceDate_max': customers['last_date'].to_numpy(),
+        'AnalyzeDate': analyze_date,
+        'Recency': columns['Recency'],
+        'Frequency': columns['Frequency'],
+        'Monetary': columns['Monetary'],
+        'RecencyScore': scores['Recency'],
+        'FrequencyScore': scores['Frequency'],
+        'MonetaryScore': scores['Monetary'],
+        'RFMScore': rfm_score,
+        'RFMValue': rfm_value,
+        'CustomerLevel': customer_level(rfm_value),
+    }, columns=RFM_COLUMNS)
+    return apply_schema(df)
+
+
+def compute_rfm(lines, analyze_date=None, frequency_by='invoice'):
+    """Bellekteki satır tablosundan RFM tablosu."""
+    acc = RFMAccumulator(frequency_by=frequency_by).update(lines)
+    return score_customers(acc.customers(), analyze_date)
+
+
+def read_transactions(source, chunksize=DEFAULT_CHUNKSIZE):
+    """Satır CSV'sini yalnızca gerekli sütunlarla parça parça okur."""
+    if hasattr(source, 'seek'):
+        start = source.tell()
+        header = pd.read_csv(source, nrows=0, encoding_errors='replace').columns
+        source.seek(start)
+    else:
+        header = pd.read_csv(source, nrows=0, encoding_errors='replace').columns
+    wanted = set(TRANSACTION_COLUMNS) | set(COLUMN_ALIASES)
+    return pd.read_csv(
+        source,
+        usecols=[col for col in header if col in wanted],
+        dtype={'InvoiceNo': str, 'Invoice': str},
+        chunksize=chunksize,
+        encoding_errors='replace',
+    )
+
+
+def compute_rfm_from_csv(source, analyze_date=None, frequency_by='invoice',
+                         chunksize=DEFAULT_CHUNKSIZE):
+    """Büyük satır dosyalarını parça parça işleyerek RFM tablosu üretir."""
+    acc = RFMAccumulator(frequency_by=frequency_by)
+    for chunk in read_transactions(source, chunksize=chunksize):
+        acc.update(chunk)
+    return score_customers(acc.customers(), analyze_date)
+
+
+@traced('load.transactions')
+def load_rfm_from_transactions(source, analyze_date=None, frequency_by='invoice'):
+    """compute_rfm_from_csv'nin içerik hash'i ile önbelleğe alınan sürümü."""
+    analyze_date = pd.Timestamp(analyze_date or pd.Timestamp.today()).normalize()
+    return load_cached(
+        source,
+        lambda data: compute_rfm_from_csv(io.BytesIO(data), analyze_date, frequency_by),
+        tag=f"tx-{frequency_by}-{analyze_date:%Y%m%d}",
+    )
@@ -0,0 +1,95 @@
+"""Dashboard bölümlerinin girdilerine göre önbelleğe alınması ve filtre
+değişikliklerinin birleştirilmesi.
+
+Streamlit her widget değişikliğinde betiği baştan sona yeniden çalıştırır.
+Her bölüm (segment tablosu, istatistikler, top-N sayfası, özet rapor, geçmiş
+tabloları) bağlı olduğu girdileri açıkça bildirir ve sonucu bu girdilerle
+anahtarlanır; girdileri değişmeyen bölümler yeniden çalıştırmada yeniden
+hesaplanmaz, yalnızca önbellekteki sonuç yeniden gösterilir.
+
+Slider sürüklenirken tarayıcı birkaç yüz milisaniyede bir yeni değer gönderir.
+Debouncer art arda gelen değişiklikleri bir sürükleme sayar ve ağır işi kısa
+bir sessizlik süresi kadar erteler; bu sırada yeni değer gelirse Streamlit
+çalışmayı bir sonraki st çağrısında keser. Böylece bir sürükleme tek bir
+hesaplamaya dönüşür.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from rfm.profiling import span
+
+DEBOUNCE_SECONDS = float(os.environ.get('RFM_DEBOUNCE_MS', 300)) / 1000
+SECTION_CACHE_SIZE = 64
+
+
+class SectionCache:
+    """(bölüm adı, girdiler) -> bölüm sonucu; LRU düzeninde sınırlı."""
+
+    def __init__(self, maxsize=SECTION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name, inputs, build):
+        """inputs ile daha önce hesaplandıysa önbellekteki sonuç, değilse build()."""
+        key = (name, inputs)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        with span(f"section.{name}"):
+            result = build()
+        with self._lock:
+            self._entries[key] = result
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return result
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_cache = SectionCache()
+
+
+def cached_section(name, inputs, build):
+    """Süreç genelinde paylaşılan önbellekte name bölümünün sonucu.
+
+    inputs bölümün bağlı olduğu her şeyi içermelidir (ör. veri parmak izi ve
+    filtre anahtarı); hashlenebilir olmalıdır.
+    """
+    return _cache.get(name, inputs, build)
+
+
+class Debouncer:
+    """Art arda gelen girdi değişikliklerini birleştirir.
+
+    İlk değişiklik hemen işlenir. Önceki değişiklikten quiet saniyeden kısa
+    süre sonra gelen değişiklik bir sürüklemenin parçası sayılır ve delay()
+    quiet kadar beklenmesini ister.
+    """
+
+    def __init__(self, quiet=DEBOUNCE_SECONDS):
+        self.quiet = quiet
+        self.inputs = None
+        self.changed = None
+
+    def delay(self, inputs, now=None):
+        """inputs için ağır işten önce beklenecek süre (saniye)."""
+        now = time.monotonic() if now is None else now
+        if inputs == self.inputs:
+            return 0.0
+        burst = self.changed is not None and now - self.changed < self.quiet
+        self.inputs, self.changed = inputs, now
+        return self.quiet if burst else 0.0
+
+    def settle(self, inputs):
+        """delay() kadar bekler; beklendiyse True."""
+        wait = self.delay(inputs)
+        if wait:
+            with span('debounce', seconds=wait):
+                time.sleep(wait)
+        return bool(wait)
@@ -0,0 +1,318 @@
+"""CustomerLevel yerine k-means kümeleriyle segmentasyon.
+
+Recency, Frequency ve Monetary log1p ile sıkıştırılıp standartlaştırılır ve
+mini-batch k-means ile kümelenir. Veri parça parça akıtılır: ilk geçişte
+ortalama/varyans ve bir rezervuar örneği toplanır, merkezler örnek üzerinde
+k-means++ ve birkaç Lloyd adımıyla başlatılır, sonraki geçişlerde merkezler
+mini-batch'lerle güncellenir. Uzaklık hesapları numpy'de GIL'i bıraktığından
+her batch iş parçacıklarına bölünür.
+
+Eğitilen merkezler veri parmak izi ve küme sayısıyla anahtarlanıp bellekte
+ve diskte saklanır. Kümeler değerlerine göre (düşük Recency, yüksek Frequency
+ve Monetary) sıralanır; 'Küme 1' en değerli segmenttir.
+
+Recency, Frequency veya Monetary değeri eksik satırlar eğitime katılmaz ve
+hiçbir kümeye atanmaz; 'Eksik veri' segmentinde ayrıca gösterilir.
+
+segment_view, CustomerLevel sütununda küme adlarını taşıyan kopyasız bir
+görünüm döndürür; böylece tüm sekmeler ve özetler kümelere geçer. Dosyadaki
+seviye SourceLevel sütununda kalır.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from rfm.loader import CACHE_DIR, frame_key, memoize_per_frame, register_view
+from rfm.profiling import traced
+
+SEGMENT_WORKERS = int(os.environ.get('RFM_SEGMENT_WORKERS', min(4, os.cpu_count() or 1)))
+SEGMENT_DIR = os.path.join(CACHE_DIR, 'segments')
+FEATURES = ['Recency', 'Frequency', 'Monetary']
+SEGMENT_COLUMN = 'Segment'
+SOURCE_LEVEL_COLUMN = 'SourceLevel'
+MISSING_SEGMENT = 'Eksik veri'
+CHUNK_ROWS = 256 * 1024
+BATCH_ROWS = 4096
+SAMPLE_ROWS = 10_000
+PASSES = 3
+REFINE_ITERATIONS = 20
+# Özellik dönüşümü veya algoritma değişince eski merkezler geçersiz sayılsın diye artırılır
+MODEL_VERSION = 2
+
+_lock = threading.Lock()
+_models = {}
+
+
+def features(frame):
+    """(n, 3) log1p(Recency, Frequency, Monetary); negatif değerler 0'a kırpılır."""
+    values = np.column_stack([frame[col].to_numpy(dtype='float64') for col in FEATURES])
+    return np.log1p(np.clip(values, 0, None))
+
+
+def complete_rows(x):
+    """Özelliklerinin hepsi sonlu olan satırlar."""
+    return np.isfinite(x).all(axis=1)
+
+
+def segment_names(n_clusters):
+    return [f"Küme {i + 1}" for i in range(n_clusters)]
+
+
+class MiniBatchKMeans:
+    """Akış halinde eğitilen mini-batch k-means (Sculley, 2010)."""
+
+    def __init__(self, n_clusters=4, batch_rows=BATCH_ROWS, passes=PASSES, seed=0, workers=SEGMENT_WORKERS):
+        self.n_clusters = n_clusters
+        self.batch_rows = batch_rows
+        self.passes = passes
+        self.seed = seed
+        self.workers = max(1, workers)
+        self.centers = self.mean = self.scale = self.counts = None
+
+    def _standardize(self, x):
+        return np.nan_to_num((x - self.mean) / self.scale)
+
+    def _nearest(self, x):
+        # |x - c|^2 = |x|^2 - 2 x.c + |c|^2; |x|^2 argmin'i değiştirmez
+        distances = (self.centers ** 2).sum(axis=1) - 2 * x @ self.centers.T
+        return distances.argmin(axis=1)
+
+    def _nearest_parallel(self, x, pool):
+        if pool is None or len(x) < 2 * self.batch_rows:
+            return self._nearest(x)
+        blocks = np.array_split(x, self.workers)
+        return np.concatenate(list(pool.map(self._nearest, blocks)))
+
+    def _first_pass(self, chunks, rng):
+        """Momentler ve rezervuar örneği (rastgele anahtarı en küçük SAMPLE_ROWS satır)."""
+        n, total, squares = 0, np.zeros(len(FEATURES)), np.zeros(len(FEATURES))
+        sample, keys = np.empty((0, len(FEATURES))), np.empty(0)
+        for chunk in chunks():
+            x = features(chunk)
+            x = x[complete_rows(x)]
+            n += len(x)
+            total += x.sum(axis=0)
+            squares += (x ** 2).sum(axis=0)
+            sample = np.concatenate([sample, x])
+            keys = np.concatenate([keys, rng.random(len(x))])
+            if len(sample) > SAMPLE_ROWS:
+                keep = np.argpartition(keys, SAMPLE_ROWS)[:SAMPLE_ROWS]
+                sample, keys = sample[keep], keys[keep]
+        if n == 0:
+            raise ValueError("Kümeleme için geçerli Recency/Frequency/Monetary değeri yok")
+        self.mean = total / n
+        scale = np.sqrt(np.maximum(squares / n - self.mean ** 2, 0))
+        self.scale = np.where(scale > 0, scale, 1.0)
+        return self._standardize(sample)
+
+    def _init_centers(self, sample, rng):
+        """k-means++ başlangıcı."""
+        k = min(self.n_clusters, len(sample))
+        centers = [sample[rng.integers(len(sample))]]
+        closest = ((sample - centers[0]) ** 2).sum(axis=1)
+        for _ in range(1, k):
+            total = closest.sum()
+            index = rng.choice(len(sample), p=closest / total) if total > 0 else rng.integers(len(sample))
+            centers.append(sample[index])
+            closest = np.minimum(closest, ((sample - sample[index]) ** 2).sum(axis=1))
+        self.centers = np.array(centers)
+        self.counts = np.zeros(k, dtype='int64')
+
+    def _refine(self, sample, iterations=REFINE_ITERATIONS):
+        """Örnek üzerinde birkaç Lloyd adımı; küçük veri setlerinde sonuç budur."""
+        for _ in range(iterations):
+            labels = self._nearest(sample)
+            counts = np.bincount(labels, minlength=len(self.centers))
+            hit = counts > 0
+            sums = np.stack([np.bincount(labels, weights=sample[:, j], minlength=len(self.centers))
+                             for j in range(sample.shape[1])], axis=1)
+            centers = self.centers.copy()
+            centers[hit] = sums[hit] / counts[hit, None]
+            if np.allclose(centers, self.centers):
+                break
+            self.centers = centers
+
+    def _order_clusters(self):
+        value = -self.centers[:, 0] + self.centers[:, 1] + self.centers[:, 2]
+        order = np.argsort(-value, kind='stable')
+        self.centers, self.counts = self.centers[order], self.counts[order]
+
+    @traced('segments.fit')
+    def fit(self, chunks):
+        """chunks(): her çağrıda baştan başlayan DataFrame parçaları üretir."""
+        rng = np.random.default_rng(self.seed)
+        sample = self._first_pass(chunks, rng)
+        self._init_centers(sample, rng)
+        self._refine(sample)
+        k = len(self.centers)
+        step = self.batch_rows * self.workers
+        with ThreadPoolExecutor(self.workers) if self.workers > 1 else _no_pool() as pool:
+            for _ in range(self.passes):
+                for chunk in chunks():
+                    x = features(chunk)
+                    x = self._standardize(x[complete_rows(x)])
+                    x = x[rng.permutation(len(x))]
+                    for start in range(0, len(x), step):
+                        batch = x[start:start + step]
+                        labels = self._nearest_parallel(batch, pool)
+                        counts = np.bincount(labels, minlength=k)
+                        sums = np.stack([np.bincount(labels, weights=batch[:, j], minlength=k)
+                                         for j in range(batch.shape[1])], axis=1)
+                        self.counts += counts
+                        hit = counts > 0
+                        # Merkez başına öğrenme oranı: bu batch'teki pay / toplam atama
+                        rate = (counts[hit] / self.counts[hit])[:, None]
+                        self.centers[hit] += rate * (sums[hit] / counts[hit, None] - self.centers[hit])
+                # Hiç atama almayan merkezler örnekten yeniden seçilir
+                empty = self.counts == 0
+                if empty.any():
+                    self.centers[empty] = sample[rng.choice(len(sample), empty.sum())]
+        self._order_clusters()
+        return self
+
+    @traced('segments.predict')
+    def predict(self, frame):
+        """Satır başına küme numarası (0 en değerli); özelliği eksik satırlarda -1."""
+        x = features(frame)
+        valid = complete_rows(x)
+        labels = np.full(len(x), -1, dtype='int64')
+        x = self._standardize(x[valid])
+        if self.workers > 1 and len(x) >= 2 * self.batch_rows:
+            with ThreadPoolExecutor(self.workers) as pool:
+                labels[valid] = self._nearest_parallel(x, pool)
+        else:
+            labels[valid] = self._nearest(x)
+        return labels
+
+    def describe(self):
+        """Küme başına eğitimdeki atama sayısı ve merkezin özgün birimlerdeki değeri."""
+        centers = np.expm1(self.centers * self.scale + self.mean)
+        table = pd.DataFrame(centers, columns=FEATURES, index=segment_names(len(centers)))
+        table.insert(0, 'count', self.counts)
+        table.index.name = SEGMENT_COLUMN
+        return table
+
+    def to_arrays(self):
+        return {'centers': self.centers, 'mean': self.mean, 'scale': self.scale, 'counts': self.counts}
+
+    @classmethod
+    def from_arrays(cls, arrays, **kwargs):
+        model = cls(n_clusters=len(arrays['centers']), **kwargs)
+        model.centers, model.mean = arrays['centers'], arrays['mean']
+        model.scale, model.counts = arrays['scale'], arrays['counts']
+        return model
+
+
+class _no_pool:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+def iter_feature_chunks(data, columns=FEATURES, chunk_rows=CHUNK_ROWS):
+    """DataFrame ya da OnDiskTable için her çağrıda baştan başlayan parça üreteci.
+
+    Diskteki tablolardan yalnızca columns okunur.
+    """
+    if hasattr(data, 'dataset'):
+        return lambda: (
+            batch.to_pandas()
+            for batch in data.dataset.to_batches(columns=columns, batch_size=chunk_rows)
+            if batch.num_rows
+        )
+    return lambda: (data.iloc[start:start + chunk_rows] for start in range(0, len(data), chunk_rows))
+
+
+def _fingerprint(data):
+    if hasattr(data, 'fingerprint'):
+        return data.fingerprint
+    from rfm.figures import frame_fingerprint
+
+    return frame_key(data) or frame_fingerprint(data)
+
+
+def _model_path(fingerprint, n_clusters, seed):
+    return os.path.join(SEGMENT_DIR, f"{fingerprint}-k{n_clusters}-s{seed}-v{MODEL_VERSION}.npz")
+
+
+def fit_segments(data, n_clusters=4, seed=0):
+    """data için eğitilmiş MiniBatchKMeans; merkezler bellekte ve diskte saklanır."""
+    key = (_fingerprint(data), n_clusters, seed)
+    with _lock:
+        model = _models.get(key)
+    if model is not None:
+        return model
+    path = _model_path(*key)
+    if os.path.exists(path):
+        try:
+            with np.load(path) as arrays:
+                model = MiniBatchKMeans.from_arrays(dict(arrays), seed=seed)
+        except (OSError, ValueError, KeyError):
+            model = None
+    if model is None:
+        model = MiniBatchKMeans(n_clusters, seed=seed).fit(iter_feature_chunks(data))
+        try:
+            os.makedirs(SEGMENT_DIR, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+            np.savez(tmp_path, **model.to_arrays())
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+    with _lock:
+        _models[key] = model
+    return model
+
+
+def assign_segments(df, n_clusters=4, seed=0):
+    """Satır başına küme adı (Segment sütunu olarak).
+
+    Özelliği eksik satırlar MISSING_SEGMENT'tedir; bu kategori yalnızca böyle
+    satır varsa eklenir.
+    """
+    model = fit_segments(df, n_clusters, seed)
+    names = segment_names(len(model.centers))
+    labels = model.predict(df)
+    missing = labels < 0
+    if missing.any():
+        labels[missing] = len(names)
+        names.append(MISSING_SEGMENT)
+    return pd.Series(
+        pd.Categorical.from_codes(labels, categories=names),
+        index=df.index, name=SEGMENT_COLUMN,
+    )
+
+
+@memoize_per_frame
+def _frame_views(df):
+    """df'in (küme sayısı, tohum) -> görünüm sözlüğü; df yaşadığı sürece saklanır."""
+    return {}
+
+
+def segment_view(df, n_clusters=4, seed=0):
+    """CustomerLevel'da küme adları olan, veriyi kopyalamayan DataFrame görünümü.
+
+    Dosyadaki seviye SourceLevel sütununa taşınır. Görünümler veri seti
+    yaşadığı sürece saklanır; aynı görünüm her yeniden çalıştırmada aynı nesne
+    olduğundan parmak izi, filtre indeksi ve özetler yeniden kurulmaz.
+    """
+    views = _frame_views(df)
+    key = (n_clusters, seed)
+    with _lock:
+        view = views.get(key)
+    if view is not None:
+        return view
+    segments = assign_segments(df, n_clusters, seed)
+    columns = {col: segments if col == 'CustomerLevel' else df[col] for col in df.columns}
+    if 'CustomerLevel' in df.columns:
+        columns[SOURCE_LEVEL_COLUMN] = df['CustomerLevel']
+    else:
+        columns['CustomerLevel'] = segments
+    view = register_view(pd.DataFrame(columns, copy=False), segments.cat.categories)
+    with _lock:
+        return views.setdefault(key, view)
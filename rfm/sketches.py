@@ -0,0 +1,153 @@
+"""Akış halinde güncellenebilen quantile özetleri.
+
+Her iki yapı da ekleme ve silmeyi (negatif ağırlık) destekler; bir müşterinin
+değeri değiştiğinde eski değer çıkarılıp yenisi eklenir. Quantile hesabı
+sıralama gerektirmez, kova sayısıyla orantılıdır.
+"""
+
+import numpy as np
+
+
+class CountHistogram:
+    """Tamsayı değerler için kesin sayım histogramı.
+
+    Recency (gün) ve Frequency gibi dar aralıklı tamsayılarda np.quantile ile
+    aynı sonucu verir.
+    """
+
+    def __init__(self):
+        self.offset = 0
+        self.counts = np.zeros(0, dtype='int64')
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def _grow(self, lo, hi):
+        if len(self.counts) == 0:
+            self.offset = lo
+            self.counts = np.zeros(hi - lo + 1, dtype='int64')
+            return
+        new_lo = min(lo, self.offset)
+        new_hi = max(hi, self.offset + len(self.counts) - 1)
+        if new_lo == self.offset and new_hi == self.offset + len(self.counts) - 1:
+            return
+        counts = np.zeros(new_hi - new_lo + 1, dtype='int64')
+        start = self.offset - new_lo
+        counts[start:start + len(self.counts)] = self.counts
+        self.offset, self.counts = new_lo, counts
+
+    def add(self, values, weight=1):
+        values = np.asarray(values, dtype='int64').ravel()
+        if len(values) == 0:
+            return self
+        self._grow(int(values.min()), int(values.max()))
+        np.add.at(self.counts, values - self.offset, weight)
+        return self
+
+    def remove(self, values):
+        return self.add(values, weight=-1)
+
+    def merge(self, other):
+        if other.count:
+            nonzero = np.flatnonzero(other.counts)
+            self._grow(other.offset + int(nonzero[0]), other.offset + int(nonzero[-1]))
+            start = other.offset - self.offset
+            self.counts[start:start + len(other.counts)] += other.counts
+        return self
+
+    def quantile(self, qs):
+        """np.quantile(..., method='linear') ile aynı değerler."""
+        qs = np.atleast_1d(np.asarray(qs, dtype='float64'))
+        n = self.count
+        if n == 0:
+            return np.full(len(qs), np.nan)
+        cumulative = np.cumsum(self.counts)
+        position = qs * (n - 1)
+        lower = np.floor(position).astype('int64')
+        upper = np.minimum(lower + 1, n - 1)
+        lower_value = np.searchsorted(cumulative, lower, side='right') + self.offset
+        upper_value = np.searchsorted(cumulative, upper, side='right') + self.offset
+        return lower_value + (upper_value - lower_value) * (position - lower)
+
+    def to_arrays(self):
+        return {'offset': np.array([self.offset]), 'counts': self.counts}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        hist = cls()
+        hist.offset = int(arrays['offset'][0])
+        hist.counts = np.asarray(arrays['counts'], dtype='int64')
+        return hist
+
+
+class QuantileSketch:
+    """Göreli hata sınırlı logaritmik kova özeti (DDSketch benzeri).
+
+    Pozitif değerlerde döndürülen quantile, gerçek değere en fazla
+    relative_accuracy oranında uzaktır. Sıfır ve negatif değerler tek bir
+    sıfır kovasında tutulur.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy 0 ile 1 arasında olmalıdır")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self.zero_count = 0
+        self.buckets = CountHistogram()
+
+    @property
+    def count(self):
+        return self.zero_count + self.buckets.count
+
+    def _index(self, values):
+        return np.ceil(np.log(values) / self._log_gamma).astype('int64')
+
+    def add(self, values, weight=1):
+        values = np.asarray(values, dtype='float64').ravel()
+        positive = values > 0
+        self.zero_count += weight * int((~positive).sum())
+        self.buckets.add(self._index(values[positive]), weight)
+        return self
+
+    def remove(self, values):
+        return self.add(values, weight=-1)
+
+    def merge(self, other):
+        if other.gamma != self.gamma:
+            raise ValueError("Farklı doğruluktaki özetler birleştirilemez")
+        self.zero_count += other.zero_count
+        self.buckets.merge(other.buckets)
+        return self
+
+    def quantile(self, qs):
+        qs = np.atleast_1d(np.asarray(qs, dtype='float64'))
+        n = self.count
+        if n == 0:
+            return np.full(len(qs), np.nan)
+        rank = np.round(qs * (n - 1)).astype('int64')
+        result = np.zeros(len(qs))
+        positive = rank >= self.zero_count
+        if positive.any():
+            cumulative = np.cumsum(self.buckets.counts)
+            bucket = np.searchsorted(cumulative, rank[positive] - self.zero_count, side='right')
+            index = bucket + self.buckets.offset
+            result[positive] = 2 * self.gamma ** index / (self.gamma + 1)
+        return result
+
+    def to_arrays(self):
+        arrays = {f"buckets_{key}": value for key, value in self.buckets.to_arrays().items()}
+        arrays['params'] = np.array([self.relative_accuracy, self.zero_count])
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        sketch = cls(relative_accuracy=float(arrays['params'][0]))
+        sketch.zero_count = int(arrays['params'][1])
+        sketch.buckets = CountHistogram.from_arrays({
+            'offset': arrays['buckets_offset'],
+            'counts': arrays['buckets_counts'],
+        })
+        return sketch
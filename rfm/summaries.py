@@ -0,0 +1,293 @@
+"""Büyük veride kutu, keman grafikleri ve quantile tablosu için özetler.
+
+FilterIndex'in (CustomerLevel, RFMScore) sıralı düzeni, her farklı
+(seviye, skor) çifti bir blok olacak şekilde bölünür. Slider aralıkları her
+zaman bu blok sınırlarına denk gelir. Her blok için sütun başına sabit
+kovalı bir histogram tutulur ve bloklar üzerinden önek toplamı alınır. Böylece
+herhangi bir filtre durumunun seviye başına histogramı, veri taranmadan kova
+sayısıyla orantılı sürede elde edilir.
+
+- Dar aralıklı tamsayı sütunlar (Recency, Frequency, RFMScore) kesin
+  tamsayı kovalarıyla tutulur.
+- Diğerleri (Monetary) göreli hatası relative_accuracy ile sınırlı
+  logaritmik kovalara yazılır. Sıfır ve negatif değerler sıfır kovasındadır.
+- Eksik (NaN) değerler hiçbir kovaya yazılmaz; özetler pandas gibi yalnızca
+  geçerli değerler üzerindendir.
+
+Küçük veri setlerinde bu yapı kullanılmaz, kesin hesaplamaya dönülür.
+"""
+
+import os
+
+import numpy as np
+
+from rfm.loader import memoize_per_frame
+from rfm.profiling import traced
+
+APPROX_THRESHOLD = int(os.environ.get('RFM_APPROX_THRESHOLD', 200_000))
+RELATIVE_ACCURACY = float(os.environ.get('RFM_QUANTILE_ACCURACY', 0.01))
+SUMMARY_COLUMNS = ['Recency', 'Frequency', 'Monetary', 'RFMScore']
+
+MAX_INT_BINS = 4096
+MAX_BLOCKS = 4096
+
+
+def use_approx(n_rows, threshold=None):
+    threshold = APPROX_THRESHOLD if threshold is None else threshold
+    return threshold > 0 and n_rows > threshold
+
+
+def value_bounds(values):
+    """ColumnBinning'in ihtiyaç duyduğu özet: (en küçük, en büyük, en küçük
+    pozitif, hepsi tamsayı mı). Parçalar için merge_bounds ile birleştirilir."""
+    finite = values[np.isfinite(values)]
+    if not len(finite):
+        return None
+    positive = finite[finite > 0]
+    return (
+        float(finite.min()), float(finite.max()),
+        float(positive.min()) if len(positive) else None,
+        bool(np.all(finite == np.round(finite))),
+    )
+
+
+def merge_bounds(a, b):
+    if a is None or b is None:
+        return b if a is None else a
+    positives = [p for p in (a[2], b[2]) if p is not None]
+    return (
+        min(a[0], b[0]), max(a[1], b[1]),
+        min(positives) if positives else None,
+        a[3] and b[3],
+    )
+
+
+class ColumnBinning:
+    """Bir sütunun değerlerini kova numaralarına ve geri çevirir."""
+
+    def __init__(self, values, relative_accuracy=RELATIVE_ACCURACY):
+        self._setup(value_bounds(values), relative_accuracy)
+
+    @classmethod
+    def from_bounds(cls, bounds, relative_accuracy=RELATIVE_ACCURACY):
+        """Veri görülmeden, önceden toplanmış value_bounds özetinden kurar."""
+        binning = cls.__new__(cls)
+        binning._setup(bounds, relative_accuracy)
+        return binning
+
+    def _setup(self, bounds, relative_accuracy):
+        lo, hi, positive_min, integral = bounds if bounds is not None else (0, 0, None, False)
+        lo, hi = np.floor(lo), np.ceil(hi)
+        self.exact = bool(bounds is not None and integral and hi - lo < MAX_INT_BINS)
+        if self.exact:
+            self.offset = int(lo)
+            self.values = np.arange(self.offset, int(hi) + 1, dtype='float64')
+        else:
+            self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+            self._log_gamma = np.log(self.gamma)
+            if positive_min is not None:
+                lo_index = int(np.ceil(np.log(positive_min) / self._log_gamma))
+                hi_index = int(np.ceil(np.log(bounds[1]) / self._log_gamma))
+            else:
+                lo_index = hi_index = 0
+            self.offset = lo_index - 1
+            indexes = np.arange(lo_index, hi_index + 1)
+            # İlk kova sıfır ve negatif değerler içindir
+            self.values = np.concatenate([[0.0], 2 * self.gamma ** indexes / (self.gamma + 1)])
+
+    def to_arrays(self):
+        gamma = self.gamma if not self.exact else 0.0
+        return {'params': np.array([float(self.exact), self.offset, gamma]), 'values': self.values}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        binning = cls.__new__(cls)
+        exact, offset, gamma = arrays['params']
+        binning.exact = bool(exact)
+        binning.offset = int(offset)
+        binning.values = np.asarray(arrays['values'], dtype='float64')
+        if not binning.exact:
+            binning.gamma = float(gamma)
+            binning._log_gamma = np.log(binning.gamma)
+        return binning
+
+    @property
+    def n_bins(self):
+        return len(self.values)
+
+    def bins(self, values):
+        """Sonlu değerlerin kova numaraları; NaN çağıran tarafından elenmelidir."""
+        if self.exact:
+            return np.clip(np.round(values).astype('int64') - self.offset, 0, self.n_bins - 1)
+        result = np.zeros(len(values), dtype='int64')
+        positive = values > 0
+        result[positive] = np.ceil(np.log(values[positive]) / self._log_gamma) - self.offset
+        return np.clip(result, 0, self.n_bins - 1)
+
+
+def hist_quantile(counts, values, qs):
+    """Kova sayımlarından np.quantile(method='linear') yaklaşımı."""
+    qs = np.atleast_1d(np.asarray(qs, dtype='float64'))
+    n = counts.sum()
+    if n == 0:
+        return np.full(len(qs), np.nan)
+    cumulative = np.cumsum(counts)
+    position = qs * (n - 1)
+    lower = np.floor(position).astype('int64')
+    upper = np.minimum(lower + 1, n - 1)
+    lower_value = values[np.searchsorted(cumulative, lower, side='right')]
+    upper_value = values[np.searchsorted(cumulative, upper, side='right')]
+    return lower_value + (upper_value - lower_value) * (position - lower)
+
+
+class HistogramSummary:
+    """Birleştirilmiş tek bir histogramdan kutu/keman istatistikleri."""
+
+    def __init__(self, counts, values):
+        self.counts = counts
+        self.values = values
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    def quantile(self, qs):
+        return hist_quantile(self.counts, self.values, qs)
+
+    def mean(self):
+        n = self.count
+        return float(self.counts @ self.values / n) if n else np.nan
+
+    def std(self):
+        n = self.count
+        if n < 2:
+            return np.nan
+        mean = self.mean()
+        return float(np.sqrt(self.counts @ (self.values - mean) ** 2 / (n - 1)))
+
+    def box_stats(self, label, whis=1.5):
+        """Axes.bxp'nin beklediği sözlük."""
+        q1, med, q3 = self.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        present = self.values[self.counts > 0]
+        inside = present[(present >= q1 - whis * iqr) & (present <= q3 + whis * iqr)]
+        return {
+            'label': label,
+            'med': med, 'q1': q1, 'q3': q3,
+            'whislo': inside.min() if len(inside) else q1,
+            'whishi': inside.max() if len(inside) else q3,
+            # Her dolu aykırı kova için tek nokta; sayı kova sayısıyla sınırlı
+            'fliers': present[(present < q1 - whis * iqr) | (present > q3 + whis * iqr)],
+            'mean': self.mean(),
+        }
+
+    def violin_stats(self, points=100, cut=2):
+        """Axes.violin'in beklediği sözlük; kovalardan Gauss KDE (Scott)."""
+        present = self.counts > 0
+        values, weights = self.values[present], self.counts[present].astype('float64')
+        n = weights.sum()
+        std = self.std()
+        bandwidth = std * n ** (-1 / 5) if std and np.isfinite(std) else 1.0
+        coords = np.linspace(values.min() - cut * bandwidth, values.max() + cut * bandwidth, points)
+        z = (coords[:, None] - values[None, :]) / bandwidth
+        density = (np.exp(-0.5 * z ** 2) @ weights) / (n * bandwidth * np.sqrt(2 * np.pi))
+        return {
+            'coords': coords, 'vals': density,
+            'mean': self.mean(), 'median': self.quantile(0.5)[0],
+            'min': values.min(), 'max': values.max(),
+            # Çeyrekler iç kutu olarak ayrıca çizilir
+            'quantiles': [],
+        }
+
+
+class LevelSummaries:
+    """FilterIndex blokları üzerinde önek toplamlı histogramlar."""
+
+    @traced('aggregates.level_summaries')
+    def __init__(self, index, columns=SUMMARY_COLUMNS, relative_accuracy=RELATIVE_ACCURACY):
+        self.index = index
+        frame = index.frame
+        n = len(frame)
+        # Seviyesi boş satırlar (-1) hiçbir sorguya girmez
+        codes = np.full(n, -1, dtype='int64')
+        for code in range(len(index.sorted_levels)):
+            codes[index.offsets[code]:index.offsets[code + 1]] = code
+        changes = np.flatnonzero((np.diff(codes) != 0) | (np.diff(index.scores) != 0)) + 1
+        self.block_starts = np.concatenate([[0], changes])
+        self.available = n > 0 and len(self.block_starts) <= MAX_BLOCKS
+
+        self.binnings = {}
+        self.cumulative = {}
+        if not self.available:
+            return
+        block_ids = np.zeros(n, dtype='int64')
+        block_ids[changes] = 1
+        block_ids = np.cumsum(block_ids)
+        n_blocks = len(self.block_starts)
+        for col in columns:
+            values = frame[col].to_numpy(dtype='float64')
+            binning = ColumnBinning(values, relative_accuracy)
+            # NaN hiçbir kovaya yazılmaz; sayımlar FilterIndex.valid_count ile uyuşur
+            valid = np.isfinite(values)
+            flat = block_ids[valid] * binning.n_bins + binning.bins(values[valid])
+            counts = np.bincount(flat, minlength=n_blocks * binning.n_bins)
+            counts = counts.reshape(n_blocks, binning.n_bins)
+            self.binnings[col] = binning
+            self.cumulative[col] = np.vstack([
+                np.zeros((1, binning.n_bins), dtype='int64'),
+                np.cumsum(counts, axis=0),
+            ])
+
+    def to_arrays(self):
+        arrays = {'block_starts': self.block_starts, 'available': np.array([self.available])}
+        for col, binning in self.binnings.items():
+            arrays.update({f"{col}__{key}": value for key, value in binning.to_arrays().items()})
+            arrays[f"{col}__cumulative"] = self.cumulative[col]
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, index, arrays):
+        """Aynı veriden kurulmuş index için kaydedilmiş özetler; veri taranmaz."""
+        summaries = cls.__new__(cls)
+        summaries.index = index
+        summaries.block_starts = np.asarray(arrays['block_starts'])
+        summaries.available = bool(arrays['available'][0])
+        summaries.binnings, summaries.cumulative = {}, {}
+        for key in arrays:
+            if key.endswith('__cumulative'):
+                col = key[:-len('__cumulative')]
+                summaries.binnings[col] = ColumnBinning.from_arrays({
+                    'params': arrays[f"{col}__params"], 'values': arrays[f"{col}__values"],
+                })
+                summaries.cumulative[col] = np.asarray(arrays[key])
+        return summaries
+
+    def _blocks(self, a, b):
+        return (
+            int(np.searchsorted(self.block_starts, a, side='left')),
+            int(np.searchsorted(self.block_starts, b, side='left')),
+        )
+
+    def level_summary(self, col, a, b):
+        lo, hi = self._blocks(a, b)
+        counts = self.cumulative[col][hi] - self.cumulative[col][lo]
+        return HistogramSummary(counts, self.binnings[col].values)
+
+    def by_level(self, selection, col):
+        """Seçimdeki her seviye için HistogramSummary."""
+        return {
+            level: self.level_summary(col, a, b)
+            for level, (a, b) in selection.ranges.items()
+        }
+
+    def overall(self, selection, col):
+        counts = np.zeros(self.binnings[col].n_bins, dtype='int64')
+        for summary in self.by_level(selection, col).values():
+            counts += summary.counts
+        return HistogramSummary(counts, self.binnings[col].values)
+
+
+@memoize_per_frame
+def build_level_summaries(index):
+    """FilterIndex başına bir kez kurulan LevelSummaries."""
+    return LevelSummaries(index)
@@ -0,0 +1,60 @@
+"""OnlineRetail_RFMSCORE.csv şemasında sentetik RFM verisi.
+
+Dağılımlar örnek dosyaya kabaca uyacak şekilde seçilmiştir (Recency ~5000
+gün, Frequency ve Monetary sağa çarpık). Skor sınırları bir kez pilot
+örnekten hesaplanır ve tüm parçalarda aynen kullanılır; böylece 10^8 satırlık
+dosyalar bile parça parça, bellek kullanımı sabit kalarak yazılır.
+"""
+
+import numpy as np
+import pandas as pd
+
+from rfm.scoring import score_bins, score_customers
+
+ANALYZE_DATE = pd.Timestamp('2025-05-21')
+FIRST_CUSTOMER_ID = 12346
+PILOT_ROWS = 100_000
+CHUNK_ROWS = 1_000_000
+
+
+def synthetic_customers(n, seed=0, start_id=FIRST_CUSTOMER_ID):
+    """score_customers'ın beklediği last_date / Frequency / Monetary tablosu."""
+    rng = np.random.default_rng(seed)
+    recency = np.minimum(4900 + rng.exponential(165, n), 5610).astype('int64')
+    return pd.DataFrame({
+        'last_date': ANALYZE_DATE - pd.to_timedelta(recency, unit='D'),
+        'Frequency': np.ceil(rng.lognormal(3.3, 1.1, n)).astype('int64'),
+        'Monetary': np.round(rng.lognormal(6.2, 1.2, n), 2),
+    }, index=pd.RangeIndex(start_id, start_id + n, name='CustomerID'))
+
+
+def pilot_edges(seed=0):
+    """Tüm parçalarda kullanılacak çeyrek sınırları."""
+    customers = synthetic_customers(PILOT_ROWS, seed=seed)
+    columns = {
+        'Recency': (ANALYZE_DATE - customers['last_date']).dt.days.to_numpy(),
+        'Frequency': customers['Frequency'].to_numpy(),
+        'Monetary': customers['Monetary'].to_numpy(),
+    }
+    return {col: score_bins(values)[1] for col, values in columns.items()}
+
+
+def generate_rfm(n, seed=0, edges=None, start_id=FIRST_CUSTOMER_ID):
+    """n satırlık skorlanmış RFM tablosu (load_rfm_data çıktısıyla aynı tipler)."""
+    customers = synthetic_customers(n, seed=seed, start_id=start_id)
+    return score_customers(customers, ANALYZE_DATE, edges)
+
+
+def iter_rfm_chunks(n, seed=0, chunk_rows=CHUNK_ROWS):
+    edges = pilot_edges(seed)
+    for i, start in enumerate(range(0, n, chunk_rows)):
+        rows = min(chunk_rows, n - start)
+        yield generate_rfm(rows, seed=seed + i + 1, edges=edges, start_id=FIRST_CUSTOMER_ID + start)
+
+
+def write_rfm_csv(path, n, seed=0, chunk_rows=CHUNK_ROWS):
+    """n satırlık sentetik CSV'yi parça parça yazar."""
+    with open(path, 'w', newline='') as f:
+        for i, chunk in enumerate(iter_rfm_chunks(n, seed, chunk_rows)):
+            chunk.to_csv(f, index=False, header=(i == 0), date_format='%Y-%m-%d')
+    return path
@@ -1,10 +1,23 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
-from mpl_toolkits.mplot3d import Axes3D
+import uuid
 import warnings
+from concurrent.futures import CancelledError
+
+from rfm.artifacts import build_bundle_async, hydrate
+from rfm.export import EXPORT_FORMATS, available_formats, export_artifact
+from rfm.figures import get_renderer
+from rfm.history import history_store
+from rfm.loader import DatasetLease
+from rfm.lookup import RANK_COLUMNS, customer_index
+from rfm.ondisk import open_rfm_table, table_backend
+from rfm.partitions import discover_partitions, load_partitions
+from rfm.profiling import PROFILE_DEFAULT, finish_run, history, span, start_run, to_chrome_trace, to_json
+from rfm.report import TOP_COLUMNS, missing_columns, segment_table, summary_report
+from rfm.scoring import load_rfm_from_transactions
+from rfm.sections import Debouncer, cached_section
+from rfm.segmentation import segment_view
+
 warnings.filterwarnings('ignore')
 
 # Sayfa konfigürasyonu
@@ -15,493 +28,526 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Matplotlib stil ayarları
-plt.style.use('default')
-sns.set_palette("husl")
-
-# Başlık ve açıklama
-st.title("🛍️ RFM Analizi Dashboard")
-st.markdown("---")
-
-# Dosya yükleme veya varsayılan dosya kullanma
-st.subheader("📁 Veri Kaynağı Seçimi")
-data_source = st.radio(
-    "Veri kaynağınızı seçin:",
-    ["Varsayılan dosyayı kullan (data/OnlineRetail_RFMSCORE.csv)", "Kendi dosyamı yükle"]
+# Performans ölçümü - kenar çubuğundaki panelden açılır, kapalıyken maliyetsizdir
+profile_label = st.session_state.setdefault('profile_label', f"rerun-{uuid.uuid4().hex[:8]}")
+start_run(
+    profile_label,
+    enabled=st.session_state.get('profiling', PROFILE_DEFAULT),
+    memory=st.session_state.get('profiling_memory', False)
 )
 
-uploaded_file = None
-if data_source == "Kendi dosyamı yükle":
-    uploaded_file = st.file_uploader(
-        "RFM analizi verilerinizi yükleyin (CSV formatında)",
-        type=['csv'],
-        help="CSV dosyanızda CustomerID, Recency, Frequency, Monetary, RFMScore, CustomerLevel sütunları bulunmalıdır."
+# st.stop() ve yeniden çalıştırma istekleri betiği yarıda keser; ölçüm yine de
+# kapatılır, aksi halde bellek ölçümü (tracemalloc) süreç boyunca açık kalır
+try:
+    # Başlık ve açıklama
+    st.title("🛍️ RFM Analizi Dashboard")
+    st.markdown("---")
+
+    # Dosya yükleme veya varsayılan dosya kullanma
+    st.subheader("📁 Veri Kaynağı Seçimi")
+    data_source = st.radio(
+        "Veri kaynağınızı seçin:",
+        ["Varsayılan dosyayı kullan (data/OnlineRetail_RFMSCORE.csv)", "Kendi dosyamı yükle",
+         "Ham işlem verisinden RFM hesapla", "Birden çok dosya / klasör kullan"]
     )
-else:
-    # Varsayılan dosya yolu
-    default_file = "data/OnlineRetail_RFMSCORE.csv"
 
-if uploaded_file is not None or data_source == "Varsayılan dosyayı kullan (data/OnlineRetail_RFMSCORE.csv)":
-    # Veriyi yükle
-    try:
-        if data_source == "Varsayılan dosyayı kullan (data/OnlineRetail_RFMSCORE.csv)":
-            try:
-                df = pd.read_csv("data/OnlineRetail_RFMSCORE.csv")
-                st.success("✅ OnlineRetail_RFMSCORE.csv dosyası başarıyla yüklendi!")
-            except FileNotFoundError:
-                st.error("❌ OnlineRetail_RFMSCORE.csv dosyası bulunamadı! Lütfen dosyanın aynı klasörde olduğundan emin olun.")
-                st.info("💡 Alternatif olarak 'Kendi dosyamı yükle' seçeneğini kullanabilirsiniz.")
-                st.stop()
-        else:
-            df = pd.read_csv(uploaded_file)
-            st.success("✅ Dosya başarıyla yüklendi!")
-        
-        # Gerekli sütunların varlığını kontrol et
-        required_columns = ['CustomerID', 'Recency', 'Frequency', 'Monetary', 'RFMScore', 'CustomerLevel']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            st.error(f"Eksik sütunlar: {', '.join(missing_columns)}")
-            st.stop()
-        
-        # Sidebar - Filtreler
-        st.sidebar.header("📋 Filtreler")
-        
-        # Müşteri seviyesi filtresi
-        customer_levels = st.sidebar.multiselect(
-            "Müşteri Seviyesi Seçin:",
-            options=df['CustomerLevel'].unique(),
-            default=df['CustomerLevel'].unique()
+    uploaded_file = None
+    partition_sources = {}
+    if data_source == "Kendi dosyamı yükle":
+        uploaded_file = st.file_uploader(
+            "RFM analizi verilerinizi yükleyin (CSV formatında)",
+            type=['csv'],
+            help="CSV dosyanızda CustomerID, Recency, Frequency, Monetary, RFMScore, CustomerLevel sütunları bulunmalıdır."
         )
-        
-        # RFM Score aralığı
-        rfm_range = st.sidebar.slider(
-            "RFM Score Aralığı:",
-            min_value=int(df['RFMScore'].min()),
-            max_value=int(df['RFMScore'].max()),
-            value=(int(df['RFMScore'].min()), int(df['RFMScore'].max()))
+    elif data_source == "Ham işlem verisinden RFM hesapla":
+        uploaded_file = st.file_uploader(
+            "Fatura satırlarınızı yükleyin (CSV formatında)",
+            type=['csv'],
+            help="CSV dosyanızda InvoiceNo, CustomerID, InvoiceDate, Quantity, UnitPrice sütunları bulunmalıdır."
         )
-        
-        # Veriyi filtrele
-        filtered_df = df[
-            (df['CustomerLevel'].isin(customer_levels)) &
-            (df['RFMScore'] >= rfm_range[0]) &
-            (df['RFMScore'] <= rfm_range[1])
-        ]
-        
-        # Ana metrikler
-        col1, col2, col3, col4 = st.columns(4)
-        
-        with col1:
-            st.metric(
-                label="Toplam Müşteri",
-                value=f"{len(filtered_df):,}",
-                delta=f"{len(filtered_df) - len(df):,}" if len(filtered_df) != len(df) else None
-            )
-        
-        with col2:
-            st.metric(
-                label="Ortalama RFM Score",
-                value=f"{filtered_df['RFMScore'].mean():.1f}",
-                delta=f"{filtered_df['RFMScore'].mean() - df['RFMScore'].mean():.1f}" if len(filtered_df) != len(df) else None
-            )
-        
-        with col3:
-            st.metric(
-                label="Ortalama Monetary Değer",
-                value=f"${filtered_df['Monetary'].mean():,.2f}",
-                delta=f"${filtered_df['Monetary'].mean() - df['Monetary'].mean():,.2f}" if len(filtered_df) != len(df) else None
+        analyze_date = st.date_input("Analiz Tarihi:", value=pd.Timestamp.today())
+    elif data_source == "Birden çok dosya / klasör kullan":
+        partition_pattern = st.text_input(
+            "Klasör veya glob deseni:",
+            placeholder="exports/ veya exports/*/2011-*.csv",
+            help="Klasördeki tüm CSV dosyaları alt klasörleriyle birlikte okunur. Her dosya bir bölümdür."
+        )
+        uploaded_files = st.file_uploader(
+            "...veya birden çok CSV dosyası yükleyin",
+            type=['csv'],
+            accept_multiple_files=True
+        )
+        partition_sources = discover_partitions(uploaded_files or partition_pattern)
+        if partition_pattern and not uploaded_files and not partition_sources:
+            st.warning("Bu desenle eşleşen CSV dosyası bulunamadı.")
+    else:
+        # Varsayılan dosya yolu
+        default_file = "data/OnlineRetail_RFMSCORE.csv"
+
+    if uploaded_file is not None or partition_sources or data_source == "Varsayılan dosyayı kullan (data/OnlineRetail_RFMSCORE.csv)":
+        # Veriyi yükle
+        try:
+            if data_source == "Varsayılan dosyayı kullan (data/OnlineRetail_RFMSCORE.csv)":
+                try:
+                    # Dağıtımda hazırlanan paket varsa veri ve ilk grafikler ondan gelir.
+                    # Grafik süreç havuzu arka planda ısıtılır
+                    bundle = hydrate("data/OnlineRetail_RFMSCORE.csv")
+                    df = open_rfm_table("data/OnlineRetail_RFMSCORE.csv")
+                    if bundle is not None:
+                        bundle.install(df)
+                    st.success("✅ OnlineRetail_RFMSCORE.csv dosyası başarıyla yüklendi!")
+                except FileNotFoundError:
+                    st.error("❌ OnlineRetail_RFMSCORE.csv dosyası bulunamadı! Lütfen dosyanın aynı klasörde olduğundan emin olun.")
+                    st.info("💡 Alternatif olarak 'Kendi dosyamı yükle' seçeneğini kullanabilirsiniz.")
+                    st.stop()
+            elif data_source == "Ham işlem verisinden RFM hesapla":
+                with st.spinner("RFM skorları hesaplanıyor..."):
+                    df = load_rfm_from_transactions(uploaded_file, analyze_date=analyze_date)
+                st.success(f"✅ {len(df):,} müşteri için RFM skorları hesaplandı!")
+            elif partition_sources:
+                # Seçilmeyen bölümlerin dosyaları hiç okunmaz
+                partitions = st.sidebar.multiselect(
+                    "🗂️ Bölümler:",
+                    options=list(partition_sources),
+                    default=list(partition_sources)
+                )
+                if not partitions:
+                    st.warning("En az bir bölüm seçin.")
+                    st.stop()
+                with st.spinner(f"{len(partitions)} dosya okunuyor..."):
+                    df = load_partitions({name: partition_sources[name] for name in partitions})
+                st.success(f"✅ {len(partitions)} dosyadan {len(df):,} müşteri yüklendi!")
+            else:
+                df = open_rfm_table(uploaded_file)
+                st.success("✅ Dosya başarıyla yüklendi!")
+            
+            # Veri seti oturum boyunca kiralanır; aynı dosyayı açan oturumlar tek kopyayı paylaşır
+            st.session_state.setdefault('dataset_lease', DatasetLease()).hold(df)
+            
+            # Gerekli sütunların varlığını kontrol et
+            missing = missing_columns(df.columns)
+            
+            if missing:
+                st.error(f"Eksik sütunlar: {', '.join(missing)}")
+                st.stop()
+            
+            # Sidebar - Filtreler
+            st.sidebar.header("📋 Filtreler")
+            
+            # Segmentasyon: dosyadaki CustomerLevel ya da RFM değerlerinden k-means kümeleri
+            segmentation = st.sidebar.radio(
+                "Segmentasyon:",
+                ["CustomerLevel (CSV)", "K-means kümeleri"],
+                help="Kümeler Recency, Frequency ve Monetary değerlerinden öğrenilir; Küme 1 en değerli segmenttir."
             )
-        
-        with col4:
-            st.metric(
-                label="Ortalama Frequency",
-                value=f"{filtered_df['Frequency'].mean():.1f}",
-                delta=f"{filtered_df['Frequency'].mean() - df['Frequency'].mean():.1f}" if len(filtered_df) != len(df) else None
+            # Anlık görüntüler her zaman dosyadaki seviyelerle kaydedilir
+            source_df = df
+            if segmentation == "K-means kümeleri":
+                n_clusters = st.sidebar.slider("Küme sayısı:", min_value=2, max_value=9, value=4)
+                if hasattr(df, 'dataset'):
+                    st.sidebar.caption("Diskteki büyük veri setlerinde kümeler `rfm segments` komutuyla hesaplanır.")
+                else:
+                    with st.spinner("Müşteriler kümeleniyor..."):
+                        df = segment_view(df, n_clusters)
+            
+            # Filtre indeksi veri seti başına bir kez kurulur. Büyük veri setleri
+            # diskte kalır; filtreler ve özetler Parquet okuyucusunda hesaplanır
+            filter_index, aggregate_cache, fingerprint = table_backend(df)
+            
+            # Müşteri seviyesi filtresi
+            customer_levels = st.sidebar.multiselect(
+                "Müşteri Seviyesi Seçin:",
+                options=filter_index.levels,
+                default=filter_index.levels
             )
-        
-        st.markdown("---")
-        
-        # Görselleştirmeler
-        tab1, tab2, tab3, tab4 = st.tabs(["📊 Genel Bakış", "🎯 RFM Analizi", "👥 Müşteri Segmentleri", "📈 Detaylı Analizler"])
-        
-        with tab1:
-            col1, col2 = st.columns(2)
             
-            with col1:
-                # Müşteri seviyesi dağılımı - Pie Chart
-                st.subheader("Müşteri Seviyesi Dağılımı")
-                level_counts = filtered_df['CustomerLevel'].value_counts()
-                
-                fig, ax = plt.subplots(figsize=(8, 6))
-                colors = sns.color_palette("husl", len(level_counts))
-                wedges, texts, autotexts = ax.pie(level_counts.values, labels=level_counts.index, 
-                                                 autopct='%1.1f%%', colors=colors, startangle=90)
-                ax.set_title("Müşteri Seviyesi Dağılımı", fontsize=14, fontweight='bold')
-                plt.tight_layout()
-                st.pyplot(fig)
-                plt.close()
+            # RFM Score aralığı
+            rfm_range = st.sidebar.slider(
+                "RFM Score Aralığı:",
+                min_value=int(filter_index.score_min),
+                max_value=int(filter_index.score_max),
+                value=(int(filter_index.score_min), int(filter_index.score_max))
+            )
             
-            with col2:
-                # RFM Score dağılımı - Histogram
-                st.subheader("RFM Score Dağılımı")
-                fig, ax = plt.subplots(figsize=(8, 6))
-                ax.hist(filtered_df['RFMScore'], bins=20, alpha=0.7, color='skyblue', edgecolor='black')
-                ax.set_xlabel('RFM Score')
-                ax.set_ylabel('Müşteri Sayısı')
-                ax.set_title('RFM Score Dağılımı', fontsize=14, fontweight='bold')
-                ax.grid(True, alpha=0.3)
-                plt.tight_layout()
-                st.pyplot(fig)
-                plt.close()
-            
-            # RFM bileşenlerinin korelasyon matrisi
-            st.subheader("RFM Bileşenleri Korelasyon Matrisi")
-            corr_data = filtered_df[['Recency', 'Frequency', 'Monetary', 'RFMScore']].corr()
-            
-            fig, ax = plt.subplots(figsize=(10, 8))
-            mask = np.triu(np.ones_like(corr_data, dtype=bool))
-            sns.heatmap(corr_data, mask=mask, annot=True, cmap='RdBu_r', center=0,
-                       square=True, linewidths=.5, ax=ax)
-            ax.set_title('RFM Bileşenleri Korelasyon Matrisi', fontsize=14, fontweight='bold')
-            plt.tight_layout()
-            st.pyplot(fig)
-            plt.close()
-        
-        with tab2:
-            col1, col2 = st.columns(2)
+            # Sürükleme sırasında gelen ara değerler birleştirilir; yalnızca son değer hesaplanır
+            filter_key = (fingerprint, tuple(customer_levels), tuple(rfm_range))
+            st.session_state.setdefault('filter_debouncer', Debouncer()).settle(filter_key)
             
-            with col1:
-                # 3D Scatter Plot - RFM
-                st.subheader("3D RFM Analizi")
-                fig = plt.figure(figsize=(10, 8))
-                ax = fig.add_subplot(111, projection='3d')
-                
-                # Müşteri seviyelerine göre renklendirme
-                unique_levels = filtered_df['CustomerLevel'].unique()
-                colors = sns.color_palette("husl", len(unique_levels))
-                color_map = dict(zip(unique_levels, colors))
-                
-                for level in unique_levels:
-                    level_data = filtered_df[filtered_df['CustomerLevel'] == level]
-                    ax.scatter(level_data['Recency'], level_data['Frequency'], 
-                              level_data['Monetary'], c=[color_map[level]], 
-                              label=level, alpha=0.6, s=50)
-                
-                ax.set_xlabel('Recency (Gün)')
-                ax.set_ylabel('Frequency (Adet)')
-                ax.set_zlabel('Monetary ($)')
-                ax.set_title('3D RFM Analizi', fontsize=14, fontweight='bold')
-                ax.legend()
-                plt.tight_layout()
-                st.pyplot(fig)
-                plt.close()
+            # Veriyi filtrele
+            selection = filter_index.query(customer_levels, rfm_range[0], rfm_range[1])
+            overall = filter_index.all()
+            aggregates = aggregate_cache.get(selection)
+            is_filtered = len(selection) != len(df)
             
-            with col2:
-                # RFM Score vs Monetary
-                st.subheader("RFM Score vs Monetary Değer")
-                fig, ax = plt.subplots(figsize=(10, 8))
-                
-                for level in unique_levels:
-                    level_data = filtered_df[filtered_df['CustomerLevel'] == level]
-                    ax.scatter(level_data['RFMScore'], level_data['Monetary'], 
-                              label=level, alpha=0.6, s=60)
-                
-                # Trend line
-                z = np.polyfit(filtered_df['RFMScore'], filtered_df['Monetary'], 1)
-                p = np.poly1d(z)
-                ax.plot(filtered_df['RFMScore'].sort_values(), 
-                       p(filtered_df['RFMScore'].sort_values()), 
-                       "r--", alpha=0.8, linewidth=2)
-                
-                ax.set_xlabel('RFM Score')
-                ax.set_ylabel('Monetary Değer ($)')
-                ax.set_title('RFM Score vs Monetary Değer', fontsize=14, fontweight='bold')
-                ax.legend()
-                ax.grid(True, alpha=0.3)
-                plt.tight_layout()
-                st.pyplot(fig)
-                plt.close()
+            # Bölümler bağlı oldukları girdilerle önbelleğe alınır; girdiler değişmedikçe yeniden hesaplanmaz
+            section_key = (fingerprint, aggregates.key)
             
-            # RFM bileşenlerinin müşteri seviyesine göre box plot'u
-            st.subheader("Müşteri Seviyesine Göre RFM Bileşenleri")
+            def segments_section():
+                # Özet rapor da bu sonuçtan üretilir; ikisi aynı girdilere bağlıdır
+                return cached_section('segments', section_key, lambda: segment_table(selection))
             
-            col1, col2, col3 = st.columns(3)
+            # Ana metrikler
+            col1, col2, col3, col4 = st.columns(4)
             
             with col1:
-                fig, ax = plt.subplots(figsize=(8, 6))
-                sns.boxplot(data=filtered_df, x='CustomerLevel', y='Recency', ax=ax)
-                ax.set_title('Recency Dağılımı', fontsize=12, fontweight='bold')
-                ax.tick_params(axis='x', rotation=45)
-                plt.tight_layout()
-                st.pyplot(fig)
-                plt.close()
+                st.metric(
+                    label="Toplam Müşteri",
+                    value=f"{len(selection):,}",
+                    delta=f"{len(selection) - len(df):,}" if is_filtered else None
+                )
             
             with col2:
-                fig, ax = plt.subplots(figsize=(8, 6))
-                sns.boxplot(data=filtered_df, x='CustomerLevel', y='Frequency', ax=ax)
-                ax.set_title('Frequency Dağılımı', fontsize=12, fontweight='bold')
-                ax.tick_params(axis='x', rotation=45)
-                plt.tight_layout()
-                st.pyplot(fig)
-                plt.close()
+                st.metric(
+                    label="Ortalama RFM Score",
+                    value=f"{selection.mean('RFMScore'):.1f}",
+                    delta=f"{selection.mean('RFMScore') - overall.mean('RFMScore'):.1f}" if is_filtered else None
+                )
             
             with col3:
-                fig, ax = plt.subplots(figsize=(8, 6))
-                sns.boxplot(data=filtered_df, x='CustomerLevel', y='Monetary', ax=ax)
-                ax.set_title('Monetary Dağılımı', fontsize=12, fontweight='bold')
-                ax.tick_params(axis='x', rotation=45)
-                plt.tight_layout()
-                st.pyplot(fig)
-                plt.close()
-        
-        with tab3:
-            # Müşteri segmentlerinin detaylı analizi
-            segment_analysis = filtered_df.groupby('CustomerLevel').agg({
-                'CustomerID': 'count',
-                'Recency': 'mean',
-                'Frequency': 'mean',
-                'Monetary': 'mean',
-                'RFMScore': 'mean'
-            }).round(2)
-            segment_analysis.rename(columns={'CustomerID': 'Müşteri Sayısı'}, inplace=True)
-            
-            st.subheader("Müşteri Segmentleri Detaylı Analizi")
-            st.dataframe(segment_analysis, use_container_width=True)
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Segmentlere göre gelir dağılımı
-                st.subheader("Segmentlere Göre Toplam Gelir")
-                revenue_by_segment = filtered_df.groupby('CustomerLevel')['Monetary'].sum()
+                st.metric(
+                    label="Ortalama Monetary Değer",
+                    value=f"${selection.mean('Monetary'):,.2f}",
+                    delta=f"${selection.mean('Monetary') - overall.mean('Monetary'):,.2f}" if is_filtered else None
+                )
+            
+            with col4:
+                st.metric(
+                    label="Ortalama Frequency",
+                    value=f"{selection.mean('Frequency'):.1f}",
+                    delta=f"{selection.mean('Frequency') - overall.mean('Frequency'):.1f}" if is_filtered else None
+                )
+            
+            st.markdown("---")
+            
+            # Görselleştirmeler
+            # Grafikler arka planda paralel çizilir; ilk sekme hemen beklenir,
+            # diğer sekmeler sayfanın geri kalanı gönderildikten sonra doldurulur.
+            # Bu oturumun önceki filtre durumu için kuyrukta bekleyen çizimler iptal edilir
+            chart_futures = get_renderer().submit_all(fingerprint, aggregates, group=profile_label)
+            pending_charts = []
+            
+            def fill_chart(chart_id, placeholder, future):
+                with span(f"chart.{chart_id}.show"):
+                    try:
+                        image = future.result()
+                    except CancelledError:
+                        # Bu oturumun daha yeni bir çalışması çizimi iptal etti;
+                        # sayfa zaten yeni filtreyle yeniden çiziliyor
+                        return
+                    placeholder.image(image, use_column_width=True)
+            
+            def show_chart(chart_id, wait=False):
+                future = chart_futures[chart_id]
+                placeholder = st.empty()
+                if wait or future.done():
+                    fill_chart(chart_id, placeholder, future)
+                else:
+                    placeholder.caption("⏳ Grafik hazırlanıyor...")
+                    pending_charts.append((chart_id, placeholder, future))
+            
+            tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Genel Bakış", "🎯 RFM Analizi", "👥 Müşteri Segmentleri", "📈 Detaylı Analizler", "🕒 Zaman İçinde"])
+            
+            with tab1, span('tab.overview'):
+                col1, col2 = st.columns(2)
                 
-                fig, ax = plt.subplots(figsize=(10, 6))
-                bars = ax.bar(revenue_by_segment.index, revenue_by_segment.values, 
-                             color=sns.color_palette("husl", len(revenue_by_segment)))
-                ax.set_xlabel('Müşteri Seviyesi')
-                ax.set_ylabel('Toplam Gelir ($)')
-                ax.set_title('Segmentlere Göre Toplam Gelir', fontsize=14, fontweight='bold')
+                with col1:
+                    # Müşteri seviyesi dağılımı - Pie Chart
+                    st.subheader("Müşteri Seviyesi Dağılımı")
+                    show_chart('pie', wait=True)
                 
-                # Bar değerlerini göster
-                for bar in bars:
-                    height = bar.get_height()
-                    ax.text(bar.get_x() + bar.get_width()/2., height,
-                           f'${height/1000:.1f}K', ha='center', va='bottom')
+                with col2:
+                    # RFM Score dağılımı - Histogram
+                    st.subheader("RFM Score Dağılımı")
+                    show_chart('rfm_hist', wait=True)
                 
-                plt.xticks(rotation=45)
-                plt.tight_layout()
-                st.pyplot(fig)
-                plt.close()
+                # RFM bileşenlerinin korelasyon matrisi
+                st.subheader("RFM Bileşenleri Korelasyon Matrisi")
+                show_chart('corr_heatmap', wait=True)
             
-            with col2:
-                # Segmentlere göre ortalama RFM score
-                st.subheader("Segmentlere Göre Ortalama RFM Score")
-                avg_rfm_by_segment = filtered_df.groupby('CustomerLevel')['RFMScore'].mean()
+            with tab2, span('tab.rfm'):
+                col1, col2 = st.columns(2)
                 
-                fig, ax = plt.subplots(figsize=(10, 6))
-                bars = ax.bar(avg_rfm_by_segment.index, avg_rfm_by_segment.values,
-                             color=sns.color_palette("viridis", len(avg_rfm_by_segment)))
-                ax.set_xlabel('Müşteri Seviyesi')
-                ax.set_ylabel('Ortalama RFM Score')
-                ax.set_title('Segmentlere Göre Ortalama RFM Score', fontsize=14, fontweight='bold')
+                with col1:
+                    # 3D Scatter Plot - RFM
+                    st.subheader("3D RFM Analizi")
+                    show_chart('scatter_3d')
                 
-                # Bar değerlerini göster
-                for bar in bars:
-                    height = bar.get_height()
-                    ax.text(bar.get_x() + bar.get_width()/2., height,
-                           f'{height:.1f}', ha='center', va='bottom')
+                with col2:
+                    # RFM Score vs Monetary
+                    st.subheader("RFM Score vs Monetary Değer")
+                    show_chart('score_vs_monetary')
                 
-                plt.xticks(rotation=45)
-                plt.tight_layout()
-                st.pyplot(fig)
-                plt.close()
-            
-            # Segmentlere göre radar chart
-            st.subheader("Müşteri Segmentleri Radar Analizi")
-            
-            # Her segment için normalize edilmiş değerler
-            segment_radar = filtered_df.groupby('CustomerLevel').agg({
-                'Recency': 'mean',
-                'Frequency': 'mean',
-                'Monetary': 'mean',
-                'RFMScore': 'mean'
-            })
-            
-            # Normalize et (0-1 arası)
-            for col in segment_radar.columns:
-                segment_radar[col] = (segment_radar[col] - segment_radar[col].min()) / (segment_radar[col].max() - segment_radar[col].min())
-            
-            # Radar chart
-            categories = ['Recency (Ters)', 'Frequency', 'Monetary', 'RFM Score']
-            fig, ax = plt.subplots(figsize=(10, 10), subplot_kw=dict(projection='polar'))
-            
-            angles = np.linspace(0, 2*np.pi, len(categories), endpoint=False).tolist()
-            angles += angles[:1]  # Döngüyü tamamla
-            
-            colors = sns.color_palette("husl", len(segment_radar))
-            
-            for i, (segment, color) in enumerate(zip(segment_radar.index, colors)):
-                values = [
-                    1 - segment_radar.loc[segment, 'Recency'],  # Recency için ters
-                    segment_radar.loc[segment, 'Frequency'],
-                    segment_radar.loc[segment, 'Monetary'],
-                    segment_radar.loc[segment, 'RFMScore']
-                ]
-                values += values[:1]  # Döngüyü tamamla
+                # RFM bileşenlerinin müşteri seviyesine göre box plot'u
+                st.subheader("Müşteri Seviyesine Göre RFM Bileşenleri")
                 
-                ax.plot(angles, values, 'o-', linewidth=2, label=segment, color=color)
-                ax.fill(angles, values, alpha=0.25, color=color)
-            
-            ax.set_xticks(angles[:-1])
-            ax.set_xticklabels(categories)
-            ax.set_ylim(0, 1)
-            ax.set_title('Müşteri Segmentleri Radar Analizi', fontsize=14, fontweight='bold', pad=20)
-            ax.legend(loc='upper right', bbox_to_anchor=(1.2, 1.0))
-            ax.grid(True)
-            
-            plt.tight_layout()
-            st.pyplot(fig)
-            plt.close()
-        
-        with tab4:
-            st.subheader("Detaylı İstatistiksel Analizler")
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # RFM Score dağılımının istatistikleri
-                st.write("**RFM Score İstatistikleri:**")
-                rfm_stats = filtered_df['RFMScore'].describe()
-                st.dataframe(rfm_stats.to_frame().T, use_container_width=True)
+                col1, col2, col3 = st.columns(3)
                 
-                # Quantile analizi
-                st.write("**RFM Score Quantile Analizi:**")
-                quantiles = [0.25, 0.5, 0.75, 0.9, 0.95]
-                quantile_values = filtered_df['RFMScore'].quantile(quantiles)
-                quantile_df = pd.DataFrame({
-                    'Quantile': [f"{q*100}%" for q in quantiles],
-                    'RFM Score': quantile_values.values
-                })
-                st.dataframe(quantile_df, use_container_width=True)
+                with col1:
+                    show_chart('box_recency')
+                
+                with col2:
+                    show_chart('box_frequency')
+                
+                with col3:
+                    show_chart('box_monetary')
             
-            with col2:
-                # Monetary değer dağılımı
-                st.subheader("Monetary Değer Dağılımı")
-                fig, ax = plt.subplots(figsize=(8, 6))
+            with tab3, span('tab.segments'):
+                # Müşteri segmentlerinin detaylı analizi
+                segment_analysis = segments_section()
                 
-                # Log scale için pozitif değerleri filtrele
-                positive_monetary = filtered_df[filtered_df['Monetary'] > 0]['Monetary']
-                ax.hist(np.log10(positive_monetary), bins=30, alpha=0.7, color='green', edgecolor='black')
-                ax.set_xlabel('Log10(Monetary Değer)')
-                ax.set_ylabel('Müşteri Sayısı')
-                ax.set_title('Monetary Değer Dağılımı (Log Scale)', fontsize=12, fontweight='bold')
-                ax.grid(True, alpha=0.3)
-                plt.tight_layout()
-                st.pyplot(fig)
-                plt.close()
-            
-            # Top müşteriler
-            st.subheader("En Değerli Müşteriler (RFM Score'a Göre)")
-            top_customers = filtered_df.nlargest(10, 'RFMScore')[
-                ['CustomerID', 'Recency', 'Frequency', 'Monetary', 'RFMScore', 'CustomerLevel']
-            ]
-            st.dataframe(top_customers, use_container_width=True)
-            
-            # Heatmap - RFM Score vs Customer Level
-            st.subheader("RFM Score ve Müşteri Seviyesi Heatmap")
-            
-            # RFM Score'u kategorilere ayır
-            filtered_df['RFM_Category'] = pd.cut(
-                filtered_df['RFMScore'], 
-                bins=5, 
-                labels=['Düşük', 'Düşük-Orta', 'Orta', 'Orta-Yüksek', 'Yüksek']
-            )
+                st.subheader("Müşteri Segmentleri Detaylı Analizi")
+                st.dataframe(segment_analysis, use_container_width=True)
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    # Segmentlere göre gelir dağılımı
+                    st.subheader("Segmentlere Göre Toplam Gelir")
+                    show_chart('revenue_bars')
+                
+                with col2:
+                    # Segmentlere göre ortalama RFM score
+                    st.subheader("Segmentlere Göre Ortalama RFM Score")
+                    show_chart('avg_rfm_bars')
+                
+                # Segmentlere göre radar chart
+                st.subheader("Müşteri Segmentleri Radar Analizi")
+                show_chart('radar')
             
-            heatmap_data = pd.crosstab(filtered_df['CustomerLevel'], filtered_df['RFM_Category'])
-            
-            fig, ax = plt.subplots(figsize=(12, 8))
-            sns.heatmap(heatmap_data, annot=True, fmt='d', cmap='Blues', ax=ax)
-            ax.set_title('Müşteri Seviyesi vs RFM Kategorisi', fontsize=14, fontweight='bold')
-            ax.set_xlabel('RFM Kategorisi')
-            ax.set_ylabel('Müşteri Seviyesi')
-            plt.tight_layout()
-            st.pyplot(fig)
-            plt.close()
-            
-            # Violin plot - RFM Score dağılımı
-            st.subheader("Müşteri Seviyelerine Göre RFM Score Dağılımı")
-            fig, ax = plt.subplots(figsize=(12, 6))
-            sns.violinplot(data=filtered_df, x='CustomerLevel', y='RFMScore', ax=ax)
-            ax.set_title('Müşteri Seviyelerine Göre RFM Score Dağılımı', fontsize=14, fontweight='bold')
-            ax.tick_params(axis='x', rotation=45)
-            plt.tight_layout()
-            st.pyplot(fig)
-            plt.close()
-        
-        # İndirilecek özet rapor
-        st.markdown("---")
-        st.subheader("📄 Özet Rapor")
-        
-        summary_report = f"""
-        ## RFM Analizi Özet Raporu
-        
-        **Genel Bilgiler:**
-        - Toplam Müşteri Sayısı: {len(filtered_df):,}
-        - Ortalama RFM Score: {filtered_df['RFMScore'].mean():.2f}
-        - Ortalama Monetary Değer: ${filtered_df['Monetary'].mean():,.2f}
-        - Ortalama Frequency: {filtered_df['Frequency'].mean():.2f}
-        - Ortalama Recency: {filtered_df['Recency'].mean():.1f} gün
-        
-        **Müşteri Segmentleri:**
-        {segment_analysis.to_string()}
-        
-        **Öneriler:**
-        - **Top Müşteriler**: RFM score'u yüksek müşterilere özel kampanyalar düzenleyin
-        - **Middle Müşteriler**: Frequency artırıcı aktiviteler planlayın
-        - **Low Müşteriler**: Reaktivasyon kampanyaları ile geri kazanmaya odaklanın
-        """
-        
-        st.markdown(summary_report)
+            with tab4, span('tab.details'):
+                st.subheader("Detaylı İstatistiksel Analizler")
+                
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    # RFM Score dağılımının istatistikleri
+                    st.write("**RFM Score İstatistikleri:**")
+                    rfm_stats = cached_section('stats', section_key, lambda: aggregates.describe('RFMScore'))
+                    st.dataframe(rfm_stats.to_frame().T, use_container_width=True)
+                    
+                    # Quantile analizi
+                    st.write("**RFM Score Quantile Analizi:**")
+                    quantiles = [0.25, 0.5, 0.75, 0.9, 0.95]
+                    quantile_df = cached_section('quantiles', section_key, lambda: pd.DataFrame({
+                        'Quantile': [f"{q*100}%" for q in quantiles],
+                        'RFM Score': aggregates.quantiles('RFMScore', quantiles).values
+                    }))
+                    st.dataframe(quantile_df, use_container_width=True)
+                
+                with col2:
+                    # Monetary değer dağılımı
+                    st.subheader("Monetary Değer Dağılımı")
+                    show_chart('monetary_log_hist')
+                
+                # Top müşteriler - indeks veri seti başına bir kez kurulur, sayfalar filtreden bağımsız hızlıdır
+                st.subheader("En Değerli Müşteriler")
+                customers = customer_index(filter_index)
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    rank_column = st.selectbox("Sıralama ölçütü:", RANK_COLUMNS)
+                with col2:
+                    page_size = st.selectbox("Sayfa başına müşteri:", [10, 50, 100, 500])
+                with col3:
+                    page_count = max(1, -(-len(selection) // page_size))
+                    page = st.number_input(f"Sayfa (toplam {page_count:,}):", min_value=1, max_value=page_count, value=1)
+                top_page = cached_section(
+                    'top', section_key + (rank_column, page, page_size),
+                    lambda: customers.top(selection, rank_column, (page - 1) * page_size, page_size)
+                )
+                st.dataframe(top_page[TOP_COLUMNS], use_container_width=True)
+                
+                # Müşteri arama
+                customer_query = st.text_input("🔎 Müşteri ara (CustomerID):")
+                if customer_query:
+                    try:
+                        matches = customers.lookup(int(customer_query), selection)
+                    except ValueError:
+                        st.warning("CustomerID sayı olmalıdır.")
+                    else:
+                        if matches.empty:
+                            st.info(f"{customer_query} numaralı müşteri bulunamadı.")
+                        else:
+                            st.dataframe(
+                                matches[TOP_COLUMNS + ['LevelRank', 'Selected']].rename(
+                                    columns={'LevelRank': 'Seviyedeki Sırası', 'Selected': 'Filtrede'}
+                                ),
+                                use_container_width=True
+                            )
+                
+                # Heatmap - RFM Score vs Customer Level
+                st.subheader("RFM Score ve Müşteri Seviyesi Heatmap")
+                show_chart('crosstab_heatmap')
+                
+                # Violin plot - RFM Score dağılımı
+                st.subheader("Müşteri Seviyelerine Göre RFM Score Dağılımı")
+                show_chart('violin')
+            
+            with tab5, span('tab.history'):
+                # Anlık görüntüler AnalyzeDate ile kaydedilir; yalnızca değişen müşteriler saklanır
+                snapshot_history = history_store()
+                st.subheader("Anlık Görüntü Geçmişi")
+                if 'AnalyzeDate' in df.columns:
+                    if st.button("📸 Bu veriyi anlık görüntü olarak kaydet"):
+                        try:
+                            snapshot = snapshot_history.append(source_df)
+                            st.success(
+                                f"✅ {snapshot['analyze_date']} görüntüsü kaydedildi: {snapshot['changed']:,} değişen, "
+                                f"{snapshot['added']:,} yeni, {snapshot['removed']:,} ayrılan müşteri"
+                            )
+                        except ValueError as e:
+                            st.warning(str(e))
+                    if source_df is not df:
+                        st.caption("Görüntüye k-means kümeleri değil, dosyadaki CustomerLevel kaydedilir.")
+                else:
+                    st.caption("Anlık görüntü kaydetmek için veride AnalyzeDate sütunu olmalıdır.")
+                
+                if len(snapshot_history) == 0:
+                    st.info("Henüz kayıtlı görüntü yok. Farklı analiz tarihli RFM tablolarını sırayla kaydedin.")
+                else:
+                    # Geçmiş bölümleri filtrelere değil yalnızca kayıtlı görüntülere bağlıdır
+                    history_key = (snapshot_history.root, snapshot_history.version())
+                    st.dataframe(snapshot_history.snapshots().rename(columns={
+                        'analyze_date': 'Analiz Tarihi', 'rows': 'Müşteri', 'changed': 'Değişen',
+                        'added': 'Yeni', 'removed': 'Ayrılan'
+                    }), use_container_width=True)
+                    
+                    st.subheader("Segment Dağılımının Değişimi")
+                    st.line_chart(snapshot_history.level_counts())
+                    
+                    snapshot_ids = {
+                        f"{row.analyze_date:%Y-%m-%d}": row.Index for row in snapshot_history.snapshots().itertuples()
+                    }
+                    snapshot_labels = list(snapshot_ids)
+                    if len(snapshot_history) >= 2:
+                        st.subheader("Segment Geçişleri")
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            start = snapshot_ids[st.selectbox("Başlangıç:", snapshot_labels[:-1])]
+                        with col2:
+                            end = snapshot_ids[st.selectbox(
+                                "Bitiş:", snapshot_labels[start + 1:], index=len(snapshot_history) - start - 2
+                            )]
+                        st.dataframe(cached_section(
+                            'history.transitions', history_key + (start, end),
+                            lambda: snapshot_history.transitions(start, end)
+                        ), use_container_width=True)
+                        
+                        path_snapshots = list(range(start, end + 1))
+                        if len(path_snapshots) > 4:
+                            path_snapshots = [start, end]
+                        st.markdown("**En Sık Segment Yolları:**")
+                        st.dataframe(cached_section(
+                            'history.paths', history_key + tuple(path_snapshots),
+                            lambda: snapshot_history.migration_paths(path_snapshots).head(15).rename('Müşteri Sayısı')
+                        ), use_container_width=True)
+                    
+                    st.subheader("Kohort Trendleri (Son Fatura Ayına Göre)")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        cohort_level = st.selectbox("Seviye:", ["Tümü"] + list(snapshot_history.level_counts().columns))
+                    with col2:
+                        cohort_value = st.radio("Değer:", ["Müşteri Sayısı", "Toplam Monetary"], horizontal=True)
+                    st.line_chart(cached_section(
+                        'history.cohorts', history_key + (cohort_level, cohort_value),
+                        lambda: snapshot_history.cohort_trend(
+                            None if cohort_level == "Tümü" else cohort_level,
+                            'count' if cohort_value == "Müşteri Sayısı" else 'Monetary'
+                        )
+                    ))
+            
+            # İndirilecek özet rapor
+            st.markdown("---")
+            st.subheader("📄 Özet Rapor")
+            
+            with span('report.summary'):
+                st.markdown(cached_section(
+                    'summary', section_key, lambda: summary_report(aggregates, segments_section())
+                ))
+            
+            # İndirme - dosya yalnızca istendiğinde ve parça parça üretilir
+            export_labels = {EXPORT_FORMATS[fmt][2]: fmt for fmt in available_formats()}
+            export_format = export_labels[st.selectbox(
+                "Dışa aktarım formatı:",
+                options=list(export_labels)
+            )]
+            # Streamlit 1.28'de download_button veriyi belleğe okur ve oturumun medya
+            # deposunda tutar. Düğme bu yüzden yalnızca "Hazırla"ya basılan
+            # çalıştırmada gösterilir: dosya her hazırlamada bir kez belleğe alınır,
+            # sonraki çalıştırmalarda alınmaz. Üretilen dosya diskte önbellektedir
+            if st.button("📦 Dışa Aktarımı Hazırla"):
+                extension, mime, format_label = EXPORT_FORMATS[export_format]
+                with st.spinner("Dosya hazırlanıyor..."):
+                    export_path = export_artifact(aggregates, fingerprint, export_format)
+                with open(export_path, 'rb') as export_file:
+                    export_data = export_file.read()
+                st.download_button(
+                    label=f"📥 Filtrelenmiş Veriyi İndir ({format_label}, {len(export_data) / 1024 ** 2:,.1f} MB)",
+                    data=export_data,
+                    file_name=f"rfm_analizi_filtered.{extension}",
+                    mime=mime
+                )
+                st.caption("İndirme düğmesi yalnızca bu çalıştırmada geçerlidir; sayfa değişirse yeniden hazırlayın.")
+            
+            # Arka planda çizilen grafikleri yerlerine yerleştir
+            for chart_id, placeholder, future in pending_charts:
+                fill_chart(chart_id, placeholder, future)
+            
+            # Varsayılan verinin güncel paketi yoksa önbelleklerden arka planda yazılır
+            if data_source == "Varsayılan dosyayı kullan (data/OnlineRetail_RFMSCORE.csv)" and bundle is None:
+                build_bundle_async("data/OnlineRetail_RFMSCORE.csv")
+            
+        except Exception as e:
+            st.error(f"Veri yüklenirken hata oluştu: {str(e)}")
+            st.info("Lütfen CSV dosyanızın doğru formatta olduğundan emin olun.")
+
+    else:
+        st.info("👆 Lütfen RFM analizi verilerinizi yükleyin.")
         
-        # CSV indirme butonu
-        csv = filtered_df.to_csv(index=False)
-        st.download_button(
-            label="📥 Filtrelenmiş Veriyi İndir (CSV)",
-            data=csv,
-            file_name="rfm_analizi_filtered.csv",
-            mime="text/csv"
-        )
+        # Örnek veri formatı göster
+        st.subheader("📋 Beklenen Veri Formatı")
+        sample_data = {
+            'CustomerID': [12347, 12348, 12350],
+            'Recency': [5006, 5131, 5222],
+            'Frequency': [106, 5, 17],
+            'Monetary': [2540.29, 367.0, 334.40],
+            'RFMScore': [311, 143, 133],
+            'CustomerLevel': ['Low', 'Middle', 'Middle']
+        }
+        st.dataframe(pd.DataFrame(sample_data))
         
-    except Exception as e:
-        st.error(f"Veri yüklenirken hata oluştu: {str(e)}")
-        st.info("Lütfen CSV dosyanızın doğru formatta olduğundan emin olun.")
+        st.markdown("""
+        **Gerekli Sütunlar:**
+        - `CustomerID`: Müşteri kimlik numarası
+        - `Recency`: Son satın alımdan bu yana geçen gün sayısı
+        - `Frequency`: Toplam satın alma sayısı
+        - `Monetary`: Toplam harcama miktarı
+        - `RFMScore`: Hesaplanmış RFM skoru
+        - `CustomerLevel`: Müşteri segmenti (Low, Middle, Top vb.)
+        """)
 
-else:
-    st.info("👆 Lütfen RFM analizi verilerinizi yükleyin.")
-    
-    # Örnek veri formatı göster
-    st.subheader("📋 Beklenen Veri Formatı")
-    sample_data = {
-        'CustomerID': [12347, 12348, 12350],
-        'Recency': [5006, 5131, 5222],
-        'Frequency': [106, 5, 17],
-        'Monetary': [2540.29, 367.0, 334.40],
-        'RFMScore': [311, 143, 133],
-        'CustomerLevel': ['Low', 'Middle', 'Middle']
-    }
-    st.dataframe(pd.DataFrame(sample_data))
-    
-    st.markdown("""
-    **Gerekli Sütunlar:**
-    - `CustomerID`: Müşteri kimlik numarası
-    - `Recency`: Son satın alımdan bu yana geçen gün sayısı
-    - `Frequency`: Toplam satın alma sayısı
-    - `Monetary`: Toplam harcama miktarı
-    - `RFMScore`: Hesaplanmış RFM skoru
-    - `CustomerLevel`: Müşteri segmenti (Low, Middle, Top vb.)
-    """)
+    # Footer
+    st.markdown("---")
+    st.markdown("*Bu dashboard RFM analizi sonuçlarınızı görselleştirmek için tasarlanmıştır.*")
+finally:
+    profile_run = finish_run()
 
-# Footer
-st.markdown("---")
-st.markdown("*Bu dashboard RFM analizi sonuçlarınızı görselleştirmek için tasarlanmıştır.*")
+# Performans paneli - bu çalıştırmanın ve önceki çalıştırmaların aşama süreleri
+with st.sidebar.expander("⏱️ Performans"):
+    st.checkbox("Aşama sürelerini ölç", value=PROFILE_DEFAULT, key='profiling')
+    st.checkbox("Bellek ayırmalarını da ölç (tracemalloc, yavaşlatır)", key='profiling_memory')
+    if profile_run is None:
+        st.caption("Ölçüm kapalı. Açıldıktan sonraki çalıştırmalar burada listelenir.")
+    else:
+        profile_runs = [run for run in history() if run.label == profile_label]
+        st.caption(f"Son çalıştırma: {profile_run.wall / 1e6:,.0f} ms, {len(profile_run.spans)} aşama")
+        st.dataframe(pd.DataFrame(profile_run.rows()), use_container_width=True, hide_index=True)
+        if len(profile_runs) > 1:
+            st.line_chart(pd.DataFrame({'Süre (ms)': [run.wall / 1e6 for run in profile_runs]}))
+        st.download_button(
+            "📥 Ölçümleri İndir (JSON)", data=to_json(profile_runs),
+            file_name="rfm_profile.json", mime="application/json"
+        )
+        st.download_button(
+            "📥 Chrome Trace İndir", data=to_chrome_trace(profile_runs),
+            file_name="rfm_trace.json", mime="application/json"
+        )
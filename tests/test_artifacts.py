@@ -0,0 +1,39 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from rfm.artifacts import build_bundle, open_bundle
+from rfm.figures import FigureRenderer
+from rfm.loader import load_rfm_data
+from rfm.synthetic import write_rfm_csv
+
+
+class RemovedBundle(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.source = write_rfm_csv(os.path.join(cls.tmp, 'rfm.csv'), 2000)
+        cls.root = os.path.join(cls.tmp, 'bundles')
+        cls.renderer = FigureRenderer(workers=0)
+        cls.bundle = build_bundle(cls.source, cls.root, renderer=cls.renderer)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def test_removed_bundle_is_a_cache_miss(self):
+        self.assertIs(open_bundle(self.source, self.root), self.bundle)
+        shutil.rmtree(self.bundle.path)
+        # Süreçteki nesne hâlâ eski klasörü gösterir; eksik dosyalar hata değildir
+        self.assertFalse(self.bundle.install(load_rfm_data(self.source).copy(), self.renderer))
+        self.assertIsNone(open_bundle(self.source, self.root))
+
+        rebuilt = build_bundle(self.source, self.root, renderer=self.renderer)
+        self.assertIs(open_bundle(self.source, self.root), rebuilt)
+        self.assertTrue(rebuilt.install(load_rfm_data(self.source).copy(), self.renderer))
+
+
+if __name__ == '__main__':
+    unittest.main()
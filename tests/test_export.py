@@ -0,0 +1,56 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from rfm import export
+from rfm.aggregates import build_aggregate_cache
+from rfm.filtering import build_filter_index
+from rfm.synthetic import generate_rfm
+
+
+class ConcurrentExports(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        patcher = mock.patch.object(export, 'EXPORT_DIR', self.tmp)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        df = generate_rfm(2000)
+        index, cache = build_filter_index(df), build_aggregate_cache(df)
+        self.all = cache.get(index.all())
+        self.top = cache.get(index.query(['Top']))
+
+    def test_slow_export_does_not_block_other_files(self):
+        cached = export.export_artifact(self.top, 'fp', 'csv')
+        started, release = threading.Event(), threading.Event()
+        write_export = export.write_export
+
+        def slow_write(aggregates, path, fmt, *args):
+            started.set()
+            release.wait(10)
+            write_export(aggregates, path, fmt, *args)
+
+        with mock.patch.object(export, 'write_export', slow_write):
+            slow = threading.Thread(target=export.export_artifact, args=(self.all, 'fp', 'csv.gz'))
+            slow.start()
+            self.assertTrue(started.wait(10))
+            try:
+                # Yazım sürerken hazır dosya ve başka bir filtre beklemez
+                self.assertEqual(export.export_artifact(self.top, 'fp', 'csv'), cached)
+                self.assertTrue(slow.is_alive())
+            finally:
+                release.set()
+                slow.join(10)
+        path = export.export_artifact(self.all, 'fp', 'csv.gz')
+        self.assertEqual(len(pd.read_csv(path)), len(self.all))
+        self.assertEqual(len(pd.read_csv(cached)), len(self.top))
+
+
+if __name__ == '__main__':
+    unittest.main()
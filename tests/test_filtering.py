@@ -0,0 +1,28 @@
+import unittest
+
+import numpy as np
+
+from rfm.filtering import FilterIndex
+from rfm.synthetic import generate_rfm
+
+
+class FilterMeansSkipNaN(unittest.TestCase):
+
+    def setUp(self):
+        self.df = generate_rfm(5000)
+        self.df.loc[self.df.index[::7], 'Monetary'] = np.nan
+        self.selection = FilterIndex(self.df).query(['Top', 'Low'], 200, 400)
+
+    def test_mean_matches_pandas(self):
+        frame = self.selection.frame()
+        for col in ['Monetary', 'Recency']:
+            self.assertAlmostEqual(self.selection.mean(col), frame[col].mean(), delta=1e-3 * abs(frame[col].mean()))
+
+    def test_by_level_matches_groupby(self):
+        expected = self.selection.frame().groupby('CustomerLevel', observed=True)['Monetary'].mean()
+        by_level = self.selection.by_level()
+        np.testing.assert_allclose(by_level.loc[expected.index, 'Monetary'], expected, rtol=1e-5)
+
+
+if __name__ == '__main__':
+    unittest.main()
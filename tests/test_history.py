@@ -0,0 +1,41 @@
+import shutil
+import tempfile
+import unittest
+
+from rfm.history import SnapshotHistory
+from rfm.segmentation import segment_view
+from rfm.synthetic import generate_rfm
+
+
+class SnapshotLevels(unittest.TestCase):
+
+    def test_segment_view_is_stored_with_source_levels(self):
+        df = generate_rfm(2000)
+        with tempfile.TemporaryDirectory() as root:
+            history = SnapshotHistory(root)
+            history.append(segment_view(df, 3))
+            self.assertEqual(sorted(history.level_counts().columns), sorted(df['CustomerLevel'].unique()))
+
+
+class SnapshotVersion(unittest.TestCase):
+
+    def test_version_changes_when_history_is_rebuilt(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = f"{tmp}/history"
+            writer, reader = SnapshotHistory(root), SnapshotHistory(root)
+            writer.append(generate_rfm(500, seed=1))
+            # Başka bir süreçteki gibi: okuyucu meta.json değişince günceller
+            first = reader.version()
+            self.assertIsNotNone(first)
+            self.assertEqual(len(reader), 1)
+
+            # Aynı sayıda görüntüyle yeniden oluşturulan geçmiş eski sonuçları göstermez
+            shutil.rmtree(root)
+            SnapshotHistory(root).append(generate_rfm(800, seed=2))
+            self.assertNotEqual(reader.version(), first)
+            self.assertEqual(len(reader), 1)
+            self.assertEqual(reader.snapshots()['rows'].tolist(), [800])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from rfm.cli import main
+from rfm.incremental import RFMStateStore
+from rfm.scoring import QUANTILES, compute_rfm
+
+ANALYZE_DATE = pd.Timestamp('2011-12-10')
+
+
+def transaction_lines(n_invoices=3000, n_customers=400, seed=0):
+    """Günlere dağılmış fatura satırları; her fatura tek bir güne düşer."""
+    rng = np.random.default_rng(seed)
+    invoice_customer = rng.integers(12346, 12346 + n_customers, n_invoices)
+    invoice_day = rng.integers(0, 365, n_invoices)
+    lines_per_invoice = rng.integers(1, 5, n_invoices)
+    invoice = np.repeat(np.arange(n_invoices), lines_per_invoice)
+    return pd.DataFrame({
+        'InvoiceNo': (536365 + invoice).astype(str),
+        'CustomerID': invoice_customer[invoice],
+        'InvoiceDate': pd.Timestamp('2010-12-01') + pd.to_timedelta(invoice_day[invoice], unit='D'),
+        'Quantity': rng.integers(1, 24, len(invoice)),
+        'UnitPrice': np.round(rng.lognormal(1, 0.8, len(invoice)), 2),
+    })
+
+
+def daily_batches(lines, n_batches=4):
+    """Satırları tarihe göre ardışık gruplara böler (faturalar bölünmez)."""
+    cuts = pd.qcut(lines['InvoiceDate'].rank(method='dense'), n_batches, labels=False)
+    return [lines[cuts == i] for i in range(n_batches)]
+
+
+class IncrementalMatchesFullRecompute(unittest.TestCase):
+
+    def setUp(self):
+        self.lines = transaction_lines()
+        self.full = compute_rfm(self.lines, ANALYZE_DATE).set_index('CustomerID')
+        self.store = RFMStateStore()
+        for batch in daily_batches(self.lines):
+            self.store.apply_batch(batch)
+
+    def assert_matches_full(self, scores):
+        scores = scores.set_index('CustomerID')
+        np.testing.assert_array_equal(scores.index.to_numpy(), self.full.index.to_numpy())
+        for col in ['InvoiceDate_max', 'Recency', 'Frequency', 'RecencyScore', 'FrequencyScore']:
+            np.testing.assert_array_equal(scores[col].to_numpy(), self.full[col].to_numpy(), err_msg=col)
+        np.testing.assert_allclose(scores['Monetary'], self.full['Monetary'], rtol=1e-6)
+
+        # Monetary sınırları göreli hata sınırlı özetten gelir; skor yalnızca
+        # gerçek sınıra bu hata kadar yakın müşterilerde farklı olabilir
+        exact_edges = np.quantile(self.full['Monetary'], QUANTILES)
+        near_edge = np.zeros(len(scores), dtype=bool)
+        for edge in exact_edges:
+            near_edge |= np.abs(self.full['Monetary'].to_numpy() - edge) <= 2 * self.store.relative_accuracy * edge
+        np.testing.assert_array_equal(
+            scores['MonetaryScore'].to_numpy()[~near_edge], self.full['MonetaryScore'].to_numpy()[~near_edge]
+        )
+
+    def test_batches_match_full_recompute(self):
+        self.assert_matches_full(self.store.scores(ANALYZE_DATE))
+
+    def test_edges_match_full_recompute(self):
+        edges = self.store.edges(ANALYZE_DATE)
+        for col in ['Recency', 'Frequency']:
+            np.testing.assert_allclose(edges[col], np.quantile(self.full[col], QUANTILES), err_msg=col)
+        np.testing.assert_allclose(
+            edges['Monetary'], np.quantile(self.full['Monetary'], QUANTILES), rtol=2 * self.store.relative_accuracy
+        )
+
+    def test_save_and_load_round_trip(self):
+        with tempfile.TemporaryDirectory() as path:
+            self.store.save(path)
+            loaded = RFMStateStore.load(path)
+        pd.testing.assert_frame_equal(loaded.scores(ANALYZE_DATE), self.store.scores(ANALYZE_DATE))
+
+    def test_cli_ingest_matches_full_recompute(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sources = []
+            for i, batch in enumerate(daily_batches(self.lines)):
+                sources.append(os.path.join(tmp, f"lines-{i}.csv"))
+                batch.to_csv(sources[-1], index=False)
+            state, output = os.path.join(tmp, 'state'), os.path.join(tmp, 'rfm.csv')
+            args = ['ingest', '--state', state, '--analyze-date', f"{ANALYZE_DATE:%Y-%m-%d}", '-o', output]
+            self.assertEqual(main(args[:1] + sources[:2] + args[1:]), 0)
+            # İkinci çalıştırmada önceki dosyalar atlanır, yalnızca yeniler eklenir
+            self.assertEqual(main(args[:1] + sources + args[1:]), 0)
+            self.assertEqual(len(RFMStateStore.load(state).batches), len(sources))
+            scores = pd.read_csv(output, parse_dates=['InvoiceDate_max'])
+        self.assert_matches_full(scores)
+
+
+if __name__ == '__main__':
+    unittest.main()
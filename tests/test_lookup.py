@@ -0,0 +1,38 @@
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from rfm.filtering import FilterIndex
+from rfm.lookup import CustomerIndex
+from rfm.synthetic import FIRST_CUSTOMER_ID, generate_rfm
+
+
+class CustomerLookup(unittest.TestCase):
+
+    def setUp(self):
+        self.customers = CustomerIndex(FilterIndex(generate_rfm(5000)))
+
+    def test_repeated_lookups_reuse_the_hash_index(self):
+        self.customers.lookup(FIRST_CUSTOMER_ID)
+        engine = self.customers.ids._engine
+        # Sorgu indeksin tipinde değilse pandas indeksi her çağrıda
+        # yükseltir (astype) ve hash tablosunu yeniden kurar
+        with mock.patch.object(pd.Index, 'astype', autospec=True, side_effect=pd.Index.astype) as astype:
+            for customer_id in range(FIRST_CUSTOMER_ID, FIRST_CUSTOMER_ID + 20):
+                self.customers.lookup(customer_id)
+        self.assertEqual(astype.call_count, 0)
+        self.assertIs(self.customers.ids._engine, engine)
+
+    def test_lookup_finds_the_customer(self):
+        rows = self.customers.lookup(FIRST_CUSTOMER_ID + 10)
+        self.assertEqual(rows['CustomerID'].tolist(), [FIRST_CUSTOMER_ID + 10])
+        self.assertTrue(rows['Selected'].iat[0])
+
+    def test_ids_outside_the_index_dtype_are_not_found(self):
+        for customer_id in [2 ** 40 + FIRST_CUSTOMER_ID, FIRST_CUSTOMER_ID + 0.5, 'x']:
+            self.assertTrue(self.customers.lookup(customer_id).empty, customer_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
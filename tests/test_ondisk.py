@@ -0,0 +1,50 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from rfm.filtering import FilterIndex
+from rfm.loader import load_rfm_data
+from rfm.ondisk import OnDiskTable, write_dataset
+from rfm.synthetic import generate_rfm
+
+
+class OnDiskMeansSkipNaN(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        df = generate_rfm(5000)
+        df['Monetary'] = df['Monetary'].astype('float64')
+        df.loc[df.index[::7], 'Monetary'] = np.nan
+        df.loc[df.index[::11], 'Recency'] = np.nan
+        cls.source = os.path.join(cls.tmp, 'rfm.csv')
+        df.to_csv(cls.source, index=False, date_format='%Y-%m-%d')
+        root = os.path.join(cls.tmp, 'dataset')
+        write_dataset(cls.source, None, root)
+        cls.table = OnDiskTable(root)
+        cls.index = FilterIndex(load_rfm_data(cls.source))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def test_mean_matches_pandas_backend(self):
+        for args in [(), (['Top', 'Low'], 200, 400)]:
+            expected, selection = self.index.query(*args), self.table.query(*args)
+            self.assertEqual(len(selection), len(expected))
+            for col in ['Monetary', 'Recency', 'Frequency']:
+                self.assertAlmostEqual(selection.mean(col), expected.mean(col), delta=1e-6 * abs(expected.mean(col)))
+
+    def test_by_level_matches_pandas_backend(self):
+        expected = self.index.query(['Top', 'Low'], 200, 400).by_level()
+        by_level = self.table.query(['Top', 'Low'], 200, 400).by_level()
+        np.testing.assert_array_equal(by_level['count'], expected['count'])
+        for col in ['Monetary', 'Recency']:
+            np.testing.assert_allclose(by_level.loc[expected.index, col], expected[col], rtol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pandas as pd
+
+from rfm import loader
+from rfm.partitions import PARTITION_COLUMN, discover_partitions, load_partitions
+from rfm.synthetic import write_rfm_csv
+
+
+class ManyPartitions(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.data = os.path.join(self.tmp, 'data')
+        os.makedirs(self.data)
+        cache_dir = os.path.join(self.tmp, 'cache')
+        patcher = mock.patch.object(loader, 'CACHE_DIR', cache_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+
+    def test_more_partitions_than_sidecar_files(self):
+        count = loader.MAX_SIDECAR_FILES + 8
+        for i in range(count):
+            write_rfm_csv(os.path.join(self.data, f"part-{i:02d}.csv"), 50, seed=1000 + i)
+        partitions = discover_partitions(self.data)
+        self.assertEqual(len(partitions), count)
+
+        df = load_partitions(partitions, workers=0)
+        expected = pd.concat([loader.read_rfm_csv(loader.read_source(path)) for path in partitions.values()])
+        self.assertEqual(len(df), len(expected))
+        self.assertEqual(list(df[PARTITION_COLUMN].cat.categories), list(partitions))
+        self.assertEqual(df[PARTITION_COLUMN].value_counts().min(), 50)
+        self.assertEqual(sorted(df['CustomerID']), sorted(expected['CustomerID']))
+        self.assertLessEqual(len(os.listdir(loader.CACHE_DIR)), loader.MAX_SIDECAR_FILES)
+
+
+if __name__ == '__main__':
+    unittest.main()
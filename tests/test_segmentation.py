@@ -0,0 +1,37 @@
+import unittest
+
+import numpy as np
+
+from rfm.segmentation import MISSING_SEGMENT, SOURCE_LEVEL_COLUMN, segment_names, segment_view
+from rfm.synthetic import generate_rfm
+
+
+class SegmentViews(unittest.TestCase):
+
+    def test_views_survive_other_sessions(self):
+        frames = [generate_rfm(2000, seed=seed) for seed in range(2)]
+        first = {(i, k): segment_view(df, k) for i, df in enumerate(frames) for k in (2, 3, 4)}
+        # Farklı veri ve küme sayılarıyla çalışan oturumlar birbirinin
+        # görünümünü atmaz; aynı nesne yeniden kullanılır
+        for (i, k), view in first.items():
+            self.assertIs(segment_view(frames[i], k), view)
+
+    def test_rows_with_missing_features_get_their_own_segment(self):
+        df = generate_rfm(2000)
+        df['Monetary'] = df['Monetary'].astype('float64')
+        missing = df.index[::9]
+        df.loc[missing, 'Monetary'] = np.nan
+        view = segment_view(df, 3)
+        levels = view['CustomerLevel']
+        self.assertEqual(list(levels.cat.categories), segment_names(3) + [MISSING_SEGMENT])
+        self.assertTrue((levels.loc[missing] == MISSING_SEGMENT).all())
+        self.assertFalse((levels.drop(missing) == MISSING_SEGMENT).any())
+        self.assertEqual(view[SOURCE_LEVEL_COLUMN].tolist(), df['CustomerLevel'].tolist())
+
+    def test_complete_data_has_no_missing_segment(self):
+        view = segment_view(generate_rfm(2000, seed=5), 3)
+        self.assertEqual(list(view['CustomerLevel'].cat.categories), segment_names(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+import numpy as np
+
+from rfm.filtering import FilterIndex
+from rfm.summaries import RELATIVE_ACCURACY, LevelSummaries
+from rfm.synthetic import generate_rfm
+
+
+class SummariesSkipNaN(unittest.TestCase):
+
+    def setUp(self):
+        df = generate_rfm(5000)
+        df['Monetary'] = df['Monetary'].astype('float64')
+        df.loc[df.index[::5], 'Monetary'] = np.nan
+        df.loc[df.index[::3], 'Recency'] = np.nan
+        self.index = FilterIndex(df)
+        self.summaries = LevelSummaries(self.index)
+        self.selection = self.index.query(['Top', 'Low'], 200, 400)
+        self.assertTrue(self.summaries.available)
+
+    def test_counts_match_valid_counts(self):
+        for col in ['Monetary', 'Recency', 'Frequency']:
+            per_level = self.summaries.by_level(self.selection, col)
+            for level, (a, b) in self.selection.ranges.items():
+                self.assertEqual(per_level[level].count, self.index.valid_count(col, a, b), (col, level))
+
+    def test_quantiles_match_pandas(self):
+        frame = self.selection.frame()
+        qs = [0.1, 0.25, 0.5, 0.75, 0.9]
+        recency = self.summaries.overall(self.selection, 'Recency').quantile(qs)
+        np.testing.assert_allclose(recency, frame['Recency'].quantile(qs), rtol=1e-9)
+        monetary = self.summaries.overall(self.selection, 'Monetary').quantile(qs)
+        np.testing.assert_allclose(monetary, frame['Monetary'].quantile(qs), rtol=2 * RELATIVE_ACCURACY)
+
+
+if __name__ == '__main__':
+    unittest.main()